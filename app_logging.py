@@ -0,0 +1,130 @@
+import contextvars
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+
+
+# Request ID of the HTTP request being handled, copied into plotter worker threads
+request_id_var = contextvars.ContextVar('request_id', default=None)
+# Client-supplied request IDs end up in log lines and profile filenames
+REQUEST_ID_PATTERN = re.compile(r'^[0-9A-Za-z_-]{1,64}$')
+
+LEVEL_LABELS = {'WARNING': 'WARN'}
+RATE_LIMIT_WINDOW_SECONDS = 60
+LOG_HANDLER_NAME = 'plot-server'
+# Access logs share one message template per line and must never be rate limited
+RATE_LIMIT_EXEMPT_LOGGERS = ('werkzeug',)
+
+
+def resolve_request_id(header_value):
+    """Return the client's X-Request-ID if it is a safe token, otherwise a fresh ID."""
+    if header_value and REQUEST_ID_PATTERN.match(header_value):
+        return header_value
+    return uuid.uuid4().hex[:16]
+
+
+class RequestContextFilter(logging.Filter):
+    def filter(self, record):
+        """Attach the current request ID to every record."""
+        record.request_id = request_id_var.get()
+        return True
+
+
+class RateLimitFilter(logging.Filter):
+    def __init__(self, max_per_window, window_seconds=RATE_LIMIT_WINDOW_SECONDS):
+        """Let at most ``max_per_window`` records per message template through each window."""
+        super().__init__()
+        self.max_per_window = max_per_window
+        self.window_seconds = window_seconds
+        self.windows = {}
+        self.lock = threading.Lock()
+
+    def filter(self, record):
+        """Drop repeats of a noisy message and report how many were dropped."""
+        if self.max_per_window <= 0 or record.name in RATE_LIMIT_EXEMPT_LOGGERS:
+            return True
+
+        # Keyed by the unformatted template so "%s" arguments do not defeat the limit
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self.lock:
+            window_started_at, emitted, suppressed = self.windows.get(key, (now, 0, 0))
+            if now - window_started_at >= self.window_seconds:
+                window_started_at, emitted = now, 0
+
+            if emitted >= self.max_per_window:
+                self.windows[key] = (window_started_at, emitted, suppressed + 1)
+                return False
+
+            self.windows[key] = (window_started_at, emitted + 1, 0)
+
+        record.suppressed = suppressed
+        return True
+
+
+class TextFormatter(logging.Formatter):
+    def format(self, record):
+        """Format records as the familiar ``[WARN] message`` lines plus key=value fields."""
+        level = LEVEL_LABELS.get(record.levelname, record.levelname)
+        line = f"[{level}] {record.getMessage()}"
+
+        fields = dict(getattr(record, 'fields', None) or {})
+        if getattr(record, 'request_id', None):
+            fields['request_id'] = record.request_id
+        if getattr(record, 'suppressed', 0):
+            fields['suppressed'] = record.suppressed
+        if fields:
+            line += ' ' + ' '.join(f"{key}={value}" for key, value in fields.items())
+
+        if record.exc_info:
+            line += '\n' + self.formatException(record.exc_info)
+        return line
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        """Format records as one JSON object per line for log shippers."""
+        entry = {
+            'time': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(record.created)) + f".{int(record.msecs):03d}",
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'request_id', None):
+            entry['request_id'] = record.request_id
+        if getattr(record, 'suppressed', 0):
+            entry['suppressed'] = record.suppressed
+        entry.update(getattr(record, 'fields', None) or {})
+
+        if record.exc_info:
+            entry['exception'] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=True, default=str)
+
+
+def configure_logging():
+    """Install the stderr log handler once, configured by LOG_LEVEL, LOG_FORMAT and LOG_RATE_LIMIT.
+
+    Logs go to stderr so they never mix with the AxiDraw report text captured from stdout.
+    """
+    root_logger = logging.getLogger()
+    if any(handler.get_name() == LOG_HANDLER_NAME for handler in root_logger.handlers):
+        return
+
+    log_level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+    if not isinstance(logging.getLevelName(log_level), int):
+        log_level = 'INFO'
+
+    log_format = os.environ.get('LOG_FORMAT', 'text').lower()
+    handler = logging.StreamHandler(sys.stderr)
+    handler.set_name(LOG_HANDLER_NAME)
+    handler.setFormatter(JsonFormatter() if log_format == 'json' else TextFormatter())
+    handler.addFilter(RequestContextFilter())
+    handler.addFilter(RateLimitFilter(int(os.environ.get('LOG_RATE_LIMIT', '10'))))
+
+    root_logger.addHandler(handler)
+    root_logger.setLevel(log_level)
@@ -0,0 +1,371 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from backends import RendererUnavailableError
+from compression import write_precompressed
+from svg_library import (
+    build_content_fingerprint,
+    build_file_entry,
+    build_thumbnail_relative_paths,
+    generate_svg_thumbnails,
+    get_thumbnail_formats,
+    normalize_relative_path,
+)
+
+
+logger = logging.getLogger(__name__)
+
+WATCHER_MODES = ('auto', 'inotify', 'poll', 'off')
+DEFAULT_POLL_INTERVAL_SECONDS = 2.0
+DEFAULT_DEBOUNCE_SECONDS = 0.5
+
+
+def is_artwork_file(filename):
+    """Return True for SVG artwork (rsync temp files and thumbnails are ignored)."""
+    return filename.lower().endswith('.svg') and not filename.startswith('.')
+
+
+class ArtworkIndex:
+    def __init__(self, art_dir):
+        """Keep an in-memory index of the SVG files below art_dir."""
+        self.art_dir = art_dir
+        self.files = {}
+        # {relative path: (fingerprint, md5)} filled in by ContentHashQueue
+        self.content_hashes = {}
+        self.lock = threading.Lock()
+        self.sorted_entries = None
+
+    def stat_file(self, absolute_path):
+        """Return the (added timestamp, mtime_ns, size) record of a file, or None if it is gone."""
+        try:
+            file_stats = os.stat(absolute_path)
+        except OSError:
+            return None
+        added_at = getattr(file_stats, 'st_birthtime', file_stats.st_mtime)
+        return (added_at, file_stats.st_mtime_ns, file_stats.st_size)
+
+    def walk(self):
+        """Return the current file records by walking the whole artwork tree."""
+        files = {}
+        for root, dirs, filenames in os.walk(self.art_dir):
+            for filename in filenames:
+                if not is_artwork_file(filename):
+                    continue
+                absolute_path = os.path.join(root, filename)
+                record = self.stat_file(absolute_path)
+                if record is not None:
+                    files[normalize_relative_path(os.path.relpath(absolute_path, self.art_dir))] = record
+        return files
+
+    def scan(self):
+        """Re-walk the tree and return the (change, relative path) pairs since the last scan."""
+        files = self.walk()
+        with self.lock:
+            previous_files = self.files
+            self.files = files
+            self.sorted_entries = None
+            self.content_hashes = {path: value for path, value in self.content_hashes.items() if path in files}
+
+        changes = [('removed', path) for path in previous_files if path not in files]
+        for path, record in files.items():
+            if path not in previous_files:
+                changes.append(('added', path))
+            elif previous_files[path][1:] != record[1:]:
+                changes.append(('modified', path))
+        return changes
+
+    def refresh_path(self, relative_path):
+        """Re-stat one file and return 'added', 'modified', 'removed' or None when unchanged."""
+        relative_path = normalize_relative_path(relative_path)
+        record = None
+        if is_artwork_file(os.path.basename(relative_path)):
+            record = self.stat_file(os.path.join(self.art_dir, relative_path))
+
+        with self.lock:
+            previous_record = self.files.get(relative_path)
+            if record is None:
+                if previous_record is None:
+                    return None
+                del self.files[relative_path]
+                self.content_hashes.pop(relative_path, None)
+                change = 'removed'
+            elif previous_record is None:
+                self.files[relative_path] = record
+                change = 'added'
+            elif previous_record[1:] != record[1:]:
+                self.files[relative_path] = (previous_record[0],) + record[1:]
+                change = 'modified'
+            else:
+                return None
+            self.sorted_entries = None
+        return change
+
+    def get_fingerprint(self, relative_path):
+        """Return the content fingerprint of an indexed SVG, or None if it is not indexed."""
+        with self.lock:
+            record = self.files.get(normalize_relative_path(relative_path))
+        return build_content_fingerprint(record[1], record[2]) if record else None
+
+    def set_content_hash(self, relative_path, fingerprint, content_hash):
+        """Remember the content hash of one version (fingerprint) of an indexed SVG."""
+        relative_path = normalize_relative_path(relative_path)
+        with self.lock:
+            if relative_path in self.files:
+                self.content_hashes[relative_path] = (fingerprint, content_hash)
+
+    def get_content_hashes(self):
+        """Return {relative path: (fingerprint, content hash)} of every SVG hashed so far."""
+        with self.lock:
+            return dict(self.content_hashes)
+
+    def get_entries(self):
+        """Return UI entries for every SVG, newest first (cached until the index changes)."""
+        image_formats = get_thumbnail_formats()
+        with self.lock:
+            if self.sorted_entries is None:
+                ordered_paths = sorted(self.files.items(), key=lambda item: (-item[1][0], item[0].lower()))
+                self.sorted_entries = [
+                    build_file_entry(path, build_content_fingerprint(record[1], record[2]), image_formats)
+                    for path, record in ordered_paths
+                ]
+            return self.sorted_entries
+
+
+class ThumbnailQueue:
+    def __init__(self, art_dir):
+        """Regenerate thumbnails and precompressed SVGs one at a time on a background thread."""
+        self.art_dir = art_dir
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='thumbnails')
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def enqueue(self, relative_path):
+        """Queue a thumbnail render unless one for the same file is already waiting."""
+        with self.lock:
+            if relative_path in self.pending:
+                return
+            self.pending.add(relative_path)
+        self.worker.submit(self.regenerate, relative_path)
+
+    def regenerate(self, relative_path):
+        """Render the thumbnail tiers and .br/.gz copies of one SVG when missing or older than the SVG."""
+        with self.lock:
+            self.pending.discard(relative_path)
+
+        svg_path = os.path.join(self.art_dir, relative_path)
+        try:
+            write_precompressed(svg_path)
+        except OSError as error:
+            logger.warning("Failed to precompress %s: %s", relative_path, error)
+
+        thumbnail_paths = {
+            key: os.path.join(self.art_dir, thumbnail_relative_path)
+            for key, thumbnail_relative_path in build_thumbnail_relative_paths(relative_path, get_thumbnail_formats()).items()
+        }
+        try:
+            svg_modified_at = os.path.getmtime(svg_path)
+            if all(
+                os.path.exists(thumbnail_path) and os.path.getmtime(thumbnail_path) >= svg_modified_at
+                for thumbnail_path in thumbnail_paths.values()
+            ):
+                return
+            generate_svg_thumbnails(svg_path, thumbnail_paths)
+        except RendererUnavailableError as error:
+            logger.warning("Skipping thumbnail for %s: %s", relative_path, error)
+        except Exception as error:
+            logger.warning("Failed to generate thumbnail for %s: %s", relative_path, error)
+
+
+class ContentHashQueue:
+    def __init__(self, artwork_index, hash_file):
+        """Hash added and modified SVGs on a background thread and store the hashes in the index.
+
+        ``hash_file(absolute path)`` returns a file's content hash, so the listing
+        can join data keyed by content without reading any file itself.
+        """
+        self.index = artwork_index
+        self.hash_file = hash_file
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='content-hashes')
+        self.pending = set()
+        self.lock = threading.Lock()
+
+    def enqueue(self, relative_path):
+        """Queue a hash unless one for the same file is already waiting."""
+        with self.lock:
+            if relative_path in self.pending:
+                return
+            self.pending.add(relative_path)
+        self.worker.submit(self.update, relative_path)
+
+    def update(self, relative_path):
+        """Hash the current version of one indexed SVG."""
+        with self.lock:
+            self.pending.discard(relative_path)
+
+        # Read first: a hash stored under an older fingerprint is ignored by the listing
+        fingerprint = self.index.get_fingerprint(relative_path)
+        if fingerprint is None:
+            return
+        try:
+            content_hash = self.hash_file(os.path.join(self.index.art_dir, relative_path))
+        except OSError as error:
+            logger.warning("Failed to hash %s: %s", relative_path, error)
+            return
+        self.index.set_content_hash(relative_path, fingerprint, content_hash)
+
+
+class ArtworkWatcher:
+    def __init__(self, artwork_index, mode=None, poll_interval=None, debounce=None):
+        """Keep an ArtworkIndex in sync with the filesystem and report changes to listeners.
+
+        PLOT_FILE_WATCHER selects auto (inotify when inotify_simple is installed,
+        otherwise polling), inotify, poll or off (rescan on every listing).
+        """
+        self.index = artwork_index
+        self.mode = (mode or os.environ.get('PLOT_FILE_WATCHER', 'auto')).lower()
+        if self.mode not in WATCHER_MODES:
+            logger.warning("Unknown PLOT_FILE_WATCHER %s; using auto", self.mode)
+            self.mode = 'auto'
+        self.poll_interval = poll_interval or float(
+            os.environ.get('PLOT_FILE_WATCHER_POLL_SECONDS', DEFAULT_POLL_INTERVAL_SECONDS)
+        )
+        self.debounce = debounce or float(
+            os.environ.get('PLOT_FILE_WATCHER_DEBOUNCE_SECONDS', DEFAULT_DEBOUNCE_SECONDS)
+        )
+        self.listeners = []
+        self.thread = None
+        self.start_lock = threading.Lock()
+        self.stopped = threading.Event()
+
+    def add_listener(self, callback):
+        """Call ``callback(change, relative_path)`` for every added, modified or removed SVG."""
+        self.listeners.append(callback)
+
+    def notify(self, changes):
+        """Pass index changes on to the listeners."""
+        for change, relative_path in changes:
+            logger.debug("Artwork %s: %s", change, relative_path)
+            for callback in self.listeners:
+                try:
+                    callback(change, relative_path)
+                except Exception as error:
+                    logger.warning("Artwork listener failed for %s: %s", relative_path, error)
+
+    def refresh(self, relative_path):
+        """Update one path right away, e.g. after an upload or delete through the API."""
+        change = self.index.refresh_path(relative_path)
+        if change:
+            self.notify([(change, normalize_relative_path(relative_path))])
+        return change
+
+    def start(self):
+        """Start watching, or with the watcher off, apply the changes found by one scan."""
+        if self.mode == 'off':
+            self.notify(self.index.scan())
+        else:
+            self.ensure_started()
+
+    def get_entries(self):
+        """Return the current library listing, starting the watcher on first use."""
+        self.start()
+        return self.index.get_entries()
+
+    def ensure_started(self):
+        """Load the index and start the background watcher thread once."""
+        if self.thread is not None:
+            return
+
+        with self.start_lock:
+            if self.thread is not None:
+                return
+
+            watch_loop = self.watch_polling
+            if self.mode in ('auto', 'inotify'):
+                try:
+                    import inotify_simple
+                    # Watches go in before the initial scan so no change slips between them
+                    self.start_inotify(inotify_simple)
+                    watch_loop = self.watch_inotify
+                except ImportError:
+                    log = logger.warning if self.mode == 'inotify' else logger.info
+                    log("inotify_simple is not installed; polling %s every %ss", self.index.art_dir, self.poll_interval)
+
+            # Files that arrived while the server was down still need thumbnails
+            self.notify(self.index.scan())
+
+            self.thread = threading.Thread(target=watch_loop, name='artwork-watcher', daemon=True)
+            self.thread.start()
+
+    def stop(self):
+        """Ask the watcher thread to exit."""
+        self.stopped.set()
+
+    def watch_polling(self):
+        """Fallback watcher: rescan the tree on an interval and report the differences."""
+        while not self.stopped.wait(self.poll_interval):
+            try:
+                self.notify(self.index.scan())
+            except Exception as error:
+                logger.warning("Artwork scan failed: %s", error)
+
+    def start_inotify(self, inotify_simple):
+        """Create the inotify instance and watch every directory of the artwork tree."""
+        self.flags = inotify_simple.flags
+        self.watch_mask = (
+            self.flags.CLOSE_WRITE | self.flags.MOVED_TO | self.flags.MOVED_FROM
+            | self.flags.CREATE | self.flags.DELETE | self.flags.DELETE_SELF
+        )
+        self.inotify = inotify_simple.INotify()
+        self.watched_directories = {}
+        self.watch_tree(self.index.art_dir)
+
+    def watch_tree(self, directory):
+        """Add an inotify watch for a directory and everything below it."""
+        for root, dirs, filenames in os.walk(directory):
+            try:
+                self.watched_directories[self.inotify.add_watch(root, self.watch_mask)] = root
+            except OSError as error:
+                logger.warning("Unable to watch %s: %s", root, error)
+
+    def watch_inotify(self):
+        """Refresh paths reported by inotify once they have been quiet for the debounce period."""
+        flags = self.flags
+        pending_paths = {}
+        rescan_requested_at = None
+
+        while not self.stopped.is_set():
+            for event in self.inotify.read(timeout=int(self.debounce * 1000)):
+                if event.mask & flags.Q_OVERFLOW:
+                    rescan_requested_at = time.monotonic()
+                    continue
+
+                directory = self.watched_directories.get(event.wd)
+                if directory is None:
+                    continue
+                if event.mask & flags.IGNORED:
+                    del self.watched_directories[event.wd]
+                    continue
+
+                path = os.path.join(directory, event.name)
+                if event.mask & flags.ISDIR:
+                    # Whole folders moved in or out: watch them and diff the tree
+                    if event.mask & (flags.CREATE | flags.MOVED_TO):
+                        self.watch_tree(path)
+                    rescan_requested_at = time.monotonic()
+                elif is_artwork_file(event.name):
+                    pending_paths[os.path.relpath(path, self.index.art_dir)] = time.monotonic()
+
+            # rsync and editors touch a file several times; wait until it has settled
+            settled_before = time.monotonic() - self.debounce
+            if rescan_requested_at is not None and rescan_requested_at <= settled_before:
+                rescan_requested_at = None
+                pending_paths.clear()
+                self.notify(self.index.scan())
+
+            for relative_path, changed_at in list(pending_paths.items()):
+                if changed_at <= settled_before:
+                    del pending_paths[relative_path]
+                    self.refresh(relative_path)
@@ -0,0 +1,103 @@
+import importlib
+import logging
+import os
+import threading
+
+
+logger = logging.getLogger(__name__)
+
+
+class HardwareUnavailableError(RuntimeError):
+    """Raised when the AxiDraw backend cannot be imported (e.g. missing USB stack)."""
+
+
+class RendererUnavailableError(RuntimeError):
+    """Raised when the SVG renderer (CairoSVG and its native Cairo library) cannot load."""
+
+
+class LazyModuleProvider:
+    def __init__(self, module_name, error_class):
+        """Import a backend module on first use instead of at server startup."""
+        self.module_name = module_name
+        self.error_class = error_class
+        self.module = None
+        # A failed import is remembered so optional modules are not retried per request
+        self.error = None
+        self.lock = threading.Lock()
+
+    def get(self):
+        """Return the imported module, raising ``error_class`` when it cannot be loaded."""
+        if self.module is not None:
+            return self.module
+
+        with self.lock:
+            if self.module is None and self.error is None:
+                try:
+                    self.module = importlib.import_module(self.module_name)
+                except (ImportError, OSError) as error:
+                    self.error = error
+            if self.error is not None:
+                raise self.error_class(f"{self.module_name} is unavailable: {self.error}") from self.error
+        return self.module
+
+
+# AXIDRAW_BACKEND selects the module providing the AxiDraw class
+AXIDRAW_BACKEND_MODULES = {
+    'pyaxidraw': 'pyaxidraw.axidraw',
+    'simulated': 'simulated_axidraw',
+}
+
+
+def get_axidraw_backend_module():
+    """Return the AxiDraw module name selected by AXIDRAW_BACKEND."""
+    backend = os.environ.get('AXIDRAW_BACKEND', 'pyaxidraw').lower()
+    if backend not in AXIDRAW_BACKEND_MODULES:
+        logger.warning("Unknown AXIDRAW_BACKEND %s; using pyaxidraw", backend)
+        backend = 'pyaxidraw'
+    return AXIDRAW_BACKEND_MODULES[backend]
+
+
+axidraw_provider = LazyModuleProvider(get_axidraw_backend_module(), HardwareUnavailableError)
+svg_renderer_provider = LazyModuleProvider('cairosvg', RendererUnavailableError)
+# Pillow is optional: it resizes thumbnail tiers and writes WebP
+image_library_provider = LazyModuleProvider('PIL.Image', RendererUnavailableError)
+# Brotli is optional: without it responses and precompressed artwork use gzip only
+brotli_provider = LazyModuleProvider('brotli', ImportError)
+
+
+def create_axidraw():
+    """Create a new AxiDraw API instance, importing the selected backend on first use."""
+    return axidraw_provider.get().AxiDraw()
+
+
+def get_svg_renderer():
+    """Return the CairoSVG module used for thumbnails and PDFs, importing it on first use."""
+    return svg_renderer_provider.get()
+
+
+def get_image_library():
+    """Return Pillow's Image module, importing it on first use."""
+    return image_library_provider.get()
+
+
+def has_image_library():
+    """Return True when Pillow can be imported."""
+    try:
+        get_image_library()
+    except RendererUnavailableError:
+        return False
+    return True
+
+
+def get_brotli():
+    """Return the brotli module, importing it on first use."""
+    return brotli_provider.get()
+
+
+def has_brotli():
+    """Return True when brotli can be imported."""
+    try:
+        get_brotli()
+    except ImportError:
+        return False
+    return True
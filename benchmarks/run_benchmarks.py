@@ -0,0 +1,475 @@
+#!/usr/bin/env python
+#
+# Plot server benchmark suite
+# Measures the server hot paths against the simulated AxiDraw backend and
+# writes the results as JSON so runs can be compared across versions.
+#
+#  python benchmarks/run_benchmarks.py
+#  python benchmarks/run_benchmarks.py --quick --only listing,status
+#  python benchmarks/run_benchmarks.py --compare benchmarks/results/old.json
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# The suite never talks to real hardware
+os.environ.setdefault('AXIDRAW_BACKEND', 'simulated')
+os.environ.setdefault('AXIDRAW_SIM_LATENCY', '0.002')
+os.environ.setdefault('PLOT_STATE_BACKEND', 'memory')
+
+from werkzeug.datastructures import MultiDict  # noqa: E402
+
+import index  # noqa: E402
+from artwork_library import ArtworkIndex, ArtworkWatcher  # noqa: E402
+import preview_parser  # noqa: E402
+from plot_metrics import collect_plot_metrics  # noqa: E402
+from resume_store import ResumeStore  # noqa: E402
+from backends import RendererUnavailableError  # noqa: E402
+from svg_library import generate_svg_pdf_bytes, generate_svg_thumbnail, get_svg_dimensions_px  # noqa: E402
+from svg_polylines import export_svg_polylines  # noqa: E402
+
+
+RESULTS_DIR = os.path.join(REPO_DIR, 'benchmarks', 'results')
+# AxiDraw console reports (from the simulator or hand-written, see each file's origin)
+# and the metrics each one must parse to
+OUTPUT_CORPUS_DIR = os.path.join(REPO_DIR, 'benchmarks', 'fixtures', 'axidraw_output')
+SAMPLE_SVG = (
+    '<svg xmlns="http://www.w3.org/2000/svg" width="{width}mm" height="{height}mm" '
+    'viewBox="0 0 {width} {height}">\n{body}</svg>\n'
+)
+SAMPLE_PATH = '<path d="M{x} {y} L{x2} {y2} L{x} {y2} Z" stroke="black" fill="none"/>\n'
+SAMPLE_PREVIEW_OUTPUT = (
+    'Estimated print time: 1:02:03 (Hours, minutes, seconds)\n'
+    'Length of path to draw: 12.34 m\n'
+    'Pen-up travel distance: 5.67 m\n'
+)
+SAMPLE_PLOT_OUTPUT = (
+    'Elapsed time: 1:02:03 (Hours, minutes, seconds)\n'
+    'Length of path drawn: 12.34 m\n'
+    'Total distance moved: 18.01 m\n'
+    'Number of pen lifts: 1,234\n'
+)
+
+
+def summarize(timings):
+    """Return summary statistics (seconds) for a list of timings."""
+    return {
+        'runs': len(timings),
+        'median': statistics.median(timings),
+        'mean': statistics.fmean(timings),
+        'min': min(timings),
+        'max': max(timings),
+    }
+
+
+def measure(func, repeat):
+    """Call func repeatedly and return timing statistics."""
+    timings = []
+    for _ in range(repeat):
+        started_at = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started_at)
+    return summarize(timings)
+
+
+def build_svg_markup(path_count, width=200, height=150):
+    """Return an SVG document with the requested number of simple paths."""
+    body = ''.join(
+        SAMPLE_PATH.format(x=index_value % width, y=index_value % height, x2=(index_value + 5) % width, y2=(index_value + 7) % height)
+        for index_value in range(path_count)
+    )
+    return SAMPLE_SVG.format(width=width, height=height, body=body)
+
+
+def build_synthetic_tree(root_dir, file_count, files_per_directory=500):
+    """Create file_count tiny SVGs spread over nested folders."""
+    markup = build_svg_markup(3)
+    for file_number in range(file_count):
+        directory = os.path.join(root_dir, f"series-{file_number // files_per_directory:04d}")
+        if file_number % files_per_directory == 0:
+            os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f"sketch-{file_number:06d}.svg"), 'w', encoding='utf-8') as svg_file:
+            svg_file.write(markup)
+
+
+def benchmark_listing(args, work_dir):
+    """Scan synthetic trees of increasing size and render the library page from the index."""
+    results = {}
+    client = index.app.test_client()
+    original_watcher = index.artwork_watcher
+    try:
+        for file_count in args.tree_sizes:
+            tree_dir = os.path.join(work_dir, f"tree-{file_count}")
+            build_synthetic_tree(tree_dir, file_count)
+            artwork_index = ArtworkIndex(tree_dir)
+            scan_timings = measure(artwork_index.scan, args.repeat)
+
+            # A polling watcher that stays idle during the run: pages come from the index
+            index.artwork_watcher = ArtworkWatcher(artwork_index, mode='poll', poll_interval=3600)
+            index.artwork_watcher.ensure_started()
+            results[str(file_count)] = {
+                'scan': scan_timings,
+                'page': measure(lambda: client.get('/'), args.repeat),
+            }
+            index.artwork_watcher.stop()
+            shutil.rmtree(tree_dir)
+    finally:
+        index.artwork_watcher = original_watcher
+    return results
+
+
+def benchmark_plot_log(args, work_dir):
+    """Load the newest log entries from large plot logs."""
+    results = {}
+    original_log_file = index.PLOT_LOG_FILE
+    entry = {
+        'time': '2024-01-01 00:00:00', 'status': 'ok', 'title': 'Benchmark', 'filename': 'sketch.svg',
+        'fileHash': '0' * 32, 'plotter': 'sim-minikit', 'edition': '1/1', 'layer': 'all', 'tool': 'None',
+        'media': 'None', 'format': '8x10', 'orientation': 'Portrait', 'duration': 3600, 'path': 12.3,
+        'travel': 4.5, 'lifts': 1234,
+    }
+    line = json.dumps(entry) + '\n'
+    try:
+        for entry_count in args.log_sizes:
+            log_path = os.path.join(work_dir, f"plot-log-{entry_count}.jsonl")
+            with open(log_path, 'w', encoding='utf-8') as log_file:
+                log_file.write(line * entry_count)
+            index.PLOT_LOG_FILE = log_path
+            results[str(entry_count)] = measure(index.load_plot_log_entries, args.repeat)
+            os.remove(log_path)
+    finally:
+        index.PLOT_LOG_FILE = original_log_file
+    return results
+
+
+def benchmark_rendering(args, work_dir):
+    """Measure thumbnail and PDF generation throughput for a medium-sized SVG."""
+    svg_path = os.path.join(work_dir, 'render.svg')
+    with open(svg_path, 'w', encoding='utf-8') as svg_file:
+        svg_file.write(build_svg_markup(2000))
+
+    thumbnail_path = os.path.join(work_dir, 'render-tn@2x.png')
+    try:
+        thumbnail_stats = measure(lambda: generate_svg_thumbnail(svg_path, thumbnail_path), args.repeat)
+        pdf_stats = measure(lambda: generate_svg_pdf_bytes(svg_path), args.repeat)
+    except RendererUnavailableError as error:
+        return {'skipped': str(error)}
+
+    return {
+        'thumbnail': dict(thumbnail_stats, per_second=1 / thumbnail_stats['median']),
+        'pdf': dict(pdf_stats, per_second=1 / pdf_stats['median']),
+    }
+
+
+def benchmark_svg_dimensions(args, work_dir):
+    """Read the canvas size of very large SVG files."""
+    results = {}
+    for path_count in args.huge_svg_paths:
+        svg_path = os.path.join(work_dir, f"huge-{path_count}.svg")
+        with open(svg_path, 'w', encoding='utf-8') as svg_file:
+            svg_file.write(build_svg_markup(path_count))
+        results[str(path_count)] = dict(
+            measure(lambda: get_svg_dimensions_px(svg_path), args.repeat),
+            file_bytes=os.path.getsize(svg_path),
+        )
+        os.remove(svg_path)
+    return results
+
+
+def benchmark_polylines(args, work_dir):
+    """Export very large SVGs as binary polyline streams for the preview animator."""
+    results = {}
+    for path_count in args.huge_svg_paths:
+        svg_path = os.path.join(work_dir, f"polylines-{path_count}.svg")
+        polylines_path = os.path.join(work_dir, f"polylines-{path_count}.polylines")
+        with open(svg_path, 'w', encoding='utf-8') as svg_file:
+            svg_file.write(build_svg_markup(path_count))
+        results[str(path_count)] = dict(
+            measure(lambda: export_svg_polylines(svg_path, polylines_path), args.repeat),
+            file_bytes=os.path.getsize(svg_path),
+            polyline_bytes=os.path.getsize(polylines_path),
+        )
+        os.remove(svg_path)
+        os.remove(polylines_path)
+    return results
+
+
+def benchmark_preview_parser(args, work_dir):
+    """Parse preview and plot reports buried at the end of long console output."""
+    noise = ''.join(f"Processing path {line_number}: ok\n" for line_number in range(args.output_lines))
+    return {
+        'preview': measure(lambda: preview_parser.parse_preview_output(noise + SAMPLE_PREVIEW_OUTPUT), args.repeat),
+        'plot': measure(lambda: preview_parser.parse_plot_output(noise + SAMPLE_PLOT_OUTPUT), args.repeat),
+        'output_lines': args.output_lines,
+    }
+
+
+def load_output_corpus():
+    """Return (name, kind, console output, expected metrics) for every report in the corpus."""
+    with open(os.path.join(OUTPUT_CORPUS_DIR, 'corpus.json'), encoding='utf-8') as corpus_file:
+        corpus = json.load(corpus_file)
+
+    samples = []
+    for name, details in sorted(corpus.items()):
+        with open(os.path.join(OUTPUT_CORPUS_DIR, name), encoding='utf-8') as output_file:
+            samples.append((name, details['kind'], output_file.read(), details['expected']))
+    return samples
+
+
+def benchmark_plot_metrics(args, work_dir):
+    """Time the report parser on the output corpus against reading the API attributes.
+
+    tests/test_plot_metrics.py checks that both sources collect the right metrics.
+    """
+    samples = load_output_corpus()
+    plot_outputs = [output for _, kind, output, _ in samples if kind == 'plot']
+    api_instance = SimpleNamespace(time_elapsed=292.3, distance_pendown=6.85, distance_total=9.59, pen_lifts=137)
+    return {
+        'corpus_files': len(samples),
+        'output_parser': measure(lambda: [collect_plot_metrics(SimpleNamespace(), output) for output in plot_outputs], args.repeat),
+        'api_attributes': measure(lambda: [collect_plot_metrics(api_instance) for _ in plot_outputs], args.repeat),
+    }
+
+
+def benchmark_status(args, work_dir):
+    """Hit /status.json from several threads at once against the simulated plotter."""
+    client = index.app.test_client()
+    client.get('/status.json')
+    latencies = []
+    status_codes = {}
+    lock = threading.Lock()
+
+    def worker():
+        for _ in range(args.status_requests):
+            started_at = time.perf_counter()
+            response = client.get('/status.json')
+            elapsed = time.perf_counter() - started_at
+            with lock:
+                latencies.append(elapsed)
+                status_codes[response.status_code] = status_codes.get(response.status_code, 0) + 1
+
+    threads = [threading.Thread(target=worker) for _ in range(args.status_threads)]
+    started_at = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    total_seconds = time.perf_counter() - started_at
+
+    return dict(
+        summarize(latencies),
+        threads=args.status_threads,
+        requests_per_second=len(latencies) / total_seconds,
+        status_codes={str(code): count for code, count in status_codes.items()},
+    )
+
+
+def benchmark_stop(args, work_dir):
+    """Time from POST /plot/stop to pen-up while the simulated plotter is drawing."""
+    svg_path = os.path.join(work_dir, 'stop.svg')
+    with open(svg_path, 'w', encoding='utf-8') as svg_file:
+        svg_file.write(build_svg_markup(args.stop_paths))
+
+    client = index.app.test_client()
+    device = index.registry.get_device()
+    original_log_file = index.PLOT_LOG_FILE
+    original_resume_store = index.resume_store
+    original_time_scale = os.environ.get('AXIDRAW_SIM_TIME_SCALE')
+    # About 5 ms per simulated move, so the plot is mid-stroke when the stop arrives
+    os.environ['AXIDRAW_SIM_TIME_SCALE'] = '0.0025'
+    index.PLOT_LOG_FILE = os.path.join(work_dir, 'stop-plot-log.jsonl')
+    # Halted plots save resume points; keep them out of the real log/resume
+    index.resume_store = ResumeStore(os.path.join(work_dir, 'resume'))
+    # PLOT_RESUME_DIR would otherwise win over the work dir
+    index.resume_store.resume_dir = os.path.join(work_dir, 'resume')
+    pen_up_timings = []
+    request_timings = []
+    methods = {}
+    try:
+        for _ in range(args.repeat):
+            plot_thread = threading.Thread(
+                target=index.run_plot_job,
+                args=(device, 'stop.svg', svg_path, index.read_plot_options(MultiDict())),
+            )
+            plot_thread.start()
+            while device.halt is None:
+                time.sleep(0.001)
+            time.sleep(args.stop_after)
+
+            started_at = time.perf_counter()
+            response = client.post(f"/plot/stop?device={device.name}")
+            request_timings.append(time.perf_counter() - started_at)
+            plot_thread.join()
+
+            stop_result = response.get_json()['stop_result']
+            methods[stop_result['method']] = methods.get(stop_result['method'], 0) + 1
+            if stop_result['time_to_pen_up_ms'] is not None:
+                pen_up_timings.append(stop_result['time_to_pen_up_ms'] / 1000)
+    finally:
+        index.PLOT_LOG_FILE = original_log_file
+        index.resume_store = original_resume_store
+        if original_time_scale is None:
+            os.environ.pop('AXIDRAW_SIM_TIME_SCALE', None)
+        else:
+            os.environ['AXIDRAW_SIM_TIME_SCALE'] = original_time_scale
+
+    results = {
+        'stop_request': summarize(request_timings),
+        'methods': methods,
+        'target_seconds': 0.1,
+    }
+    if pen_up_timings:
+        results['time_to_pen_up'] = summarize(pen_up_timings)
+    return results
+
+
+def benchmark_startup(args, work_dir):
+    """Import the app in fresh interpreters and time the first catalog request."""
+    from startup_benchmark import run_startup_probe
+
+    reports = [run_startup_probe() for _ in range(args.repeat)]
+    return {
+        'import_seconds': summarize([report['import_seconds'] for report in reports]),
+        'first_request_seconds': summarize([report['first_request_seconds'] for report in reports]),
+    }
+
+
+BENCHMARKS = {
+    'listing': benchmark_listing,
+    'plot_log': benchmark_plot_log,
+    'rendering': benchmark_rendering,
+    'svg_dimensions': benchmark_svg_dimensions,
+    'polylines': benchmark_polylines,
+    'preview_parser': benchmark_preview_parser,
+    'plot_metrics': benchmark_plot_metrics,
+    'status': benchmark_status,
+    'stop': benchmark_stop,
+    'startup': benchmark_startup,
+}
+
+
+def get_git_revision():
+    """Return the current git commit, or None outside a git checkout."""
+    try:
+        completed = subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=REPO_DIR,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return completed.stdout.strip()
+
+
+def collect_medians(results, prefix=''):
+    """Flatten nested results into {dotted.name: median seconds}."""
+    medians = {}
+    for key, value in results.items():
+        if not isinstance(value, dict):
+            continue
+        name = f"{prefix}{key}"
+        if 'median' in value:
+            medians[name] = value['median']
+        else:
+            medians.update(collect_medians(value, f"{name}."))
+    return medians
+
+
+def print_comparison(baseline_path, results):
+    """Print median timing ratios against an earlier results file."""
+    with open(baseline_path, 'r', encoding='utf-8') as baseline_file:
+        baseline = json.load(baseline_file)
+
+    baseline_medians = collect_medians(baseline.get('benchmarks', {}))
+    current_medians = collect_medians(results['benchmarks'])
+    print(f"Comparison with {baseline_path} ({baseline.get('git_revision') or 'unknown revision'}):")
+    for name in sorted(current_medians):
+        if name not in baseline_medians or not baseline_medians[name]:
+            continue
+        ratio = current_medians[name] / baseline_medians[name]
+        print(f"  {name}: {baseline_medians[name] * 1000:.2f} ms -> {current_medians[name] * 1000:.2f} ms ({ratio:.2f}x)")
+
+
+def parse_int_list(value):
+    """Parse a comma separated list of integers."""
+    return [int(part) for part in value.split(',') if part]
+
+
+def parse_args():
+    """Parse command line options."""
+    parser = argparse.ArgumentParser(description='Benchmark plot server hot paths.')
+    parser.add_argument('--only', default='', help='comma separated benchmark names: ' + ', '.join(BENCHMARKS))
+    parser.add_argument('--quick', action='store_true', help='use small inputs for a fast smoke run')
+    parser.add_argument('--repeat', type=int, default=5, help='repetitions per measurement')
+    parser.add_argument('--tree-sizes', type=parse_int_list, default=None, help='SVG counts for listing (1000,10000,100000)')
+    parser.add_argument('--log-sizes', type=parse_int_list, default=None, help='plot log entry counts (10000,100000)')
+    parser.add_argument('--huge-svg-paths', type=parse_int_list, default=None, help='path counts for huge SVGs (200000)')
+    parser.add_argument('--output-lines', type=int, default=None, help='console lines before the preview report')
+    parser.add_argument('--status-threads', type=int, default=8, help='concurrent /status.json clients')
+    parser.add_argument('--status-requests', type=int, default=50, help='requests per /status.json client')
+    parser.add_argument('--stop-paths', type=int, default=2000, help='paths in the SVG plotted before a stop')
+    parser.add_argument('--stop-after', type=float, default=0.2, help='seconds of plotting before the stop request')
+    parser.add_argument('--output', default=None, help='results file (default benchmarks/results/<timestamp>.json)')
+    parser.add_argument('--compare', default=None, help='earlier results file to compare against')
+    args = parser.parse_args()
+
+    if args.quick:
+        args.repeat = min(args.repeat, 2)
+    args.tree_sizes = args.tree_sizes or ([200, 1000] if args.quick else [1000, 10000, 100000])
+    args.log_sizes = args.log_sizes or ([1000] if args.quick else [10000, 100000])
+    args.huge_svg_paths = args.huge_svg_paths or ([10000] if args.quick else [200000])
+    args.output_lines = args.output_lines or (10000 if args.quick else 200000)
+    return args
+
+
+def main():
+    """Run the selected benchmarks and write a JSON results file."""
+    args = parse_args()
+    selected = [name for name in args.only.split(',') if name] or list(BENCHMARKS)
+    unknown = [name for name in selected if name not in BENCHMARKS]
+    if unknown:
+        raise SystemExit(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    results = {
+        'app_version': index.APP_VERSION,
+        'git_revision': get_git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'created_at': int(time.time()),
+        'benchmarks': {},
+    }
+
+    work_dir = tempfile.mkdtemp(prefix='plot-server-bench-')
+    try:
+        for name in selected:
+            print(f"Running {name}...", flush=True)
+            results['benchmarks'][name] = BENCHMARKS[name](args, work_dir)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    output_path = args.output or os.path.join(RESULTS_DIR, f"{time.strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output_path)), exist_ok=True)
+    with open(output_path, 'w', encoding='utf-8') as output_file:
+        json.dump(results, output_file, indent=2)
+    print(f"Wrote {output_path}")
+
+    if args.compare:
+        print_comparison(args.compare, results)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+#
+# Startup benchmark
+# Measures how long a fresh interpreter takes to import index.py and to serve
+# the first catalog page, without touching the plotter or the SVG renderer.
+#
+#  python benchmarks/startup_benchmark.py --runs 5
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Runs in a fresh interpreter so module caches from earlier runs do not count
+STARTUP_PROBE = """
+import json
+import time
+
+started_at = time.perf_counter()
+import index
+imported_at = time.perf_counter()
+
+response = index.app.test_client().get('/')
+served_at = time.perf_counter()
+
+print(json.dumps({
+    'import_seconds': imported_at - started_at,
+    'first_request_seconds': served_at - imported_at,
+    'status_code': response.status_code,
+    'hardware_loaded': index.registry.discovered,
+}))
+"""
+
+
+def run_startup_probe():
+    """Import the app in a new interpreter and return its timing report."""
+    completed = subprocess.run(
+        [sys.executable, '-c', STARTUP_PROBE],
+        cwd=REPO_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(completed.stdout.strip().splitlines()[-1])
+
+
+def summarize(values):
+    """Return median/min/max for a list of timings."""
+    return {
+        'median': statistics.median(values),
+        'min': min(values),
+        'max': max(values),
+    }
+
+
+def main():
+    """Run the startup probe several times and print a JSON summary."""
+    parser = argparse.ArgumentParser(description='Measure plot server startup time.')
+    parser.add_argument('--runs', type=int, default=5, help='number of fresh interpreter runs')
+    args = parser.parse_args()
+
+    reports = [run_startup_probe() for _ in range(args.runs)]
+    print(json.dumps({
+        'runs': args.runs,
+        'import_seconds': summarize([report['import_seconds'] for report in reports]),
+        'first_request_seconds': summarize([report['first_request_seconds'] for report in reports]),
+        'status_codes': sorted({report['status_code'] for report in reports}),
+        'hardware_loaded': any(report['hardware_loaded'] for report in reports),
+    }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,199 @@
+from functools import lru_cache
+from io import BytesIO
+import gzip
+import logging
+import mimetypes
+import os
+
+from flask import send_file
+from werkzeug.security import safe_join
+
+from backends import get_brotli, has_brotli
+
+
+logger = logging.getLogger(__name__)
+
+# Text formats worth compressing; thumbnails and other images are compressed already
+COMPRESSIBLE_MIMETYPES = {
+    'application/javascript',
+    'application/json',
+    'application/manifest+json',
+    'application/x-plot-polylines',
+    'image/svg+xml',
+    'text/css',
+    'text/html',
+    'text/javascript',
+    'text/plain',
+}
+# Dynamic responses that get a body hash ETag when the route did not set one
+ETAG_MIMETYPES = {'application/json', 'text/html'}
+PRECOMPRESSED_EXTENSIONS = {'br': '.br', 'gzip': '.gz'}
+MIN_COMPRESS_BYTES = 1024
+# Static files without a precompressed copy are compressed in memory up to this size
+STATIC_COMPRESS_MAX_BYTES = 8 * 1024 * 1024
+STATIC_COMPRESS_CACHE_ENTRIES = 64
+# Dynamic responses favour speed, files compressed once at ingest favour size
+DYNAMIC_LEVELS = {'br': 5, 'gzip': 6}
+PRECOMPRESSED_LEVELS = {'br': 9, 'gzip': 9}
+
+mimetypes.add_type('image/svg+xml', '.svg')
+mimetypes.add_type('application/manifest+json', '.webmanifest')
+
+
+def is_compression_enabled():
+    """Return False when PLOT_COMPRESSION turns compression off (e.g. behind a compressing proxy)."""
+    return os.environ.get('PLOT_COMPRESSION', '1').lower() not in ('0', 'false', 'no', 'off')
+
+
+@lru_cache(maxsize=1)
+def get_supported_encodings():
+    """Return the content codings this server can produce, preferred first."""
+    return ('br', 'gzip') if has_brotli() else ('gzip',)
+
+
+def compress_bytes(data, encoding, levels=DYNAMIC_LEVELS):
+    """Compress a body with ``br`` or ``gzip``."""
+    if encoding == 'br':
+        return get_brotli().compress(data, quality=levels['br'])
+    # mtime=0 keeps the output (and any ETag derived from it) stable
+    return gzip.compress(data, compresslevel=levels['gzip'], mtime=0)
+
+
+def negotiate_encoding(flask_request, available):
+    """Pick the best of ``available`` codings allowed by the request's Accept-Encoding."""
+    if not available or not flask_request.headers.get('Accept-Encoding'):
+        return None
+    return flask_request.accept_encodings.best_match(available)
+
+
+def build_precompressed_paths(path):
+    """Return the precompressed sibling path of a file for every coding."""
+    return {encoding: f"{path}{extension}" for encoding, extension in PRECOMPRESSED_EXTENSIONS.items()}
+
+
+def get_fresh_precompressed_path(path, encoding, modified_at_ns):
+    """Return the precompressed sibling for ``encoding`` if it is at least as new as the file."""
+    precompressed_path = build_precompressed_paths(path)[encoding]
+    try:
+        if os.stat(precompressed_path).st_mtime_ns >= modified_at_ns:
+            return precompressed_path
+    except OSError:
+        pass
+    return None
+
+
+def write_precompressed(path):
+    """Write missing or stale .br/.gz siblings of a file; return the codings written."""
+    modified_at_ns = os.stat(path).st_mtime_ns
+    data = None
+    written = []
+    for encoding in get_supported_encodings():
+        if get_fresh_precompressed_path(path, encoding, modified_at_ns):
+            continue
+        if data is None:
+            with open(path, 'rb') as source_file:
+                data = source_file.read()
+
+        precompressed_path = build_precompressed_paths(path)[encoding]
+        temporary_path = f"{precompressed_path}.tmp"
+        with open(temporary_path, 'wb') as output_file:
+            output_file.write(compress_bytes(data, encoding, PRECOMPRESSED_LEVELS))
+        os.replace(temporary_path, precompressed_path)
+        written.append(encoding)
+    return written
+
+
+def remove_precompressed(path):
+    """Delete the precompressed siblings of a removed file."""
+    for precompressed_path in build_precompressed_paths(path).values():
+        if os.path.exists(precompressed_path):
+            os.remove(precompressed_path)
+
+
+@lru_cache(maxsize=STATIC_COMPRESS_CACHE_ENTRIES)
+def compress_file(path, modified_at_ns, size, encoding):
+    """Return the compressed bytes of a file; the stat arguments key the cache."""
+    with open(path, 'rb') as source_file:
+        return compress_bytes(source_file.read(), encoding, PRECOMPRESSED_LEVELS)
+
+
+def send_compressed_static(static_folder, filename, flask_request):
+    """Serve a text static file (including artwork SVGs) encoded for the client."""
+    path = safe_join(static_folder, filename)
+    if not path:
+        return None
+    return send_compressed_file(path, mimetypes.guess_type(filename)[0], flask_request)
+
+
+def send_compressed_file(path, mimetype, flask_request):
+    """Send a text file gzip or brotli encoded when the client accepts it.
+
+    Precompressed siblings written at ingest are sent when fresh; other files are
+    compressed once and kept in memory. Returns None to let the caller send the file as is.
+    """
+    if not is_compression_enabled() or mimetype not in COMPRESSIBLE_MIMETYPES:
+        return None
+
+    encoding = negotiate_encoding(flask_request, get_supported_encodings())
+    if encoding is None:
+        return None
+
+    try:
+        file_stats = os.stat(path)
+    except OSError:
+        return None
+    if file_stats.st_size < MIN_COMPRESS_BYTES:
+        return None
+
+    precompressed_path = get_fresh_precompressed_path(path, encoding, file_stats.st_mtime_ns)
+    if precompressed_path:
+        response = send_file(precompressed_path, mimetype=mimetype, conditional=True)
+    elif file_stats.st_size <= STATIC_COMPRESS_MAX_BYTES:
+        try:
+            data = compress_file(path, file_stats.st_mtime_ns, file_stats.st_size, encoding)
+        except OSError as error:
+            logger.warning("Failed to compress %s: %s", path, error)
+            return None
+        response = send_file(
+            BytesIO(data),
+            mimetype=mimetype,
+            conditional=True,
+            etag=f"{file_stats.st_mtime_ns:x}-{file_stats.st_size:x}-{encoding}",
+            last_modified=file_stats.st_mtime,
+        )
+    else:
+        return None
+
+    response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+def finalize_response(response, flask_request):
+    """Add revalidation ETags to dynamic JSON/HTML and compress text bodies the client accepts."""
+    if response.mimetype not in COMPRESSIBLE_MIMETYPES or response.headers.get('Content-Encoding'):
+        return response
+    if response.direct_passthrough or response.is_streamed:
+        # File responses: uncompressed static files still vary with Accept-Encoding
+        if response.mimetype and is_compression_enabled():
+            response.vary.add('Accept-Encoding')
+        return response
+
+    if flask_request.method in ('GET', 'HEAD') and response.status_code == 200:
+        if response.mimetype in ETAG_MIMETYPES and 'ETag' not in response.headers:
+            response.add_etag(weak=True)
+        response.make_conditional(flask_request)
+
+    if not is_compression_enabled():
+        return response
+    response.vary.add('Accept-Encoding')
+    if response.status_code != 200 or response.content_length is None or response.content_length < MIN_COMPRESS_BYTES:
+        return response
+
+    encoding = negotiate_encoding(flask_request, get_supported_encodings())
+    if encoding is None:
+        return response
+
+    response.set_data(compress_bytes(response.get_data(), encoding))
+    response.headers['Content-Encoding'] = encoding
+    return response
@@ -0,0 +1,67 @@
+# Gunicorn configuration for production deployments
+#
+#  gunicorn -c gunicorn.conf.py wsgi:app
+#
+# HTTP workers serve the catalog, thumbnails, PDFs and logs. Routes that touch
+# the plotters are forwarded to a single hardware sidecar process started here,
+# so workers never open the AxiDraws or keep their own plot state.
+
+import os
+import socket
+import subprocess
+import sys
+import time
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+HARDWARE_HOST = os.environ.get('PLOT_SERVER_HARDWARE_HOST', '127.0.0.1')
+HARDWARE_PORT = int(os.environ.get('PLOT_SERVER_HARDWARE_PORT', '5008'))
+HARDWARE_STARTUP_TIMEOUT = 15
+
+bind = f"0.0.0.0:{os.environ.get('HOST_PORT', '5007')}"
+workers = int(os.environ.get('PLOT_SERVER_WORKERS', '2'))
+worker_class = 'gthread'
+threads = int(os.environ.get('PLOT_SERVER_THREADS', '4'))
+timeout = 120
+
+hardware_process = None
+
+
+def wait_for_hardware_sidecar(server):
+    """Block until the sidecar accepts connections so the first requests do not fail."""
+    deadline = time.monotonic() + HARDWARE_STARTUP_TIMEOUT
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection((HARDWARE_HOST, HARDWARE_PORT), timeout=0.5):
+                return
+        except OSError:
+            time.sleep(0.2)
+
+    server.log.warning("Hardware sidecar did not start listening within %ss", HARDWARE_STARTUP_TIMEOUT)
+
+
+def on_starting(server):
+    """Start the hardware sidecar and point the workers at it before they fork."""
+    global hardware_process
+
+    hardware_process = subprocess.Popen(
+        [sys.executable, os.path.join(BASE_DIR, 'hardware_sidecar.py')],
+        cwd=BASE_DIR,
+    )
+    os.environ['PLOT_SERVER_HARDWARE_URL'] = f"http://{HARDWARE_HOST}:{HARDWARE_PORT}"
+    wait_for_hardware_sidecar(server)
+
+
+def on_exit(server):
+    """Stop the hardware sidecar together with the Gunicorn master."""
+    if hardware_process is None or hardware_process.poll() is not None:
+        return
+
+    hardware_process.terminate()
+    try:
+        hardware_process.wait(timeout=10)
+    except subprocess.TimeoutExpired:
+        hardware_process.kill()
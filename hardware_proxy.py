@@ -0,0 +1,75 @@
+import json
+import logging
+import urllib.error
+import urllib.parse
+import urllib.request
+
+from flask import Response
+
+from app_logging import request_id_var
+
+
+logger = logging.getLogger(__name__)
+
+
+# Headers that describe one hop of the connection and must not be forwarded.
+HOP_BY_HOP_HEADERS = {
+    'connection',
+    'content-length',
+    'host',
+    'keep-alive',
+    'proxy-authenticate',
+    'proxy-authorization',
+    'te',
+    'trailer',
+    'transfer-encoding',
+    'upgrade',
+}
+
+
+def build_upstream_url(base_url, flask_request):
+    """Rebuild the incoming request path and query string against the hardware service URL."""
+    upstream_url = base_url.rstrip('/') + urllib.parse.quote(flask_request.path, safe='/')
+    if flask_request.query_string:
+        upstream_url = f"{upstream_url}?{flask_request.query_string.decode('latin-1')}"
+    return upstream_url
+
+
+def forward_request(base_url, flask_request):
+    """Forward a Flask request to the hardware-owning process and relay its response.
+
+    No timeout is applied because plot requests stay open until the plot finishes.
+    """
+    headers = {
+        key: value
+        for key, value in flask_request.headers.items()
+        if key.lower() not in HOP_BY_HOP_HEADERS
+    }
+    # Keep one request ID across both processes so their log lines can be joined
+    if request_id_var.get() and 'X-Request-ID' not in flask_request.headers:
+        headers['X-Request-ID'] = request_id_var.get()
+    upstream_request = urllib.request.Request(
+        build_upstream_url(base_url, flask_request),
+        data=flask_request.get_data() or None,
+        headers=headers,
+        method=flask_request.method,
+    )
+
+    try:
+        with urllib.request.urlopen(upstream_request) as upstream_response:
+            body = upstream_response.read()
+            status_code = upstream_response.status
+            upstream_headers = upstream_response.headers
+    except urllib.error.HTTPError as error:
+        body = error.read()
+        status_code = error.code
+        upstream_headers = error.headers
+    except urllib.error.URLError as error:
+        logger.error("Hardware service unavailable at %s: %s", base_url, error)
+        return Response(json.dumps({'error': 'Hardware service unavailable'}), status=502, mimetype='application/json')
+
+    response = Response(body, status=status_code)
+    for key, value in upstream_headers.items():
+        if key.lower() not in HOP_BY_HOP_HEADERS:
+            response.headers[key] = value
+    return response
@@ -0,0 +1,35 @@
+#!/usr/bin/env python
+#
+# Hardware owner process for production deployments
+# Serves the plot server app on a local port from a single process so only
+# one process ever opens the AxiDraws. HTTP workers forward plot, status and
+# control routes here via PLOT_SERVER_HARDWARE_URL (see gunicorn.conf.py).
+#
+#  python hardware_sidecar.py
+
+import os
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# This process owns the hardware, so it must never forward to itself
+os.environ['PLOT_SERVER_HARDWARE_URL'] = ''
+
+HARDWARE_HOST = os.environ.get('PLOT_SERVER_HARDWARE_HOST', '127.0.0.1')
+HARDWARE_PORT = int(os.environ.get('PLOT_SERVER_HARDWARE_PORT', '5008'))
+HARDWARE_THREADS = int(os.environ.get('PLOT_SERVER_HARDWARE_THREADS', '8'))
+
+
+def main():
+    """Serve the app from one multi-threaded process that owns all plotters."""
+    from waitress import serve
+
+    from index import app, start_artwork_watcher
+
+    start_artwork_watcher()
+    serve(app, host=HARDWARE_HOST, port=HARDWARE_PORT, threads=HARDWARE_THREADS)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,54 +1,59 @@
 #!/usr/bin/env python
 #
 # AxiDraw Plot Server
-# This is designed to be connected to a single plotter
+# Plotters are discovered with list_names; requests can target one by passing
+# ?device=<name> and default to the first connected plotter.
 #
 # Run in background even after a hang up:
 #  nohup python index.py > /dev/null 2>&1 &
 
 from dotenv import load_dotenv
 from io import BytesIO
+import base64
 import csv
 import hashlib
+import hmac
 import json
+from functools import lru_cache
+import logging
 import threading
 import time
-from pyaxidraw import axidraw
-from flask import Flask, request, Response, render_template, send_file
+from xml.parsers.expat import ExpatError
+from flask import Flask, g, request, Response, render_template, send_file
 from flask_cors import CORS
 import os
-from plotter_service import plot, preview_plot, toggle_servo
-from plotter_status import PlotterStatusService
-from preview_parser import parse_plot_output, parse_preview_output
+from app_logging import configure_logging, request_id_var, resolve_request_id
+from artwork_library import ArtworkIndex, ArtworkWatcher, ContentHashQueue, ThumbnailQueue
+from compression import finalize_response, remove_precompressed, send_compressed_file, send_compressed_static
+from backends import HardwareUnavailableError, RendererUnavailableError, create_axidraw
+from hardware_proxy import forward_request
+import metrics
+from plot_scheduler import PlotJob, PlotScheduler
+from plotter_registry import DEVICE_LIST_STATE_KEY, PlotterRegistry, device_state_key
+from plot_history import PlotHistoryIndex
+from plotter_service import EditionRun, PlotHalt, plot, plot_editions, preview_plot, toggle_servo
+from request_profiler import PROFILE_HEADER, RequestProfiler
+from resume_store import ResumeStore
+from state_store import create_state_store
+from svg_layers import AUTO_PRECISION, MAX_PRECISION, LayerCache
 from svg_library import (
-    build_file_entry,
+    THUMBNAIL_DEFAULT_PX,
+    THUMBNAIL_MIMETYPES,
+    THUMBNAIL_TIERS_PX,
     build_thumbnail_relative_path,
+    build_thumbnail_relative_paths,
     generate_svg_pdf_bytes,
-    generate_svg_thumbnail,
+    get_thumbnail_formats,
 )
+from svg_polylines import POLYLINE_MIMETYPE, get_cached_polylines
 
 # Load settings from environment
 load_dotenv()
 
+# Leveled logging to stderr: LOG_LEVEL, LOG_FORMAT=text|json and LOG_RATE_LIMIT
+configure_logging()
+logger = logging.getLogger(__name__)
 
-# Set up a Semaphore object for use with blocking plot
-# requests while the plotter is busy
-sem = threading.Semaphore()
-plot_state_lock = threading.Lock()
-runtime_plot_state = {
-    "is_plotting": False,
-    "stop_requested": False,
-    "last_stop": {
-        "requested_at": None,
-        "success": None,
-        "servo_state": "unknown",
-    },
-}
-
-# Create an AxiDraw class instance
-ad = axidraw.AxiDraw()
-status_ad = axidraw.AxiDraw()
-status_service = PlotterStatusService(status_ad, sem)
 
 # Create new Flask app
 app = Flask(__name__)
@@ -60,16 +65,85 @@ CORS(app, resources={r"/*": {"origins": "*"}})
 # Get the directory of the current script
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 
+# Plot state, last stop results and device status live in a pluggable store so
+# several worker processes can report status without touching the hardware
+state_store = create_state_store(BASE_DIR)
+
+# Each connected plotter gets its own AxiDraw instances, Semaphore (used to block
+# plot requests while that plotter is busy), worker thread and status cache
+# pyaxidraw is only imported once a plotter is first needed
+registry = PlotterRegistry(create_axidraw, state_store)
+
 # Example: Define the upload folder relative to the script
 app.config['UPLOAD_FOLDER'] = os.path.join(BASE_DIR, 'uploads')
 
 art_dir = app.config['UPLOAD_FOLDER']
+
+# The library listing is served from an index kept current by a filesystem
+# watcher, which also renders thumbnails for artwork synced in outside the API
+artwork_index = ArtworkIndex(art_dir)
+artwork_watcher = ArtworkWatcher(artwork_index)
+thumbnail_queue = ThumbnailQueue(art_dir)
+# The gallery loads its thumbnails a page at a time from /thumbnails/batch.json
+THUMBNAIL_BATCH_DEFAULT = 48
+THUMBNAIL_BATCH_MAX = 200
 LOG_DIR = os.path.join(BASE_DIR, 'log')
 PLOT_LOG_FILE = os.path.join(LOG_DIR, 'plot-log.jsonl')
+# Per-file-hash plot counts, tools and media, kept in step with the plot log
+plot_history = PlotHistoryIndex(PLOT_LOG_FILE)
+
+# Single-layer SVGs for the preview, keyed by the artwork's content hash
+layer_cache = LayerCache(os.path.join(LOG_DIR, 'layers'))
+
+# Output SVGs of halted plots, kept so they can be resumed where they stopped
+resume_store = ResumeStore(os.path.join(LOG_DIR, 'resume'))
+
+# Opt-in cProfile capture of slow requests, stored under log/profiles
+request_profiler = RequestProfiler(os.path.join(LOG_DIR, 'profiles'))
+PROFILE_ADMIN_ENDPOINTS = {'profiles_json', 'download_profile'}
+
+# Profiles and metrics expose request internals, so they are served only with a
+# bearer token matching PLOT_ADMIN_TOKEN, and not at all while it is unset
+ADMIN_TOKEN = os.environ.get('PLOT_ADMIN_TOKEN', '')
+ADMIN_ENDPOINTS = PROFILE_ADMIN_ENDPOINTS | {'metrics_endpoint'}
+
+# When set (by the production server config), routes that touch the plotters are
+# forwarded to the single process that owns the hardware
+HARDWARE_SERVICE_URL = os.environ.get('PLOT_SERVER_HARDWARE_URL', '')
+HARDWARE_ENDPOINTS = {
+    'plot_request',
+    'status',
+    'status_json',
+    'devices_json',
+    'refresh_devices',
+    'set_device_loadout',
+    'queue_plot',
+    'queue_json',
+    'set_queue_policy',
+    'cancel_queued_plot',
+    'stop_plot',
+    'continue_edition_run',
+    'resume_plot',
+    'discard_resume',
+    'servo_toggle',
+}
+# Edition runs plot several copies from one parsed document, pausing between
+# copies or waiting for the operator to confirm the paper change
+EDITION_PAUSE_SECONDS = float(os.environ.get('PLOT_EDITION_PAUSE_SECONDS', '0'))
+EDITION_CONFIRM_TIMEOUT_SECONDS = float(os.environ.get('PLOT_EDITION_CONFIRM_TIMEOUT_SECONDS', '1800'))
+# How long a stop request waits for the running plot to halt before sending
+# cleanup commands over a separate connection
+STOP_HALT_TIMEOUT_SECONDS = float(os.environ.get('PLOT_STOP_HALT_TIMEOUT_SECONDS', '2'))
+# Status routes that HTTP workers answer from a shared state store when possible
+SHARED_STATUS_ENDPOINTS = {'status', 'status_json'}
+STATUS_LONG_POLL_MAX_SECONDS = 30
 
 TOOLS_CSV_PATH = os.path.join(BASE_DIR, 'tools.csv')
 MATERIAL_CSV_PATH = os.path.join(BASE_DIR, 'material.csv')
 plot_log_file_lock = threading.Lock()
+preview_cache_lock = threading.Lock()
+preview_cache = {}
+preview_cache_hashes = {}
 
 
 def load_csv_options(file_path):
@@ -77,7 +151,7 @@ def load_csv_options(file_path):
     options = []
 
     if not os.path.exists(file_path):
-        print(f"[WARN] Options CSV not found: {file_path}")
+        logger.warning("Options CSV not found: %s", file_path)
         return options
 
     try:
@@ -97,40 +171,47 @@ def load_csv_options(file_path):
 
                 options.append(value)
     except OSError as error:
-        print(f"[WARN] Failed to read options CSV {file_path}: {error}")
+        logger.warning("Failed to read options CSV %s: %s", file_path, error)
 
     return options
 
 
-TOOL_OPTIONS = load_csv_options(TOOLS_CSV_PATH)
-MATERIAL_OPTIONS = load_csv_options(MATERIAL_CSV_PATH)
+@lru_cache(maxsize=None)
+def get_tool_options():
+    """Return tool options, reading tools.csv on first use."""
+    return load_csv_options(TOOLS_CSV_PATH)
 
 
-def set_runtime_plot_state(*, is_plotting=None, stop_requested=None, last_stop=None):
-    """Update process-local plotting state used by API responses and controls."""
-    with plot_state_lock:
-        if is_plotting is not None:
-            runtime_plot_state["is_plotting"] = is_plotting
-        if stop_requested is not None:
-            runtime_plot_state["stop_requested"] = stop_requested
-        if last_stop is not None:
-            runtime_plot_state["last_stop"] = last_stop
+@lru_cache(maxsize=None)
+def get_material_options():
+    """Return material options, reading material.csv on first use."""
+    return load_csv_options(MATERIAL_CSV_PATH)
 
 
-def get_runtime_plot_state_snapshot():
-    """Return a copy of the in-memory plotting state for response payloads."""
-    with plot_state_lock:
-        return {
-            "is_plotting": runtime_plot_state["is_plotting"],
-            "stop_requested": runtime_plot_state["stop_requested"],
-            "last_stop": dict(runtime_plot_state["last_stop"]),
-        }
+def set_runtime_plot_state(device, *, is_plotting=None, stop_requested=None, last_stop=None):
+    """Update the device plotting state used by API responses and controls."""
+    fields = {}
+    if is_plotting is not None:
+        fields["is_plotting"] = is_plotting
+    if stop_requested is not None:
+        fields["stop_requested"] = stop_requested
+    if last_stop is not None:
+        fields["last_stop"] = last_stop
+    device.update_runtime_state(**fields)
 
 
-def apply_runtime_state_to_status(status_data):
+def get_runtime_plot_state_snapshot(device):
+    """Return a copy of the device plotting state for response payloads."""
+    return device.get_runtime_state()
+
+
+def apply_runtime_state_to_status(device, status_data):
     """Merge local runtime controls into hardware status payload."""
-    runtime_state = get_runtime_plot_state_snapshot()
+    return merge_runtime_state(status_data, get_runtime_plot_state_snapshot(device), device.name)
 
+
+def merge_runtime_state(status_data, runtime_state, device_name):
+    """Merge a plot state snapshot into a hardware status payload."""
     if runtime_state["is_plotting"]:
         status_data["status"] = "busy"
         status_data["plot_state"] = "plotting"
@@ -139,12 +220,48 @@ def apply_runtime_state_to_status(status_data):
 
     status_data["stop_requested"] = runtime_state["stop_requested"]
     status_data["last_stop"] = runtime_state["last_stop"]
+    status_data["edition_run"] = runtime_state.get("edition_run")
+    status_data["device"] = device_name
+    status_data["state_version"] = state_store.version
     return status_data
 
 
-def run_stop_cleanup_commands(model_number):
+def read_shared_device_status(device_name=None):
+    """Build a status payload from the shared state store without touching hardware."""
+    device_names = state_store.get(DEVICE_LIST_STATE_KEY) or []
+    if not device_name and device_names:
+        device_name = device_names[0]
+    if device_name not in device_names:
+        return None
+
+    status_data = state_store.get(device_state_key(device_name, "status"))
+    runtime_state = state_store.get(device_state_key(device_name, "runtime"))
+    if status_data is None or runtime_state is None:
+        return None
+
+    return merge_runtime_state(status_data, runtime_state, device_name)
+
+
+def get_request_status_data():
+    """Return the requested device status, or None when it is unknown or not yet shared."""
+    wait_seconds = request.args.get('wait', default=0, type=float)
+    if wait_seconds > 0:
+        since_version = request.args.get('version', default=state_store.version, type=int)
+        state_store.wait_for_change(since_version, min(wait_seconds, STATUS_LONG_POLL_MAX_SECONDS))
+
+    if HARDWARE_SERVICE_URL:
+        return read_shared_device_status(request.args.get('device', default='', type=str) or None)
+
+    device = get_request_device()
+    if device is None:
+        return None
+
+    return apply_runtime_state_to_status(device, device.status_service.get_plotter_status())
+
+
+def run_stop_cleanup_commands(model_number, port=None):
     """Best-effort stop cleanup: command pen up first, then disable XY motors."""
-    stop_ad = axidraw.AxiDraw()
+    stop_ad = create_axidraw()
 
     result = {
         "raise_pen": False,
@@ -152,8 +269,10 @@ def run_stop_cleanup_commands(model_number):
         "servo_state": "unknown",
     }
 
-    stop_ad.options.model = model_number
     stop_ad.plot_setup()
+    stop_ad.options.model = model_number
+    if port is not None:
+        stop_ad.options.port = port
     stop_ad.options.preview = False
     stop_ad.options.mode = "manual"
 
@@ -169,15 +288,31 @@ def run_stop_cleanup_commands(model_number):
     return result
 
 
-def get_active_model_number():
-    """Prefer detected hardware model; fall back to configured environment default."""
+def get_active_model_number(device):
+    """Prefer the device's detected hardware model; fall back to configured environment default.
+
+    The model is cached per device, so only the first plot after discovery (or after
+    a connection error) enumerates USB, and then on the device's worker.
+    """
     try:
-        return status_service.detect_connected_model_number()
+        return device.get_model_number()
     except Exception as error:
-        fallback_model = status_service.get_default_model_number()
-        print(f"[WARN] Falling back to configured AxiDraw model {fallback_model}: {error}")
+        device.invalidate_model()
+        fallback_model = device.status_service.get_default_model_number()
+        logger.warning("Falling back to configured AxiDraw model %s: %s", fallback_model, error)
         return fallback_model
 
+
+def get_request_device():
+    """Resolve the plotter targeted by the request's ``device`` parameter."""
+    return registry.get_device(request.values.get('device', default='', type=str) or None)
+
+
+def unknown_device_response():
+    """Return the JSON error used when a request names a plotter that is not registered."""
+    return Response(json.dumps({'error': 'Unknown device'}), status=404, mimetype='application/json')
+
+
 def resolve_artwork_path(relative_path):
     """Resolve a user-supplied artwork path within the configured art directory."""
     art_dir_path = os.path.abspath(art_dir)
@@ -205,12 +340,6 @@ def remove_empty_parent_directories(path, stop_dir):
         current_dir = os.path.dirname(current_dir)
 
 
-def get_file_added_timestamp(path):
-    """Return the file creation time when available, otherwise the modification time."""
-    file_stats = os.stat(path)
-    return getattr(file_stats, 'st_birthtime', file_stats.st_mtime)
-
-
 def calculate_file_md5(path):
     """Calculate a file md5 hash for logging and traceability."""
     file_hash = hashlib.md5()
@@ -220,6 +349,51 @@ def calculate_file_md5(path):
     return file_hash.hexdigest()
 
 
+# {path: ((mtime_ns, size), md5)}; one entry per file, so the library listing never evicts
+content_hashes = {}
+content_hashes_lock = threading.Lock()
+
+
+def get_content_hash(path):
+    """Return a file's md5 without rereading it until it changes."""
+    file_stats = os.stat(path)
+    version = (file_stats.st_mtime_ns, file_stats.st_size)
+    with content_hashes_lock:
+        cached = content_hashes.get(path)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    file_hash = calculate_file_md5(path)
+    with content_hashes_lock:
+        content_hashes[path] = (version, file_hash)
+    return file_hash
+
+
+# Hashes changed artwork in the background for the listing's plot history join
+content_hash_queue = ContentHashQueue(artwork_index, get_content_hash)
+
+
+def get_listing_histories(entries):
+    """Return {relative path: plot history of the file's current content} for the library listing.
+
+    Joined on the content hash like /files/<file>/history.json, so edited files
+    show no stale history and renamed files keep theirs. The hashes come from the
+    artwork index, which hashes files as the watcher reports them, so the listing
+    reads no files; one not hashed yet shows its history on a later listing.
+    """
+    if not plot_history.has_entries():
+        return {}
+
+    indexed_hashes = artwork_index.get_content_hashes()
+    file_hashes = {}
+    for entry in entries:
+        fingerprint, file_hash = indexed_hashes.get(entry['filename'], (None, None))
+        if file_hash and fingerprint == entry.get('fingerprint'):
+            file_hashes[entry['filename']] = file_hash
+    histories = plot_history.get_many(set(file_hashes.values()))
+    return {path: histories[file_hash] for path, file_hash in file_hashes.items() if file_hash in histories}
+
+
 def format_log_timestamp(timestamp):
     """Return a stable local timestamp format for log rows."""
     return time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))
@@ -229,9 +403,10 @@ def append_plot_log_entry(entry):
     """Append one JSON log entry to disk so log history survives restarts."""
     os.makedirs(LOG_DIR, exist_ok=True)
 
-    with plot_log_file_lock:
+    with metrics.time_operation('log_append'), plot_log_file_lock:
         with open(PLOT_LOG_FILE, 'a', encoding='utf-8') as log_file:
             log_file.write(json.dumps(entry, ensure_ascii=True) + '\n')
+        plot_history.refresh()
 
 
 def load_plot_log_entries(limit=300):
@@ -240,7 +415,7 @@ def load_plot_log_entries(limit=300):
         return []
 
     entries = []
-    with plot_log_file_lock:
+    with metrics.time_operation('log_read'), plot_log_file_lock:
         with open(PLOT_LOG_FILE, 'r', encoding='utf-8') as log_file:
             for line in log_file:
                 line = line.strip()
@@ -258,35 +433,502 @@ def clear_plot_log_entries():
     """Clear persisted plot log entries."""
     os.makedirs(LOG_DIR, exist_ok=True)
 
-    with plot_log_file_lock:
+    with metrics.time_operation('log_clear'), plot_log_file_lock:
         with open(PLOT_LOG_FILE, 'w', encoding='utf-8') as log_file:
             log_file.write('')
+        plot_history.refresh()
+
+def store_preview_estimate(file_hash, layer, preview_data, filepath=None):
+    """Cache the latest preview metrics for a file/layer so the scheduler can rank jobs."""
+    with preview_cache_lock:
+        preview_cache[(file_hash, layer)] = dict(preview_data)
+        if filepath:
+            preview_cache_hashes.setdefault(filepath, set()).add(file_hash)
+
+
+def purge_preview_estimates(filepath):
+    """Drop cached preview metrics for every version of a file."""
+    with preview_cache_lock:
+        file_hashes = preview_cache_hashes.pop(filepath, set())
+        for cache_key in [key for key in preview_cache if key[0] in file_hashes]:
+            del preview_cache[cache_key]
+
+
+def remove_derived_files(relative_path):
+    """Delete every thumbnail tier and precompressed copy generated for an SVG."""
+    try:
+        remove_precompressed(os.path.join(art_dir, relative_path))
+    except OSError as error:
+        logger.warning("Failed to remove compressed copies of %s: %s", relative_path, error)
+    for thumbnail_relative_path in build_thumbnail_relative_paths(relative_path).values():
+        thumbnail_path = os.path.join(art_dir, thumbnail_relative_path)
+        if not os.path.exists(thumbnail_path):
+            continue
+        try:
+            os.remove(thumbnail_path)
+            remove_empty_parent_directories(thumbnail_path, art_dir)
+        except OSError as error:
+            logger.warning("Failed to remove thumbnail for %s: %s", relative_path, error)
+
+
+def handle_artwork_change(change, relative_path):
+    """Keep derived files and caches in step with the artwork the watcher reports.
+
+    Thumbnails and precompressed copies are written only by the process that owns
+    the hardware (or the only process), so several Gunicorn workers do not render
+    the same file. Every process hashes the files for its own listing.
+    """
+    filepath = os.path.join(art_dir, relative_path)
+    purge_preview_estimates(filepath)
+
+    if change == 'removed':
+        remove_derived_files(relative_path)
+        return
+
+    content_hash_queue.enqueue(relative_path)
+    if not HARDWARE_SERVICE_URL:
+        thumbnail_queue.enqueue(relative_path)
+
+
+artwork_watcher.add_listener(handle_artwork_change)
+
+
+def start_artwork_watcher():
+    """Start the watcher at startup in the process that renders thumbnails.
+
+    Library requests are served by the HTTP workers, so the hardware process would
+    otherwise never start its watcher and rsynced artwork would get no thumbnails.
+    """
+    if HARDWARE_SERVICE_URL:
+        return
+    artwork_watcher.start()
+
+
+def get_preview_estimate(file_hash, layer):
+    """Return cached preview metrics for a file/layer, or None when never previewed."""
+    with preview_cache_lock:
+        cached = preview_cache.get((file_hash, layer))
+    metrics.record_cache_lookup('preview_estimate', cached is not None)
+    return dict(cached) if cached else None
+
+
+def read_plot_options(values):
+    """Read the plot layer and log metadata from request parameters."""
+    return {
+        'layer': values.get("layer", default=0, type=int),
+        'title': values.get('title', default='', type=str),
+        'tool': values.get('tool', default='None', type=str),
+        'media': values.get('media', default='None', type=str),
+        'format': values.get('format', default='', type=str),
+        'orientation': values.get('orientation', default='', type=str),
+        'edition': values.get('edition', default=1, type=int),
+        'editions': values.get('editions', default=1, type=int),
+    }
+
+
+def run_plot_job(device, file, filepath, options, resume_entry=None):
+    """Plot a file on a device and log the result; the caller must hold the device Semaphore.
+
+    With a ``resume_entry`` the halted plot it describes is continued instead.
+    """
+    layer = options['layer']
+    model_number = get_active_model_number(device)
+    resume_svg = resume_store.load_svg(resume_entry['id']) if resume_entry else None
+    halt = device.halt = PlotHalt(model_number)
+    set_runtime_plot_state(device, is_plotting=True, stop_requested=False)
+    started_at = int(time.time())
+    try:
+        with metrics.time_operation('resume_plot' if resume_entry else 'plot'):
+            plot_result = device.run(
+                plot, device.ad, filepath, layer, model_number, device.port, halt=halt, resume_svg=resume_svg
+            )
+        completed_at = int(time.time())
+    except Exception as error:
+        device.invalidate_model()
+        record_failed_plot(device, file, filepath, options, model_number, started_at, halt, error, resume_entry)
+        raise
+    finally:
+        device.halt = None
+        set_runtime_plot_state(device, is_plotting=False)
+
+    return record_plot_result(
+        device, file, filepath, options, model_number, plot_result, started_at, completed_at, halt, resume_entry
+    )
+
+
+def record_failed_plot(device, file, filepath, options, model_number, started_at, halt, error, resume_entry=None):
+    """Log a plot that raised, keeping a resume point when the API returned its output first."""
+    try:
+        record_plot_result(
+            device, file, filepath, options, model_number, None, started_at, int(time.time()), halt,
+            resume_entry, error,
+        )
+    except Exception:
+        logger.exception("Failed to record the failed plot of %s", file)
+
+
+def record_plot_result(device, file, filepath, options, model_number, plot_result, started_at, completed_at,
+                       halt, resume_entry=None, error=None):
+    """Save a resume point for a halted plot, log the plot and return its response payload.
+
+    A plot counts as stopped after /plot/stop or when the API reports it halted on
+    its own (pause button, lost USB connection). ``error`` marks a plot that raised.
+    """
+    layer = options['layer']
+    stopped = halt.requested.is_set() or bool(halt.stopped_code)
+    # A resumed plot continues the saved copy, which may predate edits to the file
+    file_hash = resume_entry['file_hash'] if resume_entry else get_content_hash(filepath)
+
+    resume_id = resume_entry['id'] if resume_entry else None
+    if halt.resume_svg:
+        resume_id = resume_store.save(halt.resume_svg, {
+            'file': file,
+            'filepath': filepath,
+            'file_hash': file_hash,
+            'device': device.name,
+            'options': options,
+            'model_number': model_number,
+            'stopped_code': halt.stopped_code,
+            'position': halt.position,
+        }, resume_id)
+    elif resume_entry and not stopped and error is None:
+        resume_store.delete(resume_id)
+        resume_id = None
+
+    device.last_tool = options['tool']
+
+    if plot_result is not None:
+        plot_metrics = plot_result.to_dict()
+    else:
+        plot_metrics = {
+            'plot_duration': max(0, completed_at - started_at),
+            'plot_path': 0.0,
+            'plot_travel': 0.0,
+            'lifts': 0,
+        }
+
+    if error is not None:
+        status = 'failed'
+    else:
+        status = 'stopped' if stopped else 'ok'
+
+    response_payload = {
+        'status': status,
+        'layer': layer,
+        'title': options['title'],
+        'file': file,
+        'filepath': filepath,
+        'filename': os.path.basename(filepath),
+        'file_hash': file_hash,
+        'plotter': device.status_service.get_plotter_name(),
+        'device': device.name,
+        'tool': options['tool'],
+        'media': options['media'],
+        'format': options['format'],
+        'orientation': options['orientation'],
+        'edition': options['edition'],
+        'editions': options['editions'],
+        'model_number': model_number,
+        'started_at': started_at,
+        'completed_at': completed_at,
+        'metrics': plot_metrics,
+        'halt': halt.describe() if stopped else None,
+        'error': str(error) if error is not None else None,
+        'resume_id': resume_id,
+        'resumed_from': resume_entry['id'] if resume_entry else None,
+    }
+
+    append_plot_log_entry({
+        'time': format_log_timestamp(completed_at),
+        'status': response_payload['status'],
+        'title': options['title'],
+        'filename': response_payload['filename'],
+        'file': file,
+        'fileHash': response_payload['file_hash'],
+        'plotter': response_payload['plotter'],
+        'device': device.name,
+        'edition': f"{options['edition']}/{options['editions']}",
+        'layer': str(layer) if layer and layer > 0 else 'all',
+        'tool': options['tool'],
+        'media': options['media'],
+        'format': options['format'],
+        'orientation': options['orientation'],
+        'duration': plot_metrics.get('plot_duration', 0),
+        'path': plot_metrics.get('plot_path', 0.0),
+        'travel': plot_metrics.get('plot_travel', 0.0),
+        'lifts': plot_metrics.get('lifts', 0),
+    })
+
+    return response_payload
+
+def run_edition_series(device, file, filepath, options, edition_run):
+    """Plot editions ``edition``..``editions`` of a file from one parsed document.
+
+    Each copy is logged as soon as it finishes; the caller must hold the device Semaphore.
+    """
+    model_number = get_active_model_number(device)
+    payloads = []
+    started_at = {}
+    # The copy being plotted, so one that raises can still be logged
+    active_edition = {}
+
+    def start_edition(edition):
+        if edition > options['edition']:
+            device.update_runtime_state(edition_run=describe_edition_run(edition_run, edition, options, True))
+            if not edition_run.wait_for_next(edition):
+                logger.info("Edition run of %s on %s ended before edition %s", file, device.name, edition)
+                return None
+        if edition_run.cancelled.is_set():
+            return None
+        device.update_runtime_state(edition_run=describe_edition_run(edition_run, edition, options, False))
+        started_at[edition] = int(time.time())
+        device.halt = PlotHalt(model_number)
+        active_edition.update(edition=edition, halt=device.halt)
+        return device.halt
+
+    def finish_edition(edition, plot_result, halt):
+        device.halt = None
+        active_edition.clear()
+        payloads.append(record_plot_result(
+            device, file, filepath, dict(options, edition=edition), model_number,
+            plot_result, started_at[edition], int(time.time()), halt,
+        ))
+
+    device.edition_run = edition_run
+    set_runtime_plot_state(device, is_plotting=True, stop_requested=False)
+    try:
+        with metrics.time_operation('plot_editions'):
+            device.run(
+                plot_editions, device.ad, filepath, options['edition'], options['editions'], options['layer'],
+                model_number, device.port, start_edition=start_edition, finish_edition=finish_edition,
+            )
+    except Exception as error:
+        device.invalidate_model()
+        if active_edition:
+            edition = active_edition['edition']
+            record_failed_plot(
+                device, file, filepath, dict(options, edition=edition), model_number, started_at[edition],
+                active_edition['halt'], error,
+            )
+        raise
+    finally:
+        device.halt = None
+        device.edition_run = None
+        device.update_runtime_state(edition_run=None)
+        set_runtime_plot_state(device, is_plotting=False)
+
+    stopped = edition_run.cancelled.is_set() or not payloads or payloads[-1]['status'] == 'stopped'
+    return {
+        'status': 'stopped' if stopped else 'ok',
+        'file': file,
+        'edition': options['edition'],
+        'editions': options['editions'],
+        'editions_plotted': len(payloads),
+        'plots': payloads,
+    }
+
+
+def describe_edition_run(edition_run, edition, options, waiting):
+    """Return the edition run progress reported in the device status."""
+    return {
+        'edition': edition,
+        'editions': options['editions'],
+        'waiting': waiting,
+        'confirm': edition_run.confirm,
+    }
+
+
+def run_queued_plot_job(device, job):
+    """Scheduler callback that plots a queued job on the device it was assigned."""
+    return run_plot_job(device, job.file, job.filepath, job.options)
+
+
+def get_queued_job_estimate(job):
+    """Return the cached preview duration for a queued job, if it was previewed."""
+    try:
+        file_hash = get_content_hash(job.filepath)
+    except OSError:
+        # Deleted since it was queued; dispatch drops the job
+        return None
+    estimate = get_preview_estimate(file_hash, job.options['layer'])
+    return estimate['plot_duration'] if estimate else None
+
+
+scheduler = PlotScheduler(registry, run_queued_plot_job, get_queued_job_estimate)
+
+metrics.registry.register(metrics.Gauge(
+    'plot_server_queue_depth',
+    'Plot jobs waiting in the queue for an idle plotter.',
+    callback=lambda: len(scheduler.pending),
+))
+metrics.registry.register(metrics.Gauge(
+    'plot_server_plots_in_progress',
+    'Plotters currently running a plot in this process.',
+    callback=lambda: sum(1 for device in list(registry.devices.values()) if not device.is_idle()),
+))
+
+
+def acquire_device_semaphore(device, timeout):
+    """Acquire a device Semaphore, recording the wait time and any Busy rejection."""
+    route = request.url_rule.rule if request.url_rule else request.path
+    started_at = time.perf_counter()
+    acquired = device.sem.acquire(True, timeout)
+    metrics.SEMAPHORE_WAIT.observe(time.perf_counter() - started_at, route)
+    if not acquired:
+        metrics.BUSY_RESPONSES.inc(route)
+    return acquired
+
+
+@app.before_request
+def start_request():
+    """Remember when the request started and assign the request ID used in log lines."""
+    g.request_started_at = time.perf_counter()
+    g.request_id = resolve_request_id(request.headers.get('X-Request-ID'))
+    g.request_id_token = request_id_var.set(g.request_id)
+
+@app.before_request
+def require_admin_token():
+    """Refuse profile and metrics requests without the configured admin token."""
+    if request.endpoint not in ADMIN_ENDPOINTS:
+        return None
+
+    if not ADMIN_TOKEN:
+        return Response(json.dumps({'error': 'Not found'}), status=404, mimetype='application/json')
+
+    scheme, _, token = request.headers.get('Authorization', '').partition(' ')
+    if scheme.lower() != 'bearer' or not hmac.compare_digest(token.encode('utf-8'), ADMIN_TOKEN.encode('utf-8')):
+        return Response(
+            json.dumps({'error': 'Unauthorized'}),
+            status=401,
+            headers={'WWW-Authenticate': 'Bearer'},
+            mimetype='application/json',
+        )
+    return None
+
+@app.before_request
+def forward_hardware_request():
+    """Send hardware routes to the owning process instead of touching AxiDraws here."""
+    if not HARDWARE_SERVICE_URL or request.endpoint not in HARDWARE_ENDPOINTS:
+        return None
+
+    if state_store.is_shared and request.endpoint in SHARED_STATUS_ENDPOINTS:
+        return None
+
+    # Uploads only write to the shared artwork folder and can be served locally
+    if request.endpoint == 'plot_request' and request.method == 'POST':
+        return None
+
+    return forward_request(HARDWARE_SERVICE_URL, request)
+
+@app.before_request
+def start_request_profile():
+    """Profile this request when asked to (X-Profile header or ?profile=1) or sampled.
+
+    Registered after the hardware forwarder, so proxied requests are profiled by the
+    process that actually runs them.
+    """
+    if request.endpoint in PROFILE_ADMIN_ENDPOINTS:
+        return None
+
+    reason = request_profiler.should_profile(request)
+    if reason:
+        g.profile_session = request_profiler.start(reason)
+    return None
+
+@app.before_request
+def serve_compressed_static():
+    """Send text static files, artwork SVGs included, gzip or brotli encoded when accepted."""
+    if request.endpoint != 'static' or request.method not in ('GET', 'HEAD'):
+        return None
+    return send_compressed_static(app.static_folder, request.view_args['filename'], request)
+
+@app.after_request
+def store_request_profile(response):
+    """Save the profile of a profiled request and point to it in a response header."""
+    session = g.pop('profile_session', None)
+    if session is None:
+        return response
+
+    started_at = getattr(g, 'request_started_at', time.perf_counter())
+    profile_id = request_profiler.finish(session, {
+        'request_id': getattr(g, 'request_id', None),
+        'method': request.method,
+        'path': request.full_path.rstrip('?'),
+        'endpoint': request.endpoint,
+        'status': response.status_code,
+        'duration_ms': round((time.perf_counter() - started_at) * 1000, 2),
+    })
+    if profile_id:
+        response.headers[PROFILE_HEADER] = profile_id
+    return response
+
+@app.after_request
+def record_request_latency(response):
+    """Observe the request latency, labelled by route pattern to keep cardinality bounded."""
+    started_at = getattr(g, 'request_started_at', None)
+    if started_at is not None:
+        duration = time.perf_counter() - started_at
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.REQUEST_LATENCY.observe(duration, request.method, route, str(response.status_code))
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("Request completed", extra={'fields': {
+                'method': request.method,
+                'path': request.path,
+                'status': response.status_code,
+                'duration_ms': round(duration * 1000, 2),
+            }})
+
+    if getattr(g, 'request_id', None):
+        response.headers['X-Request-ID'] = g.request_id
+    return response
+
+@app.after_request
+def compress_response(response):
+    """Add ETags to JSON and HTML responses and compress text bodies the client accepts."""
+    return finalize_response(response, request)
+
+
+@app.teardown_request
+def clear_request_id(error=None):
+    """Stop tagging log lines from this thread with the finished request's ID."""
+    token = g.pop('request_id_token', None)
+    if token is not None:
+        request_id_var.reset(token)
+
+
+@app.teardown_request
+def stop_unfinished_profile(error=None):
+    """Release the profiler when a request ends without a response to attach it to."""
+    session = g.pop('profile_session', None)
+    if session is not None:
+        request_profiler.stop(session)
+
+@app.errorhandler(HardwareUnavailableError)
+def hardware_unavailable(error):
+    """Report a missing AxiDraw backend without affecting catalog and PDF routes."""
+    logger.error("%s", error)
+    return Response(json.dumps({'error': str(error)}), status=503, mimetype='application/json')
+
+
+@app.errorhandler(RendererUnavailableError)
+def renderer_unavailable(error):
+    """Report a missing SVG renderer without affecting plotting routes."""
+    logger.error("%s", error)
+    return Response(json.dumps({'error': str(error)}), status=503, mimetype='application/json')
 
 # Define route: Default
 @app.route('/')
 def index():
     """Render the main page with the available SVG files sorted newest first."""
-
-    # Recursively get all .svg files in art_dir and subdirectories
-    plot_files = []
-    for root, dirs, files in os.walk(art_dir):
-        for f in files:
-            if f.lower().endswith('.svg'):
-                # Store relative path from art_dir
-                absolute_path = os.path.join(root, f)
-                rel_path = os.path.relpath(absolute_path, art_dir)
-                plot_files.append((get_file_added_timestamp(absolute_path), build_file_entry(rel_path)))
-
-    plot_files.sort(key=lambda item: (-item[0], item[1]['filename'].lower()))
-    plot_files = [entry for _, entry in plot_files]
-
+    files = artwork_watcher.get_entries()
     return render_template(
         'index.html',
-        files=plot_files,
+        files=files,
+        plot_histories=get_listing_histories(files),
         art_dir=art_dir,
         app_version=APP_VERSION,
-        tool_options=TOOL_OPTIONS,
-        material_options=MATERIAL_OPTIONS,
+        tool_options=get_tool_options(),
+        material_options=get_material_options(),
     )
 
 # Define route for a plot request
@@ -305,89 +947,40 @@ def plot_request(file):
 
             return response
 
-        # If the file is found, acquire a Semaphore to block
-        # other incoming requests until the plotter is done
-        if sem.acquire(True, 0.1):
+        device = get_request_device()
+        if device is None:
+            return unknown_device_response()
+
+        # If the file is found, acquire the device Semaphore to block
+        # other incoming requests until that plotter is done
+        if acquire_device_semaphore(device, 0.1):
             try:
                 if request.args.get("preview", "").lower() == "true":
                     preview_layer = request.args.get("layer", default=0, type=int)
-                    model_number = get_active_model_number()
-                    preview_output = preview_plot(ad, filepath, preview_layer, model_number)
-                    preview_data = parse_preview_output(preview_output)
+                    model_number = get_active_model_number(device)
+                    with metrics.time_operation('preview_plot'):
+                        preview_metrics = device.run(preview_plot, device.ad, filepath, preview_layer, model_number, device.port)
+                    preview_data = preview_metrics.to_dict()
+                    store_preview_estimate(get_content_hash(filepath), preview_layer, preview_data, filepath)
                     return Response(json.dumps(preview_data), mimetype='application/json')
 
-                # Determine requested layer
-                layer = request.args.get("layer", default=0, type=int)
-                title = request.args.get('title', default='', type=str)
-                tool = request.args.get('tool', default='None', type=str)
-                media = request.args.get('media', default='None', type=str)
-                format_value = request.args.get('format', default='', type=str)
-                orientation = request.args.get('orientation', default='', type=str)
-                edition = request.args.get('edition', default=1, type=int)
-                editions = request.args.get('editions', default=1, type=int)
-                model_number = get_active_model_number()
-                set_runtime_plot_state(is_plotting=True, stop_requested=False)
-                started_at = int(time.time())
-                plot_output = plot(ad, filepath, layer, model_number)
-                completed_at = int(time.time())
-
-                try:
-                    plot_metrics = parse_plot_output(plot_output)
-                except ValueError:
-                    plot_metrics = {
-                        'plot_duration': max(0, completed_at - started_at),
-                        'plot_path': 0.0,
-                        'plot_travel': 0.0,
-                        'lifts': 0,
-                    }
-
-                response_payload = {
-                    'status': 'ok',
-                    'layer': layer,
-                    'title': title,
-                    'file': file,
-                    'filepath': filepath,
-                    'filename': os.path.basename(filepath),
-                    'file_hash': calculate_file_md5(filepath),
-                    'plotter': status_service.get_plotter_name(),
-                    'tool': tool,
-                    'media': media,
-                    'format': format_value,
-                    'orientation': orientation,
-                    'edition': edition,
-                    'editions': editions,
-                    'model_number': model_number,
-                    'started_at': started_at,
-                    'completed_at': completed_at,
-                    'metrics': plot_metrics,
-                }
-
-                append_plot_log_entry({
-                    'time': format_log_timestamp(completed_at),
-                    'status': 'ok',
-                    'title': title,
-                    'filename': response_payload['filename'],
-                    'fileHash': response_payload['file_hash'],
-                    'plotter': response_payload['plotter'],
-                    'edition': f"{edition}/{editions}",
-                    'layer': str(layer) if layer and layer > 0 else 'all',
-                    'tool': tool,
-                    'media': media,
-                    'format': format_value,
-                    'orientation': orientation,
-                    'duration': plot_metrics.get('plot_duration', 0),
-                    'path': plot_metrics.get('plot_path', 0.0),
-                    'travel': plot_metrics.get('plot_travel', 0.0),
-                    'lifts': plot_metrics.get('lifts', 0),
-                })
-
+                plot_options = read_plot_options(request.args)
+                if request.args.get("edition_run", "").lower() == "true":
+                    edition_run = EditionRun(
+                        confirm=request.args.get("edition_confirm", "").lower() == "true",
+                        pause_seconds=request.args.get("edition_pause", default=EDITION_PAUSE_SECONDS, type=float),
+                        confirm_timeout=EDITION_CONFIRM_TIMEOUT_SECONDS,
+                    )
+                    response_payload = run_edition_series(device, file, filepath, plot_options, edition_run)
+                else:
+                    response_payload = run_plot_job(device, file, filepath, plot_options)
                 response = Response(json.dumps(response_payload), mimetype='application/json')
             except Exception as e:
-                print(f"[ERROR] Exception during plot: {e}")
+                logger.exception("Exception during plot: %s", e)
                 response = f'Error: {e}', 500
             finally:
-                set_runtime_plot_state(is_plotting=False)
-                sem.release()
+                device.sem.release()
+                scheduler.dispatch()
         else:
             response = 'Busy', 503
         return response
@@ -410,15 +1003,107 @@ def plot_request(file):
         os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
         uploaded_file.save(filepath)
 
-        thumbnail_relative_path = build_thumbnail_relative_path(filename)
-        thumbnail_path = os.path.join(app.config['UPLOAD_FOLDER'], thumbnail_relative_path)
-        try:
-            generate_svg_thumbnail(filepath, thumbnail_path)
-        except Exception as error:
-            print(f"[WARN] Failed to generate thumbnail for {filename}: {error}")
+        thumbnail_queue.regenerate(filename)
+        artwork_watcher.refresh(filename)
 
         return '', 200
 
+@app.route('/thumbnails/<fingerprint>/<int:size>/<image_format>/<path:file>')
+def thumbnail(fingerprint, size, image_format, file):
+    """Serve one thumbnail tier, rendering missing tiers on demand.
+
+    URLs carry the SVG's content fingerprint, so a current one is cached as immutable.
+    """
+    filepath = resolve_artwork_path(file)
+    if size not in THUMBNAIL_TIERS_PX or image_format not in get_thumbnail_formats():
+        return 'Not Found', 404
+    if not filepath or not os.path.exists(filepath):
+        return 'File Not Found', 404
+
+    # Only indexed SVGs get thumbnails; another worker may have seen the file first
+    current_fingerprint = artwork_index.get_fingerprint(file)
+    if current_fingerprint is None:
+        artwork_watcher.refresh(file)
+        current_fingerprint = artwork_index.get_fingerprint(file)
+    if current_fingerprint is None:
+        return 'File Not Found', 404
+
+    thumbnail_path = os.path.join(art_dir, build_thumbnail_relative_path(file, size, image_format))
+    if not os.path.exists(thumbnail_path) or os.path.getmtime(thumbnail_path) < os.path.getmtime(filepath):
+        thumbnail_queue.regenerate(file)
+        if not os.path.exists(thumbnail_path):
+            return 'Thumbnail Not Available', 404
+
+    response = send_file(thumbnail_path, mimetype=THUMBNAIL_MIMETYPES[image_format], conditional=True)
+    if fingerprint == current_fingerprint:
+        response.headers['Cache-Control'] = 'public, max-age=31536000, immutable'
+    else:
+        # Stale version: let the browser revalidate
+        response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/thumbnails/batch.json')
+def thumbnail_batch():
+    """Return one page of the library's cached thumbnails as data URIs.
+
+    Thumbnails that are not rendered yet are listed under ``missing`` so the
+    client can fall back to the per-file URL, which renders them on demand.
+    """
+    try:
+        offset = max(0, int(request.args.get('offset', 0)))
+        limit = min(THUMBNAIL_BATCH_MAX, max(1, int(request.args.get('limit', THUMBNAIL_BATCH_DEFAULT))))
+        size = int(request.args.get('size', THUMBNAIL_DEFAULT_PX))
+    except ValueError:
+        return Response(json.dumps({'error': 'Invalid offset, limit or size'}), status=400, mimetype='application/json')
+
+    image_format = request.args.get('format', 'png')
+    if size not in THUMBNAIL_TIERS_PX or image_format not in get_thumbnail_formats():
+        return Response(json.dumps({'error': 'Unsupported thumbnail size or format'}), status=400, mimetype='application/json')
+
+    entries = artwork_watcher.get_entries()
+    page = []
+    for entry in entries[offset:offset + limit]:
+        thumbnail_path = os.path.join(art_dir, build_thumbnail_relative_path(entry['filename'], size, image_format))
+        try:
+            cached = os.path.getmtime(thumbnail_path) >= os.path.getmtime(os.path.join(art_dir, entry['filename']))
+        except OSError:
+            cached = False
+        metrics.record_cache_lookup('thumbnail_batch', cached)
+        page.append((entry, thumbnail_path if cached else None))
+
+    # The ETag covers the page's content fingerprints and which thumbnails exist,
+    # so a revalidation only has to stat files
+    etag_source = f"{offset}:{limit}:{size}:{image_format}:{len(entries)}\n" + '\n'.join(
+        f"{entry['filename']}:{entry.get('fingerprint')}:{int(bool(thumbnail_path))}" for entry, thumbnail_path in page
+    )
+    etag = hashlib.md5(etag_source.encode('utf-8')).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        thumbnails = {}
+        missing = []
+        for entry, thumbnail_path in page:
+            try:
+                with open(thumbnail_path, 'rb') as thumbnail_file:
+                    encoded = base64.b64encode(thumbnail_file.read()).decode('ascii')
+                thumbnails[entry['filename']] = f"data:{THUMBNAIL_MIMETYPES[image_format]};base64,{encoded}"
+            except (OSError, TypeError):
+                missing.append(entry['filename'])
+
+        response = Response(json.dumps({
+            'offset': offset,
+            'limit': limit,
+            'total': len(entries),
+            'size': size,
+            'format': image_format,
+            'thumbnails': thumbnails,
+            'missing': missing,
+        }), mimetype='application/json')
+
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
 @app.route('/download/<path:file>')
 def download_pdf(file):
     """Generate and return a PDF download for the requested SVG file."""
@@ -431,8 +1116,10 @@ def download_pdf(file):
 
     try:
         pdf_bytes = generate_svg_pdf_bytes(filepath)
+    except RendererUnavailableError:
+        raise
     except Exception as error:
-        print(f"[WARN] Failed to generate PDF for {file}: {error}")
+        logger.warning("Failed to generate PDF for %s: %s", file, error)
         return 'Failed to generate PDF', 500
 
     download_name = f"{os.path.splitext(os.path.basename(file))[0]}.pdf"
@@ -446,7 +1133,7 @@ def download_pdf(file):
 
 @app.route('/files/<path:file>', methods=['DELETE'])
 def delete_file(file):
-    """Delete an SVG file and its generated thumbnail from the artwork library."""
+    """Delete an SVG file and its generated thumbnails from the artwork library."""
     filepath = resolve_artwork_path(file)
     if not filepath or not os.path.exists(filepath):
         return Response(json.dumps({'error': 'File Not Found'}), status=404, mimetype='application/json')
@@ -454,25 +1141,115 @@ def delete_file(file):
     if not filepath.lower().endswith('.svg'):
         return Response(json.dumps({'error': 'Unsupported file type'}), status=400, mimetype='application/json')
 
-    thumbnail_path = os.path.join(app.config['UPLOAD_FOLDER'], build_thumbnail_relative_path(file))
+    relative_path = os.path.relpath(filepath, art_dir)
 
     try:
         os.remove(filepath)
-        remove_empty_parent_directories(filepath, art_dir)
-
-        if os.path.exists(thumbnail_path):
-            os.remove(thumbnail_path)
-            remove_empty_parent_directories(thumbnail_path, app.config['UPLOAD_FOLDER'])
+        with content_hashes_lock:
+            content_hashes.pop(filepath, None)
     except OSError as error:
-        print(f"[WARN] Failed to delete file {file}: {error}")
+        logger.warning("Failed to delete file %s: %s", file, error)
         return Response(json.dumps({'error': 'Failed to delete file'}), status=500, mimetype='application/json')
 
+    # Clean up here rather than relying on the watcher, which skips files it never indexed.
+    remove_derived_files(relative_path)
+    remove_empty_parent_directories(filepath, art_dir)
+
+    artwork_watcher.refresh(relative_path)
+    # Queued plots of the file can no longer run; other processes drop theirs on dispatch
+    scheduler.cancel_file(filepath)
+
     return Response(json.dumps({'deleted': file}), mimetype='application/json')
 
+@app.route('/files/<path:file>/layer/<int(min=1):layer>.svg')
+def layer_svg(file, layer):
+    """Serve an SVG reduced to one numbered Inkscape layer, optionally with rounded coordinates."""
+    filepath = resolve_artwork_path(file)
+    if not filepath or not filepath.lower().endswith('.svg') or not os.path.exists(filepath):
+        return Response(json.dumps({'error': 'File Not Found'}), status=404, mimetype='application/json')
+
+    # Without a precision, coordinates are rounded to suit the document's viewBox scale
+    precision = request.args.get('precision', default=AUTO_PRECISION, type=int)
+    if precision != AUTO_PRECISION and not 0 <= precision <= MAX_PRECISION:
+        return Response(json.dumps({'error': f'precision must be 0-{MAX_PRECISION}'}), status=400, mimetype='application/json')
+
+    try:
+        layer_path, cached = layer_cache.get_layer_svg(filepath, get_content_hash(filepath), layer, precision)
+    except ExpatError as error:
+        logger.warning("Failed to extract layer %s of %s: %s", layer, file, error)
+        return Response(json.dumps({'error': 'Invalid SVG'}), status=422, mimetype='application/json')
+    metrics.record_cache_lookup('layer_svg', cached)
+
+    response = send_compressed_file(layer_path, 'image/svg+xml', request)
+    if response is None:
+        response = send_file(layer_path, mimetype='image/svg+xml', conditional=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/files/<path:file>/polylines.bin')
+def polylines_bin(file):
+    """Serve the SVG (or one numbered layer of it) as a quantized binary polyline stream for the animator."""
+    filepath = resolve_artwork_path(file)
+    if not filepath or not filepath.lower().endswith('.svg') or not os.path.exists(filepath):
+        return Response(json.dumps({'error': 'File Not Found'}), status=404, mimetype='application/json')
+
+    layer = request.args.get('layer', type=int)
+    if layer is not None and layer < 1:
+        return Response(json.dumps({'error': 'layer must be 1 or greater'}), status=400, mimetype='application/json')
+
+    try:
+        polylines_path, cached = get_cached_polylines(layer_cache, filepath, get_content_hash(filepath), layer)
+    except ExpatError as error:
+        logger.warning("Failed to export polylines of %s: %s", file, error)
+        return Response(json.dumps({'error': 'Invalid SVG'}), status=422, mimetype='application/json')
+    metrics.record_cache_lookup('polylines', cached)
+
+    response = send_compressed_file(polylines_path, POLYLINE_MIMETYPE, request)
+    if response is None:
+        response = send_file(polylines_path, mimetype=POLYLINE_MIMETYPE, conditional=True)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/files/<path:file>/layers.json')
+def layers_json(file):
+    """List the numbered Inkscape layers of an SVG."""
+    filepath = resolve_artwork_path(file)
+    if not filepath or not filepath.lower().endswith('.svg') or not os.path.exists(filepath):
+        return Response(json.dumps({'error': 'File Not Found'}), status=404, mimetype='application/json')
+
+    try:
+        layers, cached = layer_cache.get_layers(filepath, get_content_hash(filepath))
+    except ExpatError as error:
+        logger.warning("Failed to read layers of %s: %s", file, error)
+        return Response(json.dumps({'error': 'Invalid SVG'}), status=422, mimetype='application/json')
+    metrics.record_cache_lookup('layer_list', cached)
+
+    return Response(json.dumps({'file': file, 'layers': layers}), mimetype='application/json')
+
+@app.route('/files/<path:file>/history.json')
+def file_history_json(file):
+    """Return how often the current version of a file was plotted, and with which tools and media."""
+    filepath = resolve_artwork_path(file)
+    if not filepath or not os.path.isfile(filepath):
+        return Response(json.dumps({'error': 'File Not Found'}), status=404, mimetype='application/json')
+
+    file_hash = get_content_hash(filepath)
+    return Response(json.dumps({
+        'file': file,
+        'file_hash': file_hash,
+        'history': plot_history.get(file_hash),
+        'versions': plot_history.get_versions(file),
+    }), mimetype='application/json')
+
+
 @app.route('/status')
 def status():
     """Original status endpoint - returns plain text for backwards compatibility"""
-    status_data = apply_runtime_state_to_status(status_service.get_plotter_status())
+    status_data = get_request_status_data()
+    if status_data is None and HARDWARE_SERVICE_URL:
+        return forward_request(HARDWARE_SERVICE_URL, request)
+    if status_data is None:
+        return Response('unknown device', status=404, mimetype='text/plain')
 
     # Return plain text status for backwards compatibility
     status_text = status_data["status"]
@@ -489,7 +1266,11 @@ def status():
 @app.route('/status.json')
 def status_json():
     """JSON status endpoint - returns detailed machine info"""
-    status_data = apply_runtime_state_to_status(status_service.get_plotter_status())
+    status_data = get_request_status_data()
+    if status_data is None and HARDWARE_SERVICE_URL:
+        return forward_request(HARDWARE_SERVICE_URL, request)
+    if status_data is None:
+        return unknown_device_response()
 
     response = Response(json.dumps(status_data), mimetype='application/json')
 
@@ -501,6 +1282,124 @@ def status_json():
     return response
 
 
+@app.route('/devices.json')
+def devices_json():
+    """List registered plotters with their latest status."""
+    devices = []
+    for device in registry.all_devices():
+        device_data = device.describe()
+        device_data['status'] = apply_runtime_state_to_status(device, device.status_service.get_plotter_status())
+        devices.append(device_data)
+
+    response = Response(json.dumps({'devices': devices}), mimetype='application/json')
+    response.headers['Cache-Control'] = 'no-store, no-cache, must-revalidate, public, max-age=0'
+    return response
+
+
+@app.route('/devices/refresh', methods=['POST'])
+def refresh_devices():
+    """Re-run plotter discovery to pick up machines connected since startup."""
+    devices = [device.describe() for device in registry.discover()]
+    return Response(json.dumps({'devices': devices}), mimetype='application/json')
+
+
+@app.route('/devices/loadout', methods=['POST'])
+def set_device_loadout():
+    """Record the tool and media loaded in a plotter for queue matching."""
+    device = get_request_device()
+    if device is None:
+        return unknown_device_response()
+
+    device.set_loadout(
+        tool=request.values.get('tool', default='', type=str),
+        media=request.values.get('media', default='', type=str),
+    )
+    scheduler.dispatch()
+    return Response(json.dumps({'device': device.describe()}), mimetype='application/json')
+
+
+@app.route('/queue', methods=['POST'])
+def queue_plot():
+    """Queue a plot to run on the first idle plotter that can fit it."""
+    file = request.values.get('file', default='', type=str)
+    filepath = resolve_artwork_path(file) if file else None
+    if not filepath or not os.path.exists(filepath):
+        return Response(json.dumps({'error': 'File Not Found'}), status=404, mimetype='application/json')
+
+    job = scheduler.submit(PlotJob(file, filepath, read_plot_options(request.values)))
+    return Response(json.dumps({'job': job.to_dict()}), status=202, mimetype='application/json')
+
+
+@app.route('/queue.json')
+def queue_json():
+    """List queued, running and recently finished plot jobs."""
+    return Response(json.dumps(scheduler.snapshot()), mimetype='application/json')
+
+
+@app.route('/queue/policy', methods=['POST'])
+def set_queue_policy():
+    """Switch the scheduling policy used to order queued jobs."""
+    try:
+        scheduler.set_policy(request.values.get('policy', default='', type=str))
+    except ValueError as error:
+        return Response(json.dumps({'error': str(error)}), status=400, mimetype='application/json')
+
+    return Response(json.dumps({'policy': scheduler.policy_name}), mimetype='application/json')
+
+
+@app.route('/queue/<int:job_id>', methods=['DELETE'])
+def cancel_queued_plot(job_id):
+    """Cancel a queued job that has not started yet."""
+    job = scheduler.cancel(job_id)
+    if job is None:
+        return Response(json.dumps({'error': 'Job not queued'}), status=404, mimetype='application/json')
+
+    return Response(json.dumps({'job': job.to_dict()}), mimetype='application/json')
+
+
+@app.route('/resume.json')
+def resume_json():
+    """List halted plots that can be resumed, optionally only those of one file."""
+    file = request.args.get('file', default='', type=str) or None
+    return Response(json.dumps({'entries': resume_store.list_entries(file)}), mimetype='application/json')
+
+
+@app.route('/plot/resume/<resume_id>', methods=['POST'])
+def resume_plot(resume_id):
+    """Continue a halted plot from where it stopped (AxiDraw res_plot mode)."""
+    resume_entry = resume_store.get(resume_id)
+    if resume_entry is None:
+        return Response(json.dumps({'error': 'Resume point not found'}), status=404, mimetype='application/json')
+
+    device_name = request.values.get('device', default='', type=str) or resume_entry.get('device')
+    device = registry.get_device(device_name)
+    if device is None:
+        return unknown_device_response()
+
+    if not acquire_device_semaphore(device, 0.1):
+        return 'Busy', 503
+    try:
+        response_payload = run_plot_job(
+            device, resume_entry['file'], resume_entry['filepath'], resume_entry['options'], resume_entry
+        )
+        return Response(json.dumps(response_payload), mimetype='application/json')
+    except Exception as e:
+        logger.exception("Exception during resumed plot: %s", e)
+        return f'Error: {e}', 500
+    finally:
+        device.sem.release()
+        scheduler.dispatch()
+
+
+@app.route('/resume/<resume_id>', methods=['DELETE'])
+def discard_resume(resume_id):
+    """Forget a halted plot that will not be resumed."""
+    if not resume_store.delete(resume_id):
+        return Response(json.dumps({'error': 'Resume point not found'}), status=404, mimetype='application/json')
+
+    return Response(json.dumps({'status': 'ok'}), mimetype='application/json')
+
+
 @app.route('/logs.json', methods=['GET', 'DELETE'])
 def logs_json():
     """Read or clear persisted plot log entries."""
@@ -511,34 +1410,102 @@ def logs_json():
     return Response(json.dumps({'entries': load_plot_log_entries()}), mimetype='application/json')
 
 
+@app.route('/plot/editions/continue', methods=['POST'])
+def continue_edition_run():
+    """Start the next copy of an edition run once the paper has been changed."""
+    device = get_request_device()
+    if device is None:
+        return unknown_device_response()
+
+    edition_run = device.edition_run
+    if edition_run is None or not edition_run.advance():
+        return Response(json.dumps({'error': 'No edition is waiting'}), status=409, mimetype='application/json')
+
+    return Response(json.dumps({'status': 'ok'}), mimetype='application/json')
+
+
 @app.route('/plot/stop', methods=['POST'])
 def stop_plot():
     """Best-effort plot interruption and cleanup commands."""
-    runtime_state = get_runtime_plot_state_snapshot()
-    if not runtime_state["is_plotting"]:
-        return Response(json.dumps({'error': 'No active plot'}), status=409, mimetype='application/json')
+    device = get_request_device()
+    if device is None:
+        return unknown_device_response()
 
-    set_runtime_plot_state(stop_requested=True)
-
-    model_number = get_active_model_number()
     stop_result = {
         "requested_at": int(time.time()),
         "success": False,
+        "method": None,
         "servo_state": "unknown",
         "raise_pen": False,
         "disable_xy": False,
+        "time_to_pen_up_ms": None,
+        "halt_position": None,
+        "stopped_code": None,
         "error": None,
     }
 
+    # A stop also ends an edition run. Between copies nothing is moving: the
+    # cancel is the whole stop, and the run logs itself as stopped
+    edition_run = device.edition_run
+    if edition_run is not None:
+        edition_run.cancel()
+        if device.halt is None:
+            stop_result.update({"success": True, "method": "edition_cancel"})
+            set_runtime_plot_state(device, last_stop=stop_result)
+            return Response(json.dumps({
+                'status': 'ok',
+                'stop_result': stop_result,
+            }), mimetype='application/json')
+
+    runtime_state = get_runtime_plot_state_snapshot(device)
+    if not runtime_state["is_plotting"]:
+        return Response(json.dumps({'error': 'No active plot'}), status=409, mimetype='application/json')
+
+    set_runtime_plot_state(device, stop_requested=True)
+
+    # Halt the running plot between moves; it raises the pen on its open connection
+    # and disables the motors itself, so no new USB session is needed
+    halt = device.halt
+    if halt is not None and halt.request(device.ad) and halt.wait(STOP_HALT_TIMEOUT_SECONDS):
+        halt_summary = halt.describe()
+        stop_result.update({
+            "success": halt.motors_disabled,
+            "method": "pause_request",
+            "servo_state": "up",
+            "raise_pen": True,
+            "disable_xy": halt.motors_disabled,
+            "time_to_pen_up_ms": halt_summary['time_to_pen_up_ms'],
+            "halt_position": halt_summary['position'],
+            "stopped_code": halt_summary['stopped_code'],
+        })
+        metrics.OPERATION_LATENCY.observe(halt.halted_at - halt.requested_at, 'stop_pen_up')
+        if halt.motors_disabled:
+            set_runtime_plot_state(device, last_stop=stop_result)
+            # The halted plot logs itself with its file details
+            return Response(json.dumps({
+                'status': 'ok',
+                'stop_result': stop_result,
+            }), mimetype='application/json')
+        logger.warning("Plot on %s halted but could not disable its motors; sending stop commands", device.name)
+    elif halt is not None and halt.requested.is_set():
+        logger.warning("Plot on %s did not halt within %ss; sending stop commands", device.name, STOP_HALT_TIMEOUT_SECONDS)
+
+    # Fallback for APIs without pause requests: command the pen up from a new connection
+    # The worker may be busy with the plot being stopped, so no detection is queued behind it
+    model_number = halt.model_number if halt is not None else (
+        device.status_service.model_number or device.status_service.get_default_model_number()
+    )
+    stop_result["method"] = "cleanup_commands"
     try:
-        command_result = run_stop_cleanup_commands(model_number)
+        with metrics.time_operation('stop_cleanup_commands'):
+            command_result = run_stop_cleanup_commands(model_number, device.port)
         stop_result.update(command_result)
         stop_result["success"] = bool(command_result["raise_pen"] and command_result["disable_xy"])
     except Exception as error:
-        print(f"[ERROR] Stop plot command failed: {error}")
+        logger.error("Stop plot command failed: %s", error)
         stop_result["error"] = str(error)
 
-    set_runtime_plot_state(last_stop=stop_result)
+    set_runtime_plot_state(device, last_stop=stop_result)
 
     append_plot_log_entry({
         'time': format_log_timestamp(stop_result['requested_at']),
@@ -547,7 +1514,8 @@ def stop_plot():
         'filename': '',
         'file': '',
         'fileHash': '-',
-        'plotter': status_service.get_plotter_name(),
+        'plotter': device.status_service.get_plotter_name(),
+        'device': device.name,
         'edition': '-',
         'layer': '-',
         'tool': '-',
@@ -575,21 +1543,55 @@ def stop_plot():
 @app.route('/servo/toggle', methods=['POST'])
 def servo_toggle():
     """Toggle the AxiDraw servo pen state (up/down)."""
-    if not sem.acquire(True, 1.0):
+    device = get_request_device()
+    if device is None:
+        return unknown_device_response()
+
+    if not acquire_device_semaphore(device, 1.0):
         return Response(json.dumps({'error': 'Busy'}), status=503, mimetype='application/json')
 
     try:
-        model_number = get_active_model_number()
-        servo_ad = axidraw.AxiDraw()
-        print(f"[INFO] Servo toggle request: model={model_number}")
-        toggle_servo(servo_ad, model_number)
-        print("[INFO] Servo toggle command completed")
+        model_number = get_active_model_number(device)
+        servo_ad = create_axidraw()
+        logger.info("Servo toggle request: device=%s model=%s", device.name, model_number)
+        device.run(toggle_servo, servo_ad, model_number, device.port)
+        logger.info("Servo toggle command completed")
         return Response(json.dumps({'status': 'ok'}), mimetype='application/json')
     except Exception as error:
-        print(f"[ERROR] Exception during servo toggle: {error}")
+        logger.error("Exception during servo toggle: %s", error)
         return Response(json.dumps({'error': str(error)}), status=500, mimetype='application/json')
     finally:
-        sem.release()
+        device.sem.release()
+
+
+@app.route('/admin/profiles.json')
+def profiles_json():
+    """List stored request profiles, newest first."""
+    return Response(json.dumps({'profiles': request_profiler.list_profiles()}), mimetype='application/json')
+
+
+@app.route('/admin/profiles/<profile_id>')
+def download_profile(profile_id):
+    """Download a stored profile (.prof for pstats/snakeviz), or a text report with ?format=text."""
+    profile_path = request_profiler.get_profile_path(profile_id)
+    if profile_path is None:
+        return Response(json.dumps({'error': 'Profile not found'}), status=404, mimetype='application/json')
+
+    if request.args.get('format') == 'text':
+        sort_key = request.args.get('sort', default='cumulative', type=str)
+        try:
+            report = request_profiler.render_text(profile_id, sort_key=sort_key)
+        except KeyError:
+            return Response(json.dumps({'error': f'Unknown sort key {sort_key}'}), status=400, mimetype='application/json')
+        return Response(report, mimetype='text/plain')
+
+    return send_file(profile_path, mimetype='application/octet-stream', as_attachment=True, download_name=f"{profile_id}.prof")
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Expose request latency, hot-path timings and queue gauges for Prometheus."""
+    return Response(metrics.registry.render(), content_type=metrics.PROMETHEUS_CONTENT_TYPE)
 
 if __name__ == '__main__':
     app.run(debug=True, host='0.0.0.0', port=int(os.environ.get("HOST_PORT", 5007)))
\ No newline at end of file
@@ -0,0 +1,218 @@
+from contextlib import contextmanager
+import bisect
+import logging
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+# Bucket upper bounds (seconds) covering fast requests up to multi-hour plots
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300, 1800, 7200)
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def format_labels(label_names, label_values):
+    """Render a Prometheus label set such as {route="/status"}."""
+    if not label_names:
+        return ''
+    pairs = []
+    for name, value in zip(label_names, label_values):
+        escaped_value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        pairs.append(f'{name}="{escaped_value}"')
+    return '{' + ','.join(pairs) + '}'
+
+
+def format_value(value):
+    """Render a sample value the way Prometheus expects."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value))
+
+
+class Counter:
+    def __init__(self, name, documentation, label_names=()):
+        """Create a monotonically increasing counter keyed by label values."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def inc(self, *label_values, amount=1):
+        """Increase the counter for one label combination."""
+        with self.lock:
+            self.values[label_values] = self.values.get(label_values, 0) + amount
+
+    def collect(self):
+        """Return exposition lines for this counter."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}")
+        return lines
+
+
+class Gauge:
+    def __init__(self, name, documentation, label_names=(), callback=None):
+        """Create a gauge set directly or read from ``callback()`` at scrape time.
+
+        A labelled gauge's callback returns a dict mapping label value tuples to values.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.callback = callback
+        self.values = {}
+        self.lock = threading.Lock()
+
+    def set(self, value, *label_values):
+        """Set the gauge for one label combination."""
+        with self.lock:
+            self.values[label_values] = value
+
+    def collect(self):
+        """Return exposition lines for this gauge."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} gauge"]
+        if self.callback is not None:
+            try:
+                value = self.callback()
+                if isinstance(value, dict):
+                    for label_values, label_value in value.items():
+                        self.set(label_value, *label_values)
+                else:
+                    self.set(value)
+            except Exception as error:
+                logger.warning("Metric callback for %s failed: %s", self.name, error)
+        with self.lock:
+            for label_values, value in sorted(self.values.items()):
+                lines.append(f"{self.name}{format_labels(self.label_names, label_values)} {format_value(value)}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name, documentation, label_names=(), buckets=DEFAULT_BUCKETS):
+        """Create a histogram with fixed buckets keyed by label values."""
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self.series = {}
+        self.lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        """Record one observation; costs a bisect and a few additions."""
+        bucket_index = bisect.bisect_left(self.buckets, value)
+        with self.lock:
+            series = self.series.get(label_values)
+            if series is None:
+                series = {'counts': [0] * (len(self.buckets) + 1), 'sum': 0.0, 'count': 0}
+                self.series[label_values] = series
+            series['counts'][bucket_index] += 1
+            series['sum'] += value
+            series['count'] += 1
+
+    @contextmanager
+    def time(self, *label_values):
+        """Observe the wall time spent inside the ``with`` block."""
+        started_at = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started_at, *label_values)
+
+    def collect(self):
+        """Return exposition lines (cumulative buckets, sum and count) for this histogram."""
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        bucket_label_names = self.label_names + ('le',)
+        with self.lock:
+            for label_values, series in sorted(self.series.items()):
+                cumulative = 0
+                for upper_bound, bucket_count in zip(self.buckets + (float('inf'),), series['counts']):
+                    cumulative += bucket_count
+                    labels = format_labels(bucket_label_names, label_values + (format_value(upper_bound),))
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = format_labels(self.label_names, label_values)
+                lines.append(f"{self.name}_sum{labels} {format_value(series['sum'])}")
+                lines.append(f"{self.name}_count{labels} {series['count']}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        """Keep the metrics exported by the /metrics endpoint."""
+        self.metrics = []
+
+    def register(self, metric):
+        """Add a metric to the exposition output and return it."""
+        self.metrics.append(metric)
+        return metric
+
+    def render(self):
+        """Return all metrics in the Prometheus text exposition format."""
+        lines = []
+        for metric in self.metrics:
+            lines.extend(metric.collect())
+        return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+REQUEST_LATENCY = registry.register(Histogram(
+    'plot_server_request_duration_seconds',
+    'HTTP request latency by route.',
+    ('method', 'route', 'status'),
+))
+OPERATION_LATENCY = registry.register(Histogram(
+    'plot_server_operation_duration_seconds',
+    'Time spent in hardware, rendering and log operations.',
+    ('operation',),
+))
+SEMAPHORE_WAIT = registry.register(Histogram(
+    'plot_server_semaphore_wait_seconds',
+    'Time spent waiting for a plotter Semaphore.',
+    ('route',),
+))
+CACHE_REQUESTS = registry.register(Counter(
+    'plot_server_cache_requests_total',
+    'Cache lookups by cache and result (hit or miss).',
+    ('cache', 'result'),
+))
+PLOT_METRICS_SOURCES = registry.register(Counter(
+    'plot_server_plot_metrics_total',
+    'Plot and preview metrics by source (AxiDraw API attributes or parsed console output).',
+    ('kind', 'source'),
+))
+BUSY_RESPONSES = registry.register(Counter(
+    'plot_server_busy_responses_total',
+    'Requests rejected with 503 Busy because a plotter was in use.',
+    ('route',),
+))
+
+
+def get_cache_hit_ratios():
+    """Return the hit ratio of every cache seen so far, keyed by cache name."""
+    totals = {}
+    with CACHE_REQUESTS.lock:
+        for (cache_name, result), count in CACHE_REQUESTS.values.items():
+            hits, lookups = totals.get(cache_name, (0, 0))
+            totals[cache_name] = (hits + (count if result == 'hit' else 0), lookups + count)
+    return {(cache_name,): hits / lookups for cache_name, (hits, lookups) in totals.items() if lookups}
+
+
+CACHE_HIT_RATIO = registry.register(Gauge(
+    'plot_server_cache_hit_ratio',
+    'Share of cache lookups served from the cache since startup.',
+    ('cache',),
+    callback=get_cache_hit_ratios,
+))
+
+
+def time_operation(operation):
+    """Context manager timing one named hot-path operation."""
+    return OPERATION_LATENCY.time(operation)
+
+
+def record_cache_lookup(cache_name, hit):
+    """Count one cache hit or miss."""
+    CACHE_REQUESTS.inc(cache_name, 'hit' if hit else 'miss')
@@ -0,0 +1,142 @@
+import copy
+import json
+import logging
+import os
+import threading
+
+from svg_library import normalize_relative_path
+
+
+logger = logging.getLogger(__name__)
+
+# Log rows without a file (stop commands, failed plots) are not part of any history
+IGNORED_FILE_HASHES = {'', '-'}
+COMPLETED_STATUS = 'ok'
+# Leading log bytes compared on refresh to notice a log rewritten in place
+LOG_HEAD_BYTES = 256
+
+
+class PlotHistoryIndex:
+    def __init__(self, log_path):
+        """Summarize the plot log per file hash so the library can show each file's plots.
+
+        The index follows the log file by offset: new rows are applied as they are
+        appended, also when another process (the hardware sidecar) wrote them, and
+        the log is only read in full again after it was cleared, rotated or rewritten.
+        """
+        self.log_path = log_path
+        self.lock = threading.Lock()
+        self.offset = 0
+        self.file_id = None
+        self.head = b''
+        self.by_hash = {}
+        self.by_path = {}
+
+    def reset(self):
+        """Forget every record, e.g. before rereading a cleared log."""
+        self.offset = 0
+        self.file_id = None
+        self.head = b''
+        self.by_hash = {}
+        self.by_path = {}
+
+    def refresh(self):
+        """Apply log rows appended since the last refresh."""
+        with self.lock:
+            try:
+                log_stats = os.stat(self.log_path)
+            except OSError:
+                self.reset()
+                return
+            # A shorter log was cleared; a different file was rotated in
+            file_id = (log_stats.st_dev, log_stats.st_ino)
+            if log_stats.st_size < self.offset or file_id != self.file_id:
+                self.reset()
+                self.file_id = file_id
+            if log_stats.st_size == self.offset:
+                return
+
+            with open(self.log_path, 'rb') as log_file:
+                # The same file emptied and refilled past the offset (copytruncate)
+                if log_file.read(len(self.head)) != self.head:
+                    self.reset()
+                    self.file_id = file_id
+                log_file.seek(self.offset)
+                for line in log_file:
+                    # A row still being written is picked up on the next refresh
+                    if not line.endswith(b'\n'):
+                        break
+                    self.offset += len(line)
+                    try:
+                        self.add_entry(json.loads(line))
+                    except (ValueError, AttributeError):
+                        continue
+                if len(self.head) < LOG_HEAD_BYTES:
+                    log_file.seek(0)
+                    self.head = log_file.read(min(self.offset, LOG_HEAD_BYTES))
+
+    def add_entry(self, entry):
+        """Count one plot log row towards the history of its file hash."""
+        file_hash = entry.get('fileHash') or ''
+        if file_hash in IGNORED_FILE_HASHES:
+            return
+
+        record = self.by_hash.setdefault(file_hash, {
+            'file_hash': file_hash,
+            'plot_count': 0,
+            'stopped_count': 0,
+            'last_plotted_at': None,
+            'last_status': None,
+            'last_tool': None,
+            'last_media': None,
+            'last_device': None,
+            'tools': {},
+            'media': {},
+        })
+        status = entry.get('status')
+        if status == COMPLETED_STATUS:
+            record['plot_count'] += 1
+        elif status == 'stopped':
+            record['stopped_count'] += 1
+        record['last_plotted_at'] = entry.get('time')
+        record['last_status'] = status
+        record['last_device'] = entry.get('device')
+        for field, counts_field, last_field in (('tool', 'tools', 'last_tool'), ('media', 'media', 'last_media')):
+            value = entry.get(field)
+            if value and value != 'None':
+                record[counts_field][value] = record[counts_field].get(value, 0) + 1
+                record[last_field] = value
+
+        # Rows written before the relative path was logged only have the file name
+        path = normalize_relative_path(entry.get('file') or entry.get('filename') or '')
+        if path:
+            path_hashes = self.by_path.setdefault(path, [])
+            if file_hash in path_hashes:
+                path_hashes.remove(file_hash)
+            path_hashes.append(file_hash)
+
+    def get(self, file_hash):
+        """Return the history of one file version, or None if it was never plotted."""
+        self.refresh()
+        with self.lock:
+            record = self.by_hash.get(file_hash)
+            return copy.deepcopy(record) if record else None
+
+    def get_versions(self, relative_path):
+        """Return the histories of every version plotted from a path, latest first."""
+        self.refresh()
+        with self.lock:
+            path_hashes = self.by_path.get(normalize_relative_path(relative_path), [])
+            return [copy.deepcopy(self.by_hash[file_hash]) for file_hash in reversed(path_hashes)]
+
+    def has_entries(self):
+        """Return True once any file has been plotted."""
+        self.refresh()
+        with self.lock:
+            return bool(self.by_hash)
+
+    def get_many(self, file_hashes):
+        """Return {file hash: history} for the given hashes that were plotted, for the listing."""
+        self.refresh()
+        with self.lock:
+            return {file_hash: dict(self.by_hash[file_hash]) for file_hash in file_hashes if file_hash in self.by_hash}
@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+import logging
+from typing import Optional
+
+import metrics
+from preview_parser import parse_plot_output, parse_preview_output
+
+
+logger = logging.getLogger(__name__)
+
+# Statistics the AxiDraw API sets on the instance after plot_run (seconds and meters)
+PLOT_STATISTICS = ('time_elapsed', 'distance_pendown', 'distance_total')
+PREVIEW_STATISTICS = ('time_estimate', 'distance_pendown', 'distance_total')
+
+
+@dataclass(frozen=True)
+class PlotMetrics:
+    """Duration (s), pen-down path and travel (m) and pen lifts of a plot or preview.
+
+    For plots ``plot_travel`` is the total distance moved; for previews it is the
+    pen-up travel, matching the AxiDraw reports. ``source`` is ``api`` when read
+    from the AxiDraw instance and ``output`` when parsed from its console report.
+    """
+
+    plot_duration: int
+    plot_path: float
+    plot_travel: float
+    lifts: Optional[int] = None
+    source: str = 'api'
+
+    def to_dict(self):
+        """Return the metrics in the shape kept in plot logs, payloads and the preview cache."""
+        values = {
+            'plot_duration': self.plot_duration,
+            'plot_path': self.plot_path,
+            'plot_travel': self.plot_travel,
+        }
+        if self.lifts is not None:
+            values['lifts'] = self.lifts
+        return values
+
+
+def read_api_statistics(ad, names):
+    """Return the named statistics of an AxiDraw instance, or None if the API does not report them."""
+    values = {}
+    for name in names:
+        value = getattr(ad, name, None)
+        if value is None:
+            return None
+        try:
+            values[name] = float(value)
+        except (TypeError, ValueError):
+            return None
+    return values
+
+
+def read_pen_lifts(ad):
+    """Return the pen lift count of an AxiDraw instance, or None if it is missing or not a count."""
+    lifts = getattr(ad, 'pen_lifts', None)
+    if isinstance(lifts, bool):
+        return None
+    try:
+        return int(lifts) if float(lifts) == int(lifts) else None
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
+def collect_plot_metrics(ad, output=''):
+    """Read the metrics of the plot that just ran, parsing ``output`` only for older APIs.
+
+    Returns None when neither the instance nor the output reports them.
+    """
+    api_values = read_api_statistics(ad, PLOT_STATISTICS)
+    lifts = read_pen_lifts(ad)
+    if api_values is not None and lifts is not None:
+        metrics.PLOT_METRICS_SOURCES.inc('plot', 'api')
+        return PlotMetrics(
+            plot_duration=int(round(api_values['time_elapsed'])),
+            plot_path=round(api_values['distance_pendown'], 2),
+            plot_travel=round(api_values['distance_total'], 2),
+            lifts=lifts,
+        )
+
+    try:
+        parsed = parse_plot_output(output)
+    except ValueError:
+        logger.warning("AxiDraw API reported no plot statistics and the output could not be parsed")
+        return None
+    metrics.PLOT_METRICS_SOURCES.inc('plot', 'output')
+    # The regex parser finds no lifts when the report omits them; the attribute may still exist
+    if lifts is not None and not parsed['lifts']:
+        parsed['lifts'] = lifts
+    return PlotMetrics(source='output', **parsed)
+
+
+def collect_preview_metrics(ad, output=''):
+    """Read the estimate of the preview that just ran, parsing ``output`` only for older APIs.
+
+    Raises ValueError when neither the instance nor the output reports it.
+    """
+    api_values = read_api_statistics(ad, PREVIEW_STATISTICS)
+    if api_values is not None:
+        metrics.PLOT_METRICS_SOURCES.inc('preview', 'api')
+        return PlotMetrics(
+            plot_duration=int(round(api_values['time_estimate'])),
+            plot_path=round(api_values['distance_pendown'], 2),
+            plot_travel=round(api_values['distance_total'] - api_values['distance_pendown'], 2),
+        )
+
+    parsed = parse_preview_output(output)
+    metrics.PLOT_METRICS_SOURCES.inc('preview', 'output')
+    return PlotMetrics(source='output', **parsed)
@@ -0,0 +1,283 @@
+import itertools
+import logging
+import os
+import threading
+import time
+
+from svg_library import get_svg_physical_size_px
+
+
+logger = logging.getLogger(__name__)
+
+
+SVG_PX_PER_INCH = 96
+FINISHED_JOB_HISTORY = 100
+UNSPECIFIED_VALUES = ('', 'none')
+
+
+def is_unspecified(value):
+    """Return True for empty tool/media values, including the UI's "None" option."""
+    return value is None or str(value).strip().lower() in UNSPECIFIED_VALUES
+
+
+class PlotJob:
+    _ids = itertools.count(1)
+
+    def __init__(self, file, filepath, options):
+        """Capture a queued plot request and the SVG size used for capability matching."""
+        self.id = next(self._ids)
+        self.file = file
+        self.filepath = filepath
+        self.options = dict(options)
+        self.status = "queued"
+        self.device = None
+        self.submitted_at = int(time.time())
+        self.started_at = None
+        self.completed_at = None
+        self.result = None
+        self.error = None
+
+        # Physical size from the root width/height units; only the root element is read
+        dimensions = get_svg_physical_size_px(filepath)
+        if dimensions:
+            self.width_in = dimensions[0] / SVG_PX_PER_INCH
+            self.height_in = dimensions[1] / SVG_PX_PER_INCH
+        else:
+            self.width_in = None
+            self.height_in = None
+
+    def to_dict(self):
+        """Return a serializable view of the job for API responses."""
+        return {
+            "id": self.id,
+            "file": self.file,
+            "status": self.status,
+            "device": self.device,
+            "options": dict(self.options),
+            "width_in": self.width_in,
+            "height_in": self.height_in,
+            "submitted_at": self.submitted_at,
+            "started_at": self.started_at,
+            "completed_at": self.completed_at,
+            "result": self.result,
+            "error": self.error,
+        }
+
+
+def fifo_policy(jobs, device, estimate_lookup):
+    """Order pending jobs by submission time."""
+    return list(jobs)
+
+
+def shortest_job_first_policy(jobs, device, estimate_lookup):
+    """Order pending jobs by cached preview duration; jobs never previewed go last."""
+    def sort_key(job):
+        estimate = estimate_lookup(job)
+        if estimate is None:
+            return (1, 0, job.id)
+        return (0, estimate, job.id)
+
+    return sorted(jobs, key=sort_key)
+
+
+def pen_affinity_policy(jobs, device, estimate_lookup):
+    """Prefer jobs using the pen already in the device, then fall back to FIFO."""
+    current_tool = device.loadout.get("tool") or device.last_tool
+    if is_unspecified(current_tool):
+        return list(jobs)
+
+    return sorted(jobs, key=lambda job: (job.options.get("tool") != current_tool, job.id))
+
+
+SCHEDULING_POLICIES = {
+    "fifo": fifo_policy,
+    "sjf": shortest_job_first_policy,
+    "affinity": pen_affinity_policy,
+}
+
+
+class PlotScheduler:
+    def __init__(self, registry, run_job, estimate_lookup, policy=None):
+        """Dispatch queued jobs to idle plotters using a named scheduling policy.
+
+        ``run_job(device, job)`` performs the plot and returns the response payload;
+        ``estimate_lookup(job)`` returns a cached duration in seconds or None.
+        """
+        self.registry = registry
+        self.run_job = run_job
+        self.estimate_lookup = estimate_lookup
+        self.policy_name = policy or os.environ.get("PLOT_QUEUE_POLICY", "fifo")
+        if self.policy_name not in SCHEDULING_POLICIES:
+            logger.warning("Unknown queue policy %s; using fifo", self.policy_name)
+            self.policy_name = "fifo"
+        self.lock = threading.Lock()
+        self.pending = []
+        self.finished = []
+        self.running = {}
+
+    def set_policy(self, policy_name):
+        """Switch the active scheduling policy; raises ValueError for unknown names."""
+        if policy_name not in SCHEDULING_POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy_name}")
+        self.policy_name = policy_name
+        self.dispatch()
+
+    def submit(self, job):
+        """Queue a job and try to start it right away."""
+        with self.lock:
+            self.pending.append(job)
+        self.dispatch()
+        return job
+
+    def cancel(self, job_id):
+        """Remove a job that has not started yet; returns the job or None."""
+        with self.lock:
+            for job in self.pending:
+                if job.id == job_id:
+                    self.pending.remove(job)
+                    job.status = "cancelled"
+                    self.remember_finished(job)
+                    return job
+        return None
+
+    def cancel_file(self, filepath, reason="File deleted"):
+        """Cancel every queued job for a file, e.g. once it was deleted; returns the jobs."""
+        with self.lock:
+            jobs = [job for job in self.pending if job.filepath == filepath]
+            for job in jobs:
+                self.pending.remove(job)
+                job.status = "cancelled"
+                job.error = reason
+                self.remember_finished(job)
+        return jobs
+
+    def drop_missing_files(self):
+        """Cancel queued jobs whose SVG no longer exists, e.g. removed outside the API."""
+        with self.lock:
+            missing_filepaths = {job.filepath for job in self.pending if not os.path.exists(job.filepath)}
+        for filepath in missing_filepaths:
+            for job in self.cancel_file(filepath, "File not found"):
+                logger.warning("Dropped queued plot job %s: %s no longer exists", job.id, job.file)
+
+    def snapshot(self):
+        """Return queued, running and recently finished jobs for API responses."""
+        with self.lock:
+            return {
+                "policy": self.policy_name,
+                "policies": sorted(SCHEDULING_POLICIES),
+                "pending": [job.to_dict() for job in self.pending],
+                "running": [job.to_dict() for job in self.running.values()],
+                "finished": [job.to_dict() for job in reversed(self.finished)],
+            }
+
+    def remember_finished(self, job):
+        """Keep a bounded history of finished jobs; the caller holds the lock."""
+        self.finished.append(job)
+        del self.finished[:-FINISHED_JOB_HISTORY]
+
+    def device_can_run(self, device, job):
+        """Check that a device's travel and loaded tool/media suit the job."""
+        status_data = device.status_service.get_plotter_status()
+        if status_data.get("status") != "on":
+            return False
+
+        config = status_data.get("config") or {}
+        x_travel = config.get("x_travel")
+        y_travel = config.get("y_travel")
+        if job.width_in is not None and x_travel and y_travel:
+            if job.width_in > x_travel or job.height_in > y_travel:
+                return False
+
+        for key in ("tool", "media"):
+            loaded_value = device.loadout.get(key)
+            requested_value = job.options.get(key)
+            if is_unspecified(loaded_value) or is_unspecified(requested_value):
+                continue
+            if loaded_value != requested_value:
+                return False
+
+        return True
+
+    def dispatch(self):
+        """Start the best pending job on every idle plotter that can run one.
+
+        Called from request handlers and job threads, so a failure is logged and
+        never raised to the caller.
+        """
+        try:
+            self.drop_missing_files()
+        except Exception as error:
+            logger.error("Queue check for deleted files failed: %s", error)
+        policy = SCHEDULING_POLICIES[self.policy_name]
+
+        for device in self.registry.all_devices():
+            try:
+                self.dispatch_to_device(device, policy)
+            except Exception:
+                logger.exception("Queue dispatch to %s failed", device.name)
+
+    def dispatch_to_device(self, device, policy):
+        """Start the best pending job on one plotter if it is idle and can run one."""
+        with self.lock:
+            if not self.pending or device.name in self.running:
+                return
+            pending_jobs = list(self.pending)
+
+        if not device.is_idle():
+            return
+
+        candidates = policy(pending_jobs, device, self.estimate_lookup)
+
+        selected_job = None
+        for job in candidates:
+            if self.device_can_run(device, job):
+                selected_job = job
+                break
+
+        if selected_job is None or not device.sem.acquire(blocking=False):
+            return
+
+        with self.lock:
+            if selected_job not in self.pending:
+                device.sem.release()
+                return
+            self.pending.remove(selected_job)
+            selected_job.status = "running"
+            selected_job.device = device.name
+            selected_job.started_at = int(time.time())
+            self.running[device.name] = selected_job
+
+        try:
+            threading.Thread(
+                target=self.run_on_device,
+                args=(device, selected_job),
+                name=f"plot-job-{selected_job.id}",
+                daemon=True,
+            ).start()
+        except Exception:
+            with self.lock:
+                self.running.pop(device.name, None)
+                selected_job.status = "queued"
+                selected_job.device = None
+                selected_job.started_at = None
+                self.pending.insert(0, selected_job)
+            device.sem.release()
+            raise
+
+    def run_on_device(self, device, job):
+        """Run one job while holding the device Semaphore, then dispatch the next."""
+        try:
+            job.result = self.run_job(device, job)
+            job.status = "done"
+        except Exception as error:
+            logger.error("Queued plot job %s failed on %s: %s", job.id, device.name, error)
+            job.error = str(error)
+            job.status = "error"
+        finally:
+            job.completed_at = int(time.time())
+            device.sem.release()
+            with self.lock:
+                self.running.pop(device.name, None)
+                self.remember_finished(job)
+
+        self.dispatch()
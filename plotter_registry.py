@@ -0,0 +1,184 @@
+from concurrent.futures import ThreadPoolExecutor
+import contextvars
+import logging
+import threading
+
+from plotter_status import PlotterStatusService
+from request_profiler import run_profiled
+
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_DEVICE_NAME = "default"
+DEVICE_LIST_STATE_KEY = "devices"
+
+
+def device_state_key(device_name, kind):
+    """Return the state store key for one kind of per-device state (runtime or status)."""
+    return f"device:{device_name}:{kind}"
+
+
+def build_initial_runtime_state():
+    """Return the plot state of a plotter that has not plotted yet."""
+    return {
+        "is_plotting": False,
+        "stop_requested": False,
+        "last_stop": {
+            "requested_at": None,
+            "success": None,
+            "servo_state": "unknown",
+        },
+    }
+
+
+class PlotterDevice:
+    def __init__(self, name, port, axidraw_factory, state_store):
+        """Create the per-plotter AxiDraw instances, lock, worker and status cache."""
+        self.name = name
+        self.port = port
+        self.ad = axidraw_factory()
+        self.status_ad = axidraw_factory()
+        self.sem = threading.Semaphore()
+        self.state_store = state_store
+        self.runtime_state_key = device_state_key(name, "runtime")
+        self.status_service = PlotterStatusService(
+            self.status_ad,
+            self.sem,
+            port=port,
+            state_store=state_store,
+            state_key=device_state_key(name, "status"),
+        )
+        self.worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix=f"plotter-{name}")
+        self.loadout = {"tool": None, "media": None}
+        self.last_tool = None
+        # PlotHalt of the running plot, used by stop requests to halt it between moves
+        self.halt = None
+        # EditionRun pacing the copies of a running edition run
+        self.edition_run = None
+        self.state_lock = threading.Lock()
+        self.state_store.set(self.runtime_state_key, build_initial_runtime_state())
+
+    def run(self, func, *args, **kwargs):
+        """Run a hardware call on this device's worker thread and wait for its result.
+
+        The caller's context (its log request ID and any active profile) is carried onto the worker.
+        """
+        context = contextvars.copy_context()
+        return self.worker.submit(context.run, run_profiled, func, *args, **kwargs).result()
+
+    def get_model_number(self):
+        """Return the plotter's cached model, detecting it on this device's worker when unknown."""
+        model_number = self.status_service.model_number
+        if model_number is None:
+            model_number = self.run(self.status_service.detect_connected_model_number)
+        return model_number
+
+    def invalidate_model(self):
+        """Forget the detected model and status, e.g. after rediscovery or a connection error."""
+        self.status_service.invalidate()
+
+    def set_loadout(self, tool=None, media=None):
+        """Record the tool and media the operator has loaded; None means unspecified."""
+        self.loadout = {"tool": tool or None, "media": media or None}
+
+    def get_runtime_state(self):
+        """Return a copy of this device's plot state from the state store."""
+        return self.state_store.get(self.runtime_state_key) or build_initial_runtime_state()
+
+    def update_runtime_state(self, **fields):
+        """Merge fields into this device's plot state in the state store."""
+        with self.state_lock:
+            runtime_state = self.get_runtime_state()
+            runtime_state.update(fields)
+            self.state_store.set(self.runtime_state_key, runtime_state)
+
+    def is_idle(self):
+        """Return True when no plot is running on this device."""
+        return not self.get_runtime_state()["is_plotting"]
+
+    def describe(self):
+        """Return a small serializable summary of the device for API listings."""
+        return {
+            "name": self.name,
+            "port": self.port,
+            "is_plotting": not self.is_idle(),
+            "loadout": dict(self.loadout),
+        }
+
+
+class PlotterRegistry:
+    def __init__(self, axidraw_factory, state_store):
+        """Track connected plotters by name; discovery runs lazily on first lookup."""
+        self.axidraw_factory = axidraw_factory
+        self.state_store = state_store
+        self.devices = {}
+        self.lock = threading.Lock()
+        self.discovered = False
+
+    def list_connected_names(self):
+        """Enumerate connected AxiDraw nicknames (or port paths) with list_names."""
+        probe_ad = self.axidraw_factory()
+        probe_ad.plot_setup()
+        probe_ad.options.mode = "manual"
+        probe_ad.options.manual_cmd = "list_names"
+        probe_ad.plot_run()
+        return list(probe_ad.name_list or [])
+
+    def discover(self):
+        """Register a device for each connected plotter, keeping devices already known.
+
+        Discovery is skipped while any device is plotting because enumerating the
+        USB ports would talk to the busy machine.
+        """
+        with self.lock:
+            if any(not device.is_idle() for device in self.devices.values()):
+                return list(self.devices.values())
+
+            try:
+                names = self.list_connected_names()
+            except Exception as error:
+                logger.warning("AxiDraw discovery failed: %s", error)
+                names = []
+
+            # Plotters may have been swapped or renamed on the same port
+            for device in self.devices.values():
+                device.invalidate_model()
+
+            for name in names:
+                if name not in self.devices:
+                    self.devices[name] = PlotterDevice(name, name, self.axidraw_factory, self.state_store)
+
+            if names and DEFAULT_DEVICE_NAME in self.devices and DEFAULT_DEVICE_NAME not in names:
+                del self.devices[DEFAULT_DEVICE_NAME]
+
+            if not self.devices:
+                # No named machines were found; keep a single unpinned device so the
+                # server behaves like the original single-plotter setup.
+                self.devices[DEFAULT_DEVICE_NAME] = PlotterDevice(
+                    DEFAULT_DEVICE_NAME,
+                    None,
+                    self.axidraw_factory,
+                    self.state_store,
+                )
+
+            self.state_store.set(DEVICE_LIST_STATE_KEY, list(self.devices))
+            self.discovered = True
+            return list(self.devices.values())
+
+    def all_devices(self):
+        """Return every registered device, discovering plotters on first use."""
+        if not self.discovered:
+            self.discover()
+
+        with self.lock:
+            return list(self.devices.values())
+
+    def get_device(self, name=None):
+        """Return the named device, the first registered device when unnamed, or None."""
+        devices = self.all_devices()
+        if not name:
+            return devices[0] if devices else None
+
+        with self.lock:
+            return self.devices.get(name)
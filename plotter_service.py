@@ -1,11 +1,207 @@
-from contextlib import redirect_stderr, redirect_stdout
+from contextlib import contextmanager
 import io
+import sys
+import threading
+import time
 
+from plot_metrics import PlotMetrics, collect_plot_metrics, collect_preview_metrics
 
-def plot(ad, filepath, layer=0, model_number=4):
-    """Plot an SVG file, optionally restricted to a single numbered layer."""
-    output_buffer = io.StringIO()
-    lifts_value = 0
+
+# Console output kept for the older-API report parser; the report is printed last
+REPORT_TAIL_CHARS = 16 * 1024
+# Metrics of a plot skipped because a stop arrived during setup
+EMPTY_PLOT_METRICS = PlotMetrics(plot_duration=0, plot_path=0.0, plot_travel=0.0, lifts=0)
+
+
+class PlotHalt:
+    def __init__(self, model_number=None):
+        """Coordinate a cooperative stop between a stop request and the plotting thread."""
+        self.model_number = model_number
+        self.requested = threading.Event()
+        self.halted = threading.Event()
+        self.requested_at = None
+        self.halted_at = None
+        self.stopped_code = 0
+        self.position = None
+        self.resume_svg = None
+        self.motors_disabled = False
+
+    def request(self, ad):
+        """Ask the plot running on ``ad`` to stop after its current move.
+
+        transmit_pause_request is the AxiDraw API's thread-safe pause signal; the
+        plot raises the pen over its own open connection. Returns False when the
+        installed API has no such signal.
+        """
+        transmit_pause_request = getattr(ad, 'transmit_pause_request', None)
+        if transmit_pause_request is None:
+            return False
+        self.requested_at = time.perf_counter()
+        self.requested.set()
+        transmit_pause_request()
+        return True
+
+    def record(self, ad, output_svg=None):
+        """Note how and where the plot ended; called on the plotting thread as plot_run returns.
+
+        When the plot was paused, ``output_svg`` (plot_run's output document, which
+        carries the progress data) is kept so the plot can be resumed with res_plot.
+        """
+        self.halted_at = time.perf_counter()
+        self.stopped_code = int(getattr(getattr(ad, 'plot_status', None), 'stopped', 0) or 0)
+        self.position = get_pen_position(ad)
+        if self.stopped_code and output_svg:
+            self.resume_svg = output_svg
+
+    def finish(self, motors_disabled):
+        """Mark the plot as ended once it has tried to disable the motors."""
+        self.motors_disabled = motors_disabled
+        self.halted.set()
+
+    def wait(self, timeout):
+        """Wait for the plotting thread to acknowledge the stop; True once the motors were handled."""
+        return self.halted.wait(timeout)
+
+    def get_time_to_pen_up_ms(self):
+        """Return milliseconds from the stop request to the halted plot, if both happened."""
+        if self.requested_at is None or self.halted_at is None:
+            return None
+        return round(max(0.0, self.halted_at - self.requested_at) * 1000, 2)
+
+    def describe(self):
+        """Return a serializable summary of the halt for stop results and plot logs."""
+        return {
+            'stopped_code': self.stopped_code,
+            'position': self.position,
+            'time_to_pen_up_ms': self.get_time_to_pen_up_ms(),
+        }
+
+
+class EditionRun:
+    def __init__(self, confirm=False, pause_seconds=0.0, confirm_timeout=None):
+        """Pace the copies of an edition run: wait a fixed pause or for the operator between them."""
+        self.confirm = confirm
+        self.pause_seconds = pause_seconds
+        self.confirm_timeout = confirm_timeout
+        self.next_requested = threading.Event()
+        self.cancelled = threading.Event()
+        self.waiting_for = None
+
+    def wait_for_next(self, edition):
+        """Block until the next copy may start; False when the run was cancelled or timed out."""
+        self.waiting_for = edition
+        try:
+            if self.confirm:
+                self.next_requested.wait(self.confirm_timeout)
+                confirmed = self.next_requested.is_set()
+                self.next_requested.clear()
+                return confirmed and not self.cancelled.is_set()
+            return not self.cancelled.wait(self.pause_seconds)
+        finally:
+            self.waiting_for = None
+
+    def advance(self):
+        """Confirm the paper has been changed; False when no copy is waiting."""
+        if self.waiting_for is None:
+            return False
+        self.next_requested.set()
+        return True
+
+    def cancel(self):
+        """End the run before its next copy."""
+        self.cancelled.set()
+        self.next_requested.set()
+
+
+class OutputTail(io.TextIOBase):
+    def __init__(self, max_chars=REPORT_TAIL_CHARS):
+        """Capture console output, keeping only its end so long plots do not grow a buffer."""
+        self.max_chars = max_chars
+        self.text = ''
+
+    def writable(self):
+        """Accept writes like a text stream."""
+        return True
+
+    def write(self, text):
+        """Append text and drop anything beyond the last ``max_chars`` characters."""
+        self.text = (self.text + text)[-self.max_chars:]
+        return len(text)
+
+    def getvalue(self):
+        """Return the captured tail."""
+        return self.text
+
+
+class ThreadOutputDispatcher:
+    def __init__(self, stream):
+        """Stand in for sys.stdout/sys.stderr, sending each thread's writes to its own capture.
+
+        Threads without a capture write to the wrapped stream, so plots on other
+        devices and unrelated prints are never mixed into a plot's report.
+        """
+        self.stream = stream
+
+    def write(self, text):
+        """Write to the current thread's capture, or through to the wrapped stream."""
+        capture = getattr(thread_output, 'capture', None)
+        return (capture if capture is not None else self.stream).write(text)
+
+    def flush(self):
+        """Flush the wrapped stream; captures keep everything in memory."""
+        if getattr(thread_output, 'capture', None) is None:
+            self.stream.flush()
+
+    def __getattr__(self, name):
+        """Delegate everything else (encoding, fileno, isatty) to the wrapped stream."""
+        return getattr(self.stream, name)
+
+
+thread_output = threading.local()
+dispatcher_lock = threading.Lock()
+
+
+def install_output_dispatchers():
+    """Wrap sys.stdout and sys.stderr once; also rewraps streams replaced since."""
+    with dispatcher_lock:
+        for name in ('stdout', 'stderr'):
+            stream = getattr(sys, name)
+            if not isinstance(stream, ThreadOutputDispatcher):
+                setattr(sys, name, ThreadOutputDispatcher(stream))
+
+
+@contextmanager
+def capture_thread_output(capture):
+    """Send this thread's stdout and stderr to ``capture`` (redirect_stdout is process-wide)."""
+    install_output_dispatchers()
+    previous = getattr(thread_output, 'capture', None)
+    thread_output.capture = capture
+    try:
+        yield capture
+    finally:
+        thread_output.capture = previous
+
+
+def get_pen_position(ad):
+    """Return the carriage position (inches from home) the AxiDraw API tracks, if exposed."""
+    physical = getattr(getattr(ad, 'pen', None), 'phys', None)
+    x_position = getattr(physical, 'xpos', None)
+    y_position = getattr(physical, 'ypos', None)
+    if x_position is None or y_position is None:
+        return None
+    return {'x': round(float(x_position), 4), 'y': round(float(y_position), 4), 'units': 'in'}
+
+
+def plot(ad, filepath, layer=0, model_number=4, port=None, halt=None, resume_svg=None):
+    """Plot an SVG file, optionally restricted to a single numbered layer.
+
+    A ``halt`` (PlotHalt) lets another thread stop the plot between moves.
+    ``resume_svg`` is the output SVG of a halted plot; it is continued in
+    res_plot mode from where it stopped instead of plotting ``filepath``.
+    Returns the plot's PlotMetrics, or None when the API reported none.
+    """
+    output_tail = OutputTail()
+    plot_metrics = None
     previous_mode = getattr(ad.options, 'mode', None)
     previous_layer = getattr(ad.options, 'layer', None)
     previous_model = getattr(ad.options, 'model', None)
@@ -13,27 +209,27 @@ def plot(ad, filepath, layer=0, model_number=4):
     previous_report_lifts = getattr(ad.options, 'report_lifts', False)
 
     try:
-        with redirect_stdout(output_buffer), redirect_stderr(output_buffer):
+        with capture_thread_output(output_tail):
+            ad.plot_setup(resume_svg or filepath)
+            # plot_setup resets the options, so the model is set after it
             ad.options.model = model_number
-            ad.plot_setup(filepath)
-            ad.options.mode = "plot"
-            ad.options.auto_rotate = False
-            ad.options.reordering = 0
-            ad.options.check_limits = True
-            ad.options.clip_to_page = True
-            ad.options.report_time = True
-            ad.options.report_lifts = True
+            if port is not None:
+                ad.options.port = port
+            # res_plot takes the layer from the progress data saved in the document
+            configure_plot_options(ad, 0 if resume_svg else layer)
+            if resume_svg:
+                ad.options.mode = "res_plot"
 
-            if layer > 0:
-                ad.options.mode = "layers"
-                ad.options.layer = layer
+            # A stop that arrived during setup skips the plot entirely
+            output_svg = None
+            plot_metrics = EMPTY_PLOT_METRICS
+            if halt is None or not halt.requested.is_set():
+                output_svg = ad.plot_run(halt is not None)
+                plot_metrics = collect_plot_metrics(ad, output_tail.getvalue())
+            if halt is not None:
+                halt.record(ad, output_svg)
 
-            ad.plot_run()
-            lifts_value = int(getattr(ad, 'pen_lifts', 0) or 0)
-
-            ad.options.mode = "manual"
-            ad.options.manual_cmd = "disable_xy"
-            ad.plot_run()
+            disable_motors(ad, halt)
     finally:
         ad.options.report_time = previous_report_time
         ad.options.report_lifts = previous_report_lifts
@@ -44,19 +240,101 @@ def plot(ad, filepath, layer=0, model_number=4):
         if previous_model is not None:
             ad.options.model = previous_model
 
-    output = output_buffer.getvalue().strip()
-    if not output:
-        output = 'Plot completed with no output.'
+    return plot_metrics
+
+
+def disable_motors(ad, halt=None):
+    """Disable the XY motors, then tell ``halt`` whether it worked so a stop reports the real result."""
+    ad.options.mode = "manual"
+    ad.options.manual_cmd = "disable_xy"
+    try:
+        ad.plot_run()
+    except Exception:
+        if halt is not None:
+            halt.finish(False)
+        raise
+    if halt is not None:
+        halt.finish(True)
+
 
-    if 'pen lift' not in output.lower():
-        output = f"{output}\nNumber of pen lifts: {lifts_value}" if output else f"Number of pen lifts: {lifts_value}"
+def configure_plot_options(ad, layer=0):
+    """Set the plot options shared by single plots and edition runs."""
+    ad.options.mode = "plot"
+    ad.options.auto_rotate = False
+    ad.options.reordering = 0
+    ad.options.check_limits = True
+    ad.options.clip_to_page = True
+    ad.options.report_time = True
+    ad.options.report_lifts = True
 
-    return output
+    if layer > 0:
+        ad.options.mode = "layers"
+        ad.options.layer = layer
 
 
-def preview_plot(ad, filepath, layer=0, model_number=4):
-    """Run a preview pass and return the captured AxiDraw output text."""
-    output_buffer = io.StringIO()
+def plot_editions(ad, filepath, first_edition, editions, layer=0, model_number=4, port=None,
+                  start_edition=None, finish_edition=None):
+    """Plot copies ``first_edition``..``editions`` of an SVG from a single plot_setup.
+
+    The document is read and parsed once and every copy is plotted from it.
+    ``start_edition(edition)`` is called before each copy (it waits for the paper
+    change) and returns the copy's PlotHalt, or None to end the run early.
+    ``finish_edition(edition, plot_metrics, halt)`` receives each copy's PlotMetrics.
+    A stopped copy ends the run, whether it was asked to stop or halted on its own.
+    """
+    previous_mode = getattr(ad.options, 'mode', None)
+    previous_layer = getattr(ad.options, 'layer', None)
+    previous_model = getattr(ad.options, 'model', None)
+    previous_report_time = getattr(ad.options, 'report_time', False)
+    previous_report_lifts = getattr(ad.options, 'report_lifts', False)
+    output_tail = OutputTail()
+    plotted = 0
+
+    try:
+        with capture_thread_output(output_tail):
+            ad.plot_setup(filepath)
+            ad.options.model = model_number
+            if port is not None:
+                ad.options.port = port
+
+        halt = None
+        for edition in range(first_edition, editions + 1):
+            halt = start_edition(edition)
+            if halt is None:
+                break
+
+            output_tail = OutputTail()
+            with capture_thread_output(output_tail):
+                configure_plot_options(ad, layer)
+                output_svg = None
+                plot_metrics = EMPTY_PLOT_METRICS
+                if not halt.requested.is_set():
+                    output_svg = ad.plot_run(True)
+                    plot_metrics = collect_plot_metrics(ad, output_tail.getvalue())
+                halt.record(ad, output_svg)
+            plotted += 1
+            finish_edition(edition, plot_metrics, halt)
+            if halt.requested.is_set() or halt.stopped_code:
+                break
+
+        with capture_thread_output(output_tail):
+            disable_motors(ad, halt)
+    finally:
+        ad.options.report_time = previous_report_time
+        ad.options.report_lifts = previous_report_lifts
+        if previous_mode is not None:
+            ad.options.mode = previous_mode
+        if previous_layer is not None:
+            ad.options.layer = previous_layer
+        if previous_model is not None:
+            ad.options.model = previous_model
+
+    return plotted
+
+
+def preview_plot(ad, filepath, layer=0, model_number=4, port=None):
+    """Run a preview pass and return its estimate as PlotMetrics."""
+    output_tail = OutputTail()
     previous_preview = getattr(ad.options, 'preview', False)
     previous_report_time = getattr(ad.options, 'report_time', False)
     previous_mode = getattr(ad.options, 'mode', None)
@@ -64,15 +342,18 @@ def preview_plot(ad, filepath, layer=0, model_number=4):
     previous_model = getattr(ad.options, 'model', None)
 
     try:
-        with redirect_stdout(output_buffer), redirect_stderr(output_buffer):
-            ad.options.model = model_number
+        with capture_thread_output(output_tail):
             ad.plot_setup(filepath)
+            ad.options.model = model_number
+            if port is not None:
+                ad.options.port = port
             if layer > 0:
                 ad.options.mode = "layers"
                 ad.options.layer = layer
             ad.options.preview = True
             ad.options.report_time = True
             ad.plot_run()
+            preview_metrics = collect_preview_metrics(ad, output_tail.getvalue())
     finally:
         ad.options.preview = previous_preview
         ad.options.report_time = previous_report_time
@@ -83,22 +364,20 @@ def preview_plot(ad, filepath, layer=0, model_number=4):
         if previous_model is not None:
             ad.options.model = previous_model
 
-    output = output_buffer.getvalue().strip()
-    if not output:
-        output = 'Preview completed with no output.'
-
-    return output
+    return preview_metrics
 
 
-def toggle_servo(ad, model_number=4):
+def toggle_servo(ad, model_number=4, port=None):
     """Toggle the AxiDraw pen servo using the utility toggle mode."""
     previous_mode = getattr(ad.options, 'mode', None)
     previous_preview = getattr(ad.options, 'preview', False)
     previous_model = getattr(ad.options, 'model', None)
 
     try:
-        ad.options.model = model_number
         ad.plot_setup()
+        ad.options.model = model_number
+        if port is not None:
+            ad.options.port = port
         ad.options.preview = False
         ad.options.mode = "toggle"
         ad.plot_run()
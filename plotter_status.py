@@ -1,14 +1,25 @@
 import importlib.util
+import logging
 import os
 
+from metrics import record_cache_lookup, time_operation
+
+
+logger = logging.getLogger(__name__)
+
 
 class PlotterStatusService:
-    def __init__(self, ad, sem):
+    def __init__(self, ad, sem, port=None, state_store=None, state_key=None):
         """Store shared plotter dependencies and initialize cached status state."""
         self.ad = ad
         self.sem = sem
+        self.port = port
+        self.state_store = state_store
+        self.state_key = state_key
         self.device_cache = {}
         self.last_usb_id = None
+        # Model detected from the connected plotter; None until detected or after invalidate()
+        self.model_number = None
         self.last_known_status = {
             "status": "off",
             "machine": "none",
@@ -17,6 +28,16 @@ class PlotterStatusService:
             "config": {},
         }
 
+    def publish_status(self):
+        """Mirror the latest status snapshot into the shared state store, if configured."""
+        if self.state_store is not None and self.state_key:
+            self.state_store.set(self.state_key, self.last_known_status)
+
+    def invalidate(self):
+        """Forget the cached status and model so the next lookup queries the plotter again."""
+        self.device_cache.clear()
+        self.model_number = None
+
     def get_default_model_number(self):
         """Return the configured fallback model number."""
         return int(os.environ.get("AXIDRAW_MODEL", "4"))
@@ -44,10 +65,12 @@ class PlotterStatusService:
         if "/dev/" in device_identifier or "COM" in device_identifier:
             machine_type = "AxiDraw (No nickname assigned)"
             machine_model = self.get_default_model_number()
-            print(f"  Device uses port path: {device_identifier}")
-            print(f"  Using default model: {machine_model}")
-            print("  To identify machine type, assign a nickname using:")
-            print("  axicli -m manual -M write_nameYourNicknameHere")
+            logger.debug(
+                "Device uses port path %s; using default model %s. To identify the machine type, "
+                "assign a nickname with: axicli -m manual -M write_nameYourNicknameHere",
+                device_identifier,
+                machine_model,
+            )
             return machine_type, machine_model
 
         nickname = device_identifier.lower()
@@ -74,30 +97,52 @@ class PlotterStatusService:
             machine_type = f"AxiDraw ({device_identifier})"
             machine_model = self.get_default_model_number()
 
-        print(f"  Device nickname: {device_identifier}")
-        print(f"  Detected machine type: {machine_type}")
-        print(f"  Model number: {machine_model}")
+        logger.debug(
+            "Device nickname %s detected as %s (model %s)",
+            device_identifier,
+            machine_type,
+            machine_model,
+        )
         return machine_type, machine_model
 
-    def detect_connected_model_number(self):
-        """Query the connected AxiDraw name list and infer the active model number."""
+    def select_device_identifier(self, axidraw_list):
+        """Pick this service's device from a name list, or the first one when unpinned."""
+        if axidraw_list is None or len(axidraw_list) == 0:
+            return None
+
+        if self.port is None:
+            return axidraw_list[0]
+
+        if self.port in axidraw_list:
+            return self.port
+
+        return None
+
+    def list_connected_names(self):
+        """Run the AxiDraw list_names utility command and return the reported names."""
         self.ad.plot_setup()
         self.ad.options.mode = "manual"
         self.ad.options.manual_cmd = "list_names"
         self.ad.plot_run()
-        axidraw_list = self.ad.name_list
+        return self.ad.name_list
 
-        print(f"Debug - axidraw_list type: {type(axidraw_list)}")
-        print(f"Debug - axidraw_list: {axidraw_list}")
+    def detect_connected_model_number(self):
+        """Query the connected AxiDraw name list and infer the active model number."""
+        with time_operation('detect_connected_model_number'):
+            axidraw_list = self.list_connected_names()
+
+        logger.debug("AxiDraw name list: %r", axidraw_list)
 
-        if axidraw_list is not None and len(axidraw_list) > 0:
-            device_identifier = axidraw_list[0]
-            print(f"Debug - device_identifier: '{device_identifier}'")
+        device_identifier = self.select_device_identifier(axidraw_list)
+        if device_identifier is not None:
+            logger.debug("Selected device identifier: %r", device_identifier)
             self.last_usb_id = device_identifier
             machine_type, machine_model = self.identify_machine(device_identifier)
             self.last_known_status["machine"] = machine_type
             self.last_known_status["device_info"] = device_identifier
             self.last_known_status["model_number"] = machine_model
+            self.model_number = machine_model
+            self.publish_status()
             return machine_model
 
         return self.get_default_model_number()
@@ -177,7 +222,7 @@ class PlotterStatusService:
             return config_data
 
         except Exception as error:
-            print(f"Error loading config from {config_path}: {error}")
+            logger.warning("Error loading config from %s: %s", config_path, error)
             return {}
 
     def get_plotter_status(self):
@@ -196,24 +241,22 @@ class PlotterStatusService:
             return status_data
 
         try:
-            if self.last_usb_id and self.last_usb_id in self.device_cache:
+            cache_hit = bool(self.last_usb_id and self.last_usb_id in self.device_cache)
+            record_cache_lookup('device_status', cache_hit)
+            if cache_hit:
                 cached = self.device_cache[self.last_usb_id]
                 status_data = cached.copy()
                 status_data["status"] = cached.get("status", "on")
                 return status_data
 
-            self.ad.plot_setup()
-            self.ad.options.mode = "manual"
-            self.ad.options.manual_cmd = "list_names"
-            self.ad.plot_run()
-            axidraw_list = self.ad.name_list
+            with time_operation('usb_list_names'):
+                axidraw_list = self.list_connected_names()
 
-            print(f"Debug - axidraw_list type: {type(axidraw_list)}")
-            print(f"Debug - axidraw_list: {axidraw_list}")
+            logger.debug("AxiDraw name list: %r", axidraw_list)
 
-            if axidraw_list is not None and len(axidraw_list) > 0:
-                device_identifier = axidraw_list[0]
-                print(f"Debug - device_identifier: '{device_identifier}'")
+            device_identifier = self.select_device_identifier(axidraw_list)
+            if device_identifier is not None:
+                logger.debug("Selected device identifier: %r", device_identifier)
                 status_data["device_info"] = device_identifier
                 self.last_usb_id = device_identifier
 
@@ -221,12 +264,13 @@ class PlotterStatusService:
 
                 status_data["machine"] = machine_type
                 status_data["model_number"] = machine_model
+                self.model_number = machine_model
 
                 config_env_key = f"AXIDRAW_MODEL_{machine_model}_CONFIG"
                 config_path = os.environ.get(config_env_key)
 
                 if config_path:
-                    print(f"  Loading config from: {config_path}")
+                    logger.debug("Loading config from %s", config_path)
                     config_data = self.load_axidraw_config(config_path)
 
                     if machine_model == 1:
@@ -254,37 +298,44 @@ class PlotterStatusService:
                     status_data["config"] = config_data
                     status_data["config"]["config_file"] = config_path
                 else:
-                    print(f"  No config file found for model {machine_model} (env var: {config_env_key})")
+                    logger.debug("No config file found for model %s (env var: %s)", machine_model, config_env_key)
                     status_data["config"]["config_file"] = None
 
-                self.ad.interactive()
-                if self.ad.connect():
-                    try:
-                        raw_string = self.ad.usb_query('QC\r')
-                        if isinstance(raw_string, bytes):
-                            raw_string = raw_string.decode("utf-8", errors="ignore")
-                        if not raw_string:
-                            raise ValueError("No QC response from plotter")
-
-                        split_string = raw_string.split(",", 1)
-                        voltage_value = int(split_string[1])
-                        if voltage_value >= 250:
-                            status_data["status"] = "on"
-                        else:
+                with time_operation('usb_status_query'):
+                    self.ad.interactive()
+                    if self.port is not None:
+                        self.ad.options.port = self.port
+                    if self.ad.connect():
+                        try:
+                            raw_string = self.ad.usb_query('QC\r')
+                            if isinstance(raw_string, bytes):
+                                raw_string = raw_string.decode("utf-8", errors="ignore")
+                            if not raw_string:
+                                raise ValueError("No QC response from plotter")
+
+                            split_string = raw_string.split(",", 1)
+                            voltage_value = int(split_string[1])
+                            if voltage_value >= 250:
+                                status_data["status"] = "on"
+                            else:
+                                status_data["status"] = "connected"
+
+                            status_data["voltage"] = voltage_value
+                        except (ValueError, IndexError):
                             status_data["status"] = "connected"
 
-                        status_data["voltage"] = voltage_value
-                    except (ValueError, IndexError):
-                        status_data["status"] = "connected"
-
-                    self.ad.options.mode = "manual"
-                    self.ad.options.manual_cmd = "disable_xy"
-                    self.ad.plot_run()
-                    self.ad.disconnect()
+                        self.ad.options.mode = "manual"
+                        self.ad.options.manual_cmd = "disable_xy"
+                        self.ad.plot_run()
+                        self.ad.disconnect()
 
             self.last_known_status = status_data.copy()
-            if self.last_usb_id:
+            if status_data["status"] == "off":
+                # Not connected: query again next time instead of caching the failure
+                self.invalidate()
+            elif self.last_usb_id:
                 self.device_cache[self.last_usb_id] = status_data.copy()
+            self.publish_status()
 
             return status_data
         finally:
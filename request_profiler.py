@@ -0,0 +1,199 @@
+import contextvars
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import random
+import re
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = 'X-Profile'
+PROFILE_QUERY_PARAM = 'profile'
+PROFILE_ID_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-zA-Z_-]+$')
+DEFAULT_PROFILE_RETENTION = 50
+PROFILE_TEXT_LIMIT = 60
+
+# Profile session of the request being handled, copied into plotter worker threads
+profile_session_var = contextvars.ContextVar('profile_session', default=None)
+
+
+class ProfileSession:
+    def __init__(self, reason):
+        """Collect the profilers of one request: its own thread plus any worker calls."""
+        self.reason = reason
+        self.started_at = time.time()
+        self.request_profiler = cProfile.Profile()
+        self.worker_profilers = []
+        self.lock = threading.Lock()
+        self.token = None
+
+    def add_worker_profiler(self, profiler):
+        """Keep a profiler that ran on another thread for this request."""
+        with self.lock:
+            self.worker_profilers.append(profiler)
+
+    def build_stats(self):
+        """Merge the request thread and worker thread profiles into one Stats object."""
+        stats = None
+        for profiler in [self.request_profiler] + self.worker_profilers:
+            try:
+                if stats is None:
+                    stats = pstats.Stats(profiler)
+                else:
+                    stats.add(profiler)
+            except TypeError:
+                # A profiler that recorded no calls cannot be loaded into Stats
+                continue
+        return stats
+
+
+def run_profiled(func, *args, **kwargs):
+    """Run a hardware call, profiling it when the calling request is being profiled.
+
+    cProfile only sees the thread it is enabled on, so plotter worker calls (where
+    pyaxidraw runs) are profiled separately and merged into the request's profile.
+    """
+    session = profile_session_var.get()
+    if session is None:
+        return func(*args, **kwargs)
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Python 3.12+ allows one active profiler, which already sees every thread
+        return func(*args, **kwargs)
+
+    try:
+        return func(*args, **kwargs)
+    finally:
+        profiler.disable()
+        session.add_worker_profiler(profiler)
+
+
+class RequestProfiler:
+    def __init__(self, profile_dir):
+        """Read the profiling settings; profiling stays off unless PLOT_PROFILING or sampling is set."""
+        self.profile_dir = os.environ.get('PLOT_PROFILE_DIR', profile_dir)
+        self.on_demand = os.environ.get('PLOT_PROFILING', '').lower() in ('1', 'true', 'yes', 'on')
+        self.sample_percent = float(os.environ.get('PLOT_PROFILE_SAMPLE_PERCENT', '0'))
+        self.retention = int(os.environ.get('PLOT_PROFILE_RETENTION', str(DEFAULT_PROFILE_RETENTION)))
+        # Only one request is profiled at a time so profiling never piles up under load
+        self.active_lock = threading.Lock()
+
+    def should_profile(self, flask_request):
+        """Return why this request should be profiled, or None to skip profiling."""
+        if self.on_demand:
+            requested = flask_request.headers.get(PROFILE_HEADER) or flask_request.args.get(PROFILE_QUERY_PARAM)
+            if requested and requested.lower() not in ('0', 'false', 'no', 'off'):
+                return 'requested'
+
+        if self.sample_percent > 0 and random.random() * 100 < self.sample_percent:
+            return 'sampled'
+
+        return None
+
+    def start(self, reason):
+        """Start profiling the current request, or return None if another profile is running."""
+        if not self.active_lock.acquire(blocking=False):
+            logger.debug("Skipping profile; another request is being profiled")
+            return None
+
+        session = ProfileSession(reason)
+        try:
+            session.request_profiler.enable()
+        except ValueError as error:
+            self.active_lock.release()
+            logger.warning("Unable to start profiler: %s", error)
+            return None
+
+        session.token = profile_session_var.set(session)
+        return session
+
+    def stop(self, session):
+        """Stop profiling without saving, e.g. when the request failed before finishing."""
+        if session.token is None:
+            return
+        session.request_profiler.disable()
+        profile_session_var.reset(session.token)
+        session.token = None
+        self.active_lock.release()
+
+    def finish(self, session, metadata):
+        """Stop profiling and store the merged profile with its request metadata."""
+        self.stop(session)
+        stats = session.build_stats()
+        if stats is None:
+            return None
+
+        started_at = time.strftime('%Y%m%d-%H%M%S', time.localtime(session.started_at))
+        profile_id = f"{started_at}-{metadata.get('request_id')}"
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            profile_id = f"{started_at}-{int(session.started_at * 1000)}"
+        metadata = dict(metadata, id=profile_id, reason=session.reason, created_at=int(session.started_at))
+
+        try:
+            os.makedirs(self.profile_dir, exist_ok=True)
+            stats.dump_stats(os.path.join(self.profile_dir, f"{profile_id}.prof"))
+            with open(os.path.join(self.profile_dir, f"{profile_id}.json"), 'w', encoding='utf-8') as metadata_file:
+                json.dump(metadata, metadata_file)
+            self.prune()
+        except OSError as error:
+            logger.warning("Failed to store profile %s: %s", profile_id, error)
+            return None
+
+        logger.info("Stored request profile %s", profile_id, extra={'fields': {
+            'path': metadata.get('path'),
+            'duration_ms': metadata.get('duration_ms'),
+        }})
+        return profile_id
+
+    def list_profiles(self):
+        """Return stored profile metadata, newest first."""
+        if not os.path.isdir(self.profile_dir):
+            return []
+
+        profiles = []
+        for filename in os.listdir(self.profile_dir):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(self.profile_dir, filename), encoding='utf-8') as metadata_file:
+                    profiles.append(json.load(metadata_file))
+            except (OSError, json.JSONDecodeError):
+                continue
+        profiles.sort(key=lambda profile: (profile.get('created_at', 0), profile.get('id', '')), reverse=True)
+        return profiles
+
+    def prune(self):
+        """Delete the oldest profiles beyond the retention limit."""
+        profile_files = sorted(
+            (os.path.getmtime(os.path.join(self.profile_dir, filename)), filename[:-len('.prof')])
+            for filename in os.listdir(self.profile_dir)
+            if filename.endswith('.prof')
+        )
+        for _, profile_id in profile_files[:max(0, len(profile_files) - self.retention)]:
+            for extension in ('.prof', '.json'):
+                path = os.path.join(self.profile_dir, f"{profile_id}{extension}")
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def get_profile_path(self, profile_id):
+        """Return the .prof path for a stored profile id, or None if it is unknown."""
+        if not PROFILE_ID_PATTERN.match(profile_id):
+            return None
+        path = os.path.join(self.profile_dir, f"{profile_id}.prof")
+        return path if os.path.exists(path) else None
+
+    def render_text(self, profile_id, sort_key='cumulative', limit=PROFILE_TEXT_LIMIT):
+        """Return a pstats text report for a stored profile."""
+        output = io.StringIO()
+        stats = pstats.Stats(self.get_profile_path(profile_id), stream=output)
+        stats.sort_stats(sort_key).print_stats(limit)
+        return output.getvalue()
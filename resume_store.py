@@ -0,0 +1,104 @@
+import json
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+
+
+logger = logging.getLogger(__name__)
+
+RESUME_ID_PATTERN = re.compile(r'^[0-9]{8}-[0-9]{6}-[0-9a-f]{8}$')
+DEFAULT_RESUME_RETENTION = 20
+
+
+class ResumeStore:
+    def __init__(self, resume_dir):
+        """Keep the AxiDraw output SVG of halted plots so they can be resumed (res_plot mode)."""
+        self.resume_dir = os.environ.get('PLOT_RESUME_DIR', resume_dir)
+        self.retention = int(os.environ.get('PLOT_RESUME_RETENTION', str(DEFAULT_RESUME_RETENTION)))
+        self.lock = threading.Lock()
+
+    def build_path(self, resume_id, extension):
+        """Return the path of a stored resume file."""
+        return os.path.join(self.resume_dir, f"{resume_id}{extension}")
+
+    def save(self, resume_svg, metadata, resume_id=None):
+        """Store the output SVG and job metadata of a halted plot and return its resume id.
+
+        Passing the id of an entry that was resumed and halted again replaces it.
+        """
+        resume_id = resume_id or f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:8]}"
+        metadata = dict(metadata, id=resume_id, created_at=int(time.time()))
+
+        with self.lock:
+            os.makedirs(self.resume_dir, exist_ok=True)
+            with open(self.build_path(resume_id, '.svg'), 'w', encoding='utf-8') as svg_file:
+                svg_file.write(resume_svg)
+            with open(self.build_path(resume_id, '.json'), 'w', encoding='utf-8') as metadata_file:
+                json.dump(metadata, metadata_file)
+            self.prune()
+
+        logger.info("Saved resume point %s for %s", resume_id, metadata.get('file'))
+        return resume_id
+
+    def get(self, resume_id):
+        """Return the metadata of a resume entry, or None if the id is unknown or its SVG is gone."""
+        if not RESUME_ID_PATTERN.match(resume_id or ''):
+            return None
+        # The SVG is written first, so metadata without it is left over from a partial delete
+        if not os.path.exists(self.build_path(resume_id, '.svg')):
+            return None
+        try:
+            with open(self.build_path(resume_id, '.json'), encoding='utf-8') as metadata_file:
+                return json.load(metadata_file)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def load_svg(self, resume_id):
+        """Return the output SVG saved for a resume entry."""
+        with open(self.build_path(resume_id, '.svg'), encoding='utf-8') as svg_file:
+            return svg_file.read()
+
+    def list_entries(self, file=None):
+        """Return resume entries, newest first, optionally only those of one artwork file."""
+        if not os.path.isdir(self.resume_dir):
+            return []
+
+        entries = []
+        for filename in os.listdir(self.resume_dir):
+            if not filename.endswith('.json'):
+                continue
+            entry = self.get(filename[:-len('.json')])
+            if entry and (file is None or entry.get('file') == file):
+                entries.append(entry)
+        entries.sort(key=lambda entry: (entry.get('created_at', 0), entry.get('id', '')), reverse=True)
+        return entries
+
+    def delete(self, resume_id):
+        """Remove a resume entry once it has been completed or discarded."""
+        if not RESUME_ID_PATTERN.match(resume_id or ''):
+            return False
+
+        removed = False
+        with self.lock:
+            for extension in ('.svg', '.json'):
+                path = self.build_path(resume_id, extension)
+                if os.path.exists(path):
+                    os.remove(path)
+                    removed = True
+        return removed
+
+    def prune(self):
+        """Delete the oldest resume entries beyond the retention limit."""
+        metadata_files = sorted(
+            (os.path.getmtime(os.path.join(self.resume_dir, filename)), filename[:-len('.json')])
+            for filename in os.listdir(self.resume_dir)
+            if filename.endswith('.json')
+        )
+        for _, resume_id in metadata_files[:max(0, len(metadata_files) - self.retention)]:
+            for extension in ('.svg', '.json'):
+                path = self.build_path(resume_id, extension)
+                if os.path.exists(path):
+                    os.remove(path)
@@ -0,0 +1,308 @@
+# Simulated AxiDraw backend
+# Hardware-free stand-in for pyaxidraw.axidraw.AxiDraw, selected with
+# AXIDRAW_BACKEND=simulated, for load testing and benchmarks. Only the parts of
+# the AxiDraw API used by this project are implemented. Plot statistics are set
+# as attributes (time_elapsed, distance_pendown, ...) like the real API, and the
+# console report matches what preview_parser expects from older API versions.
+#
+# Tuning:
+#  AXIDRAW_SIM_DEVICES     comma separated nicknames reported by list_names
+#  AXIDRAW_SIM_LATENCY     seconds added to every USB command (default 0.01)
+#  AXIDRAW_SIM_TIME_SCALE  fraction of the estimated plot time actually spent
+#                          "plotting" (default 0.001)
+
+import io
+import os
+import re
+import threading
+import time
+from types import SimpleNamespace
+from xml.etree import ElementTree as ET
+
+
+DRAWABLE_TAGS = {'path', 'line', 'polyline', 'polygon', 'rect', 'circle', 'ellipse'}
+INKSCAPE_LABEL = '{http://www.inkscape.org/namespaces/inkscape}label'
+SIMULATED_PATH_METERS_PER_ELEMENT = 0.05
+SIMULATED_TRAVEL_METERS_PER_ELEMENT = 0.02
+SIMULATED_PEN_DOWN_METERS_PER_SECOND = 0.025
+SIMULATED_PEN_UP_METERS_PER_SECOND = 0.15
+SIMULATED_VOLTAGE = 300
+# Carriage travel per drawable element, in inches, for the simulated pen position
+SIMULATED_INCHES_PER_ELEMENT = 0.25
+SIMULATED_TRAVEL_WIDTH_INCHES = 8.0
+# plot_status.stopped code the simulator reports after transmit_pause_request
+SIMULATED_PAUSE_REQUEST_CODE = 103
+# Progress marker the simulator stores in its output SVG for res_plot
+PLOTDATA_PATTERN = re.compile(r'<plotdata\b[^>]*/>\s*')
+PLOTDATA_ATTRIBUTE_PATTERN = re.compile(r'(\w+)="([^"]*)"')
+
+
+def get_simulated_device_names():
+    """Return the plotter nicknames the simulated USB bus reports."""
+    names = os.environ.get('AXIDRAW_SIM_DEVICES', 'sim-minikit')
+    return [name.strip() for name in names.split(',') if name.strip()]
+
+
+def get_simulated_latency():
+    """Return the simulated per-command USB latency in seconds."""
+    return float(os.environ.get('AXIDRAW_SIM_LATENCY', '0.01'))
+
+
+def get_simulated_time_scale():
+    """Return how much of the estimated plot time is actually spent sleeping."""
+    return float(os.environ.get('AXIDRAW_SIM_TIME_SCALE', '0.001'))
+
+
+def format_clock(total_seconds):
+    """Format seconds the way the AxiDraw API reports durations (H:MM:SS)."""
+    total_seconds = int(round(total_seconds))
+    hours, remainder = divmod(total_seconds, 3600)
+    minutes, seconds = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}"
+
+
+def default_options():
+    """Return the option defaults plot_setup restores, like the real API."""
+    return SimpleNamespace(
+        mode='plot',
+        manual_cmd='fw_version',
+        layer=1,
+        preview=False,
+        report_time=False,
+        report_lifts=False,
+        model=1,
+        port=None,
+        auto_rotate=True,
+        reordering=0,
+        check_limits=True,
+        clip_to_page=True,
+    )
+
+
+def is_svg_markup(svg_input):
+    """Return True when plot_setup was given SVG text rather than a file path."""
+    return svg_input.lstrip().startswith('<')
+
+
+def read_svg_markup(svg_input):
+    """Return the SVG text of a file path or SVG string."""
+    if is_svg_markup(svg_input):
+        return svg_input
+    with open(svg_input, encoding='utf-8') as svg_file:
+        return svg_file.read()
+
+
+def read_plotdata(svg_markup):
+    """Return the progress attributes the simulator saved in an output SVG."""
+    match = PLOTDATA_PATTERN.search(svg_markup)
+    return dict(PLOTDATA_ATTRIBUTE_PATTERN.findall(match.group(0))) if match else {}
+
+
+def count_drawable_elements(svg_path, layer=None):
+    """Count drawable elements, optionally only inside layers whose label starts with ``layer``."""
+    count = 0
+    layer_depth = 0
+    depth = 0
+    source = io.BytesIO(svg_path.encode('utf-8')) if is_svg_markup(svg_path) else svg_path
+    for event, element in ET.iterparse(source, events=('start', 'end')):
+        tag = element.tag.rsplit('}', 1)[-1]
+        if event == 'start':
+            depth += 1
+            if layer and tag == 'g' and not layer_depth:
+                digits = leading_digits(element.attrib.get(INKSCAPE_LABEL, ''))
+                if digits and int(digits) == layer:
+                    layer_depth = depth
+            continue
+
+        if tag in DRAWABLE_TAGS and (not layer or layer_depth):
+            count += 1
+        if layer_depth == depth:
+            layer_depth = 0
+        depth -= 1
+        element.clear()
+    return count
+
+
+def leading_digits(text):
+    """Return the run of digits a layer label starts with, or an empty string."""
+    match = re.match(r'\s*([0-9]+)', text)
+    return match.group(1) if match else ''
+
+
+class AxiDraw:
+    # One lock per simulated USB port, shared by every instance like a real serial port
+    port_locks = {}
+    port_locks_guard = threading.Lock()
+
+    def __init__(self):
+        """Create a disconnected simulated plotter with default options."""
+        self.options = default_options()
+        self.name_list = None
+        self.pen_lifts = 0
+        self.time_estimate = 0
+        self.time_elapsed = 0
+        self.distance_pendown = 0.0
+        self.distance_total = 0.0
+        self.svg_path = None
+        self.connected = False
+        self.pen_up = True
+        self.pause_requested = threading.Event()
+        self.plot_status = SimpleNamespace(stopped=0)
+        self.pen = SimpleNamespace(phys=SimpleNamespace(xpos=0.0, ypos=0.0))
+        self.plot_layer = None
+        self.moves_done = 0
+        self.element_counts = {}
+
+    def usb_lock(self):
+        """Return the lock guarding this instance's simulated USB port."""
+        port = self.options.port or get_simulated_device_names()[0]
+        with self.port_locks_guard:
+            return self.port_locks.setdefault(port, threading.Lock())
+
+    def usb_command(self):
+        """Simulate the round trip of one USB command."""
+        with self.usb_lock():
+            time.sleep(get_simulated_latency())
+
+    def plot_setup(self, svg_input=None):
+        """Load an SVG (or no document for utility commands) and reset options."""
+        self.options = default_options()
+        self.svg_path = svg_input
+        # Like the real API, the document is parsed once per plot_setup, not per plot_run
+        self.element_counts = {}
+
+    def transmit_pause_request(self):
+        """Ask a plot running on another thread to pause after its current move."""
+        self.pause_requested.set()
+
+    def plot_run(self, output=False):
+        """Run the configured mode and print the report text the real API prints."""
+        if self.options.mode == 'manual':
+            self.run_manual_command()
+        elif self.options.mode == 'toggle':
+            self.usb_command()
+            self.pen_up = not self.pen_up
+        elif self.options.mode in ('plot', 'layers', 'res_plot'):
+            self.run_plot()
+
+        if output:
+            return self.build_output_svg() if self.svg_path else ''
+        return None
+
+    def build_output_svg(self):
+        """Return the document with the progress a res_plot run needs, like the real API's output."""
+        svg_markup = PLOTDATA_PATTERN.sub('', read_svg_markup(self.svg_path))
+        plotdata = (
+            f'<plotdata application="axidraw" layer="{self.plot_layer or 0}" '
+            f'pause_ref="{self.moves_done}" stopped="{self.plot_status.stopped}"/>\n'
+        )
+        closing_index = svg_markup.rfind('</svg>')
+        return svg_markup[:closing_index] + plotdata + svg_markup[closing_index:]
+
+    def run_manual_command(self):
+        """Simulate the manual utility commands used by the server."""
+        command = self.options.manual_cmd
+        if command == 'list_names':
+            self.usb_command()
+            self.name_list = get_simulated_device_names()
+        elif command in ('raise_pen', 'lower_pen', 'disable_xy', 'enable_xy'):
+            self.usb_command()
+            if command == 'raise_pen':
+                self.pen_up = True
+            elif command == 'lower_pen':
+                self.pen_up = False
+
+    def run_plot(self):
+        """Estimate or simulate plotting the loaded document, or the rest of it in res_plot mode."""
+        layer = self.options.layer if self.options.mode == 'layers' else None
+        first_move = 0
+        if self.options.mode == 'res_plot':
+            plotdata = read_plotdata(read_svg_markup(self.svg_path)) if self.svg_path else {}
+            if not int(plotdata.get('stopped', 0)):
+                print("No in-progress plot data found in the document; nothing to resume.")
+                return
+            layer = int(plotdata.get('layer', 0)) or None
+            first_move = int(plotdata.get('pause_ref', 0))
+        self.plot_layer = layer
+        if layer not in self.element_counts:
+            self.element_counts[layer] = count_drawable_elements(self.svg_path, layer) if self.svg_path else 0
+        element_count = self.element_counts[layer]
+
+        path_meters = element_count * SIMULATED_PATH_METERS_PER_ELEMENT
+        travel_meters = element_count * SIMULATED_TRAVEL_METERS_PER_ELEMENT
+        estimate_seconds = (
+            path_meters / SIMULATED_PEN_DOWN_METERS_PER_SECOND
+            + travel_meters / SIMULATED_PEN_UP_METERS_PER_SECOND
+        )
+        self.time_estimate = estimate_seconds
+        self.distance_pendown = path_meters
+        self.distance_total = path_meters + travel_meters
+        self.pen_lifts = element_count
+
+        if self.options.preview:
+            if self.options.report_time:
+                print(f"Estimated print time: {format_clock(estimate_seconds)} (Hours, minutes, seconds)")
+                print(f"Length of path to draw: {path_meters:.2f} m")
+                print(f"Pen-up travel distance: {travel_meters:.2f} m")
+            return
+
+        # Plot move by move so a pause request is honoured between moves like the real API
+        self.plot_status.stopped = 0
+        move_seconds = estimate_seconds * get_simulated_time_scale() / max(1, element_count)
+        moves_done = first_move
+        with self.usb_lock():
+            for moves_done in range(first_move + 1, element_count + 1):
+                if self.pause_requested.is_set():
+                    moves_done -= 1
+                    break
+                time.sleep(move_seconds)
+                self.pen.phys.xpos = (moves_done * SIMULATED_INCHES_PER_ELEMENT) % SIMULATED_TRAVEL_WIDTH_INCHES
+                self.pen.phys.ypos = (moves_done * SIMULATED_INCHES_PER_ELEMENT) // SIMULATED_TRAVEL_WIDTH_INCHES
+
+            if self.pause_requested.is_set():
+                self.pause_requested.clear()
+                self.plot_status.stopped = SIMULATED_PAUSE_REQUEST_CODE
+                # Raise the pen on the connection that is already open
+                time.sleep(get_simulated_latency())
+                print("Plot paused by software request.")
+        # Like the real API, the statistics cover only the moves this run made
+        self.moves_done = moves_done
+        fraction_done = (moves_done - first_move) / max(1, element_count)
+        self.time_elapsed = estimate_seconds * fraction_done
+        self.distance_pendown = path_meters * fraction_done
+        self.distance_total = (path_meters + travel_meters) * fraction_done
+        self.pen_lifts = moves_done - first_move
+        self.pen_up = True
+
+        if self.options.report_time:
+            print(f"Elapsed time: {format_clock(self.time_elapsed)} (Hours, minutes, seconds)")
+            print(f"Length of path drawn: {self.distance_pendown:.2f} m")
+            print(f"Total distance moved: {self.distance_total:.2f} m")
+        if self.options.report_lifts:
+            print(f"Number of pen lifts: {self.pen_lifts}")
+
+    def interactive(self):
+        """Switch to interactive context; the simulation keeps no separate state."""
+        self.options = default_options()
+
+    def connect(self):
+        """Open the simulated USB connection; fails when the port is not on the bus."""
+        self.usb_command()
+        port = self.options.port
+        self.connected = port is None or port in get_simulated_device_names()
+        return self.connected
+
+    def disconnect(self):
+        """Close the simulated USB connection."""
+        self.connected = False
+
+    def usb_query(self, query):
+        """Answer the EBB queries used by the status endpoint."""
+        self.usb_command()
+        if query.strip() == 'QC':
+            return f"0394,{SIMULATED_VOLTAGE:04d}\r\n"
+        return 'OK\r\n'
+
+    def disable_xy(self):
+        """Disable the simulated XY motors."""
+        self.usb_command()
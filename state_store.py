@@ -0,0 +1,168 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+SQLITE_POLL_INTERVAL_SECONDS = 0.25
+
+
+class InProcessStateStore:
+    """Key/value store for runtime state shared by the threads of one process."""
+
+    is_shared = False
+
+    def __init__(self):
+        """Initialize the in-memory values, version counter and subscribers."""
+        self.values = {}
+        self.version = 0
+        self.condition = threading.Condition()
+        self.subscribers = []
+
+    def get(self, key, default=None):
+        """Return a copy of the stored value for a key."""
+        with self.condition:
+            if key not in self.values:
+                return default
+            return json.loads(self.values[key])
+
+    def set(self, key, value):
+        """Store a JSON-serializable value and notify subscribers."""
+        encoded_value = json.dumps(value, sort_keys=True)
+        with self.condition:
+            if self.values.get(key) == encoded_value:
+                return
+            self.values[key] = encoded_value
+            self.version += 1
+            self.condition.notify_all()
+        self.notify(key, value)
+
+    def subscribe(self, callback):
+        """Register ``callback(key, value)`` to run whenever a value changes."""
+        self.subscribers.append(callback)
+
+    def notify(self, key, value):
+        """Run subscriber callbacks, keeping one failing callback from affecting others."""
+        for callback in list(self.subscribers):
+            try:
+                callback(key, value)
+            except Exception as error:
+                logger.warning("State store subscriber failed for %s: %s", key, error)
+
+    def wait_for_change(self, since_version, timeout):
+        """Block until the store version moves past ``since_version`` or the timeout ends."""
+        with self.condition:
+            self.condition.wait_for(lambda: self.version > since_version, timeout=timeout)
+            return self.version
+
+
+class SQLiteStateStore(InProcessStateStore):
+    """State store backed by a SQLite file so several processes see the same values."""
+
+    is_shared = True
+
+    def __init__(self, path):
+        """Open (or create) the state database and start watching for outside changes."""
+        super().__init__()
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.local = threading.local()
+        with self.connect() as connection:
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS state ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, version INTEGER NOT NULL)'
+            )
+
+        self.version = self.read_max_version()
+        threading.Thread(target=self.watch_for_changes, name='state-store-watcher', daemon=True).start()
+
+    def connect(self):
+        """Return this thread's SQLite connection, opening it on first use."""
+        connection = getattr(self.local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            self.local.connection = connection
+        return connection
+
+    def read_max_version(self):
+        """Return the newest row version written by any process."""
+        row = self.connect().execute('SELECT COALESCE(MAX(version), 0) FROM state').fetchone()
+        return row[0]
+
+    def get(self, key, default=None):
+        """Read the current value for a key from the database."""
+        row = self.connect().execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+        if row is None:
+            return default
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        """Write a value with a new version; subscribers are notified by the watcher."""
+        encoded_value = json.dumps(value, sort_keys=True)
+        connection = self.connect()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            row = connection.execute('SELECT value FROM state WHERE key = ?', (key,)).fetchone()
+            if row is not None and row[0] == encoded_value:
+                connection.execute('COMMIT')
+                return
+
+            next_version = connection.execute('SELECT COALESCE(MAX(version), 0) + 1 FROM state').fetchone()[0]
+            connection.execute(
+                'INSERT INTO state (key, value, version) VALUES (?, ?, ?) '
+                'ON CONFLICT(key) DO UPDATE SET value = excluded.value, version = excluded.version',
+                (key, encoded_value, next_version),
+            )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+
+        self.publish_changes()
+
+    def publish_changes(self):
+        """Notify waiters and subscribers about rows newer than the last seen version."""
+        with self.condition:
+            last_version = self.version
+            rows = self.connect().execute(
+                'SELECT key, value, version FROM state WHERE version > ? ORDER BY version',
+                (last_version,),
+            ).fetchall()
+            if not rows:
+                return
+            self.version = rows[-1][2]
+            self.condition.notify_all()
+
+        for key, value, _ in rows:
+            self.notify(key, json.loads(value))
+
+    def watch_for_changes(self):
+        """Poll for writes made by other processes and publish them locally."""
+        while True:
+            time.sleep(SQLITE_POLL_INTERVAL_SECONDS)
+            try:
+                self.publish_changes()
+            except sqlite3.Error as error:
+                logger.warning("State store watcher failed: %s", error)
+
+
+def create_state_store(base_dir):
+    """Create the state store selected by PLOT_STATE_BACKEND (memory or sqlite)."""
+    backend = os.environ.get('PLOT_STATE_BACKEND', 'memory').lower()
+    if backend == 'sqlite':
+        default_path = os.path.join(base_dir, 'log', 'plot-state.sqlite3')
+        return SQLiteStateStore(os.environ.get('PLOT_STATE_PATH', default_path))
+
+    if backend != 'memory':
+        logger.warning("Unknown PLOT_STATE_BACKEND %s; using memory", backend)
+
+    return InProcessStateStore()
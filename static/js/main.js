@@ -18,6 +18,8 @@ let currentSvgDimensions = null;
 let currentPreviewEstimate = null;
 let currentAnimator = null;
 let currentPreviewObjectUrl = null;
+let deferredSvgSourcePath = null;
+let svgSourceRequestId = 0;
 let isPlaybackActive = false;
 let plotCountdownInterval = null;
 let plotCountdownEndTimeMs = null;
@@ -25,7 +27,16 @@ let preserveCountdownAfterStop = false;
 let previewLoadRequestId = 0;
 let plotLogEntries = [];
 let activePlotLogEntryId = null;
+let currentResumeEntry = null;
+let resumeRequestId = 0;
+let currentDeviceName = new URLSearchParams(window.location.search).get('device') || '';
 const INKSCAPE_NAMESPACE = 'http://www.inkscape.org/namespaces/inkscape';
+// Binary polyline stream written by svg_polylines.py
+const POLYLINE_MAGIC = 'PLY1';
+const POLYLINE_FORMAT_VERSION = 2;
+const POLYLINE_HEADER_BYTES = 52;
+const POLYLINE_MARKER = -32768;
+const POLYLINE_PREVIEW_MAX_HEIGHT_PX = 700;
 
 function setText(selector, value) {
     const element = document.querySelector(selector);
@@ -34,6 +45,63 @@ function setText(selector, value) {
     }
 }
 
+function withDeviceParam(path) {
+    if (!currentDeviceName) {
+        return path;
+    }
+
+    const separator = path.includes('?') ? '&' : '?';
+    return `${path}${separator}device=${encodeURIComponent(currentDeviceName)}`;
+}
+
+async function initializeDeviceSelector() {
+    const chipElement = document.querySelector('#device-chip');
+    const selectElement = document.querySelector('#device-select');
+    if (!chipElement || !selectElement) {
+        return;
+    }
+
+    try {
+        const response = await fetch('/devices.json', { cache: 'no-store' });
+        if (!response.ok) {
+            return;
+        }
+
+        const payload = await response.json();
+        const devices = Array.isArray(payload?.devices) ? payload.devices : [];
+        selectElement.innerHTML = '';
+        devices.forEach((device) => {
+            const option = document.createElement('option');
+            option.value = device.name;
+            option.textContent = device.status?.machine && device.status.machine !== 'none'
+                ? `${device.name} (${device.status.machine})`
+                : device.name;
+            selectElement.appendChild(option);
+        });
+
+        if (!devices.some((device) => device.name === currentDeviceName)) {
+            currentDeviceName = devices.length > 0 ? devices[0].name : '';
+        }
+        selectElement.value = currentDeviceName;
+        chipElement.hidden = devices.length < 2;
+    } catch (error) {
+        console.error('Failed to load plotter devices:', error);
+    }
+
+    selectElement.addEventListener('change', function(event) {
+        currentDeviceName = event.target.value;
+        const url = new URL(window.location);
+        url.searchParams.set('device', currentDeviceName);
+        window.history.replaceState({}, '', url);
+
+        const filename = document.querySelector('form[name=plot] input[name=filename]').value;
+        if (filename) {
+            loadPreviewEstimate(filename, previewLoadRequestId, document.querySelector('select[name=layer]').value);
+        }
+        refreshPlotterStatus();
+    });
+}
+
 function hasSelectedFilename() {
     const filenameInput = document.querySelector('form[name=plot] input[name=filename]');
     return Boolean(filenameInput && filenameInput.value);
@@ -73,6 +141,23 @@ function syncControlButtons() {
     plotButton.disabled = !canPlot;
     toggleButton.disabled = !canToggleServo;
     stopButton.disabled = !canStopPlot;
+
+    const nextEditionButton = document.querySelector('#next-edition-button');
+    if (nextEditionButton) {
+        const editionRun = currentPlotterData?.edition_run;
+        const isWaitingForPaper = Boolean(editionRun?.waiting && editionRun?.confirm);
+        nextEditionButton.hidden = !isWaitingForPaper;
+        nextEditionButton.disabled = !isWaitingForPaper || stopRequestInFlight;
+        if (isWaitingForPaper) {
+            nextEditionButton.textContent = `Plot Edition ${editionRun.edition}/${editionRun.editions}`;
+        }
+    }
+
+    const resumeButton = document.querySelector('#resume-plot-button');
+    if (resumeButton) {
+        resumeButton.hidden = !currentResumeEntry;
+        resumeButton.disabled = !currentResumeEntry || status !== 'on' || requestInFlight;
+    }
 }
 
 function setBusyStatusLocally() {
@@ -88,7 +173,7 @@ function setBusyStatusLocally() {
 
 async function refreshPlotterStatus() {
     try {
-        const statusResponse = await fetch('/status.json', { cache: 'no-store' });
+        const statusResponse = await fetch(withDeviceParam('/status.json'), { cache: 'no-store' });
         if (statusResponse.ok) {
             updatePlotterStatus(await statusResponse.json());
             return;
@@ -106,9 +191,43 @@ function setSvgSourceText(svgMarkup) {
         return;
     }
 
+    deferredSvgSourcePath = null;
+    svgSourceRequestId++;
     sourceElement.textContent = svgMarkup || 'No SVG loaded.';
 }
 
+// Canvas previews skip downloading the SVG markup until the source view is opened
+function deferSvgSourceText(svgPath) {
+    setSvgSourceText('');
+    deferredSvgSourcePath = svgPath;
+}
+
+async function loadDeferredSvgSource() {
+    const svgPath = deferredSvgSourcePath;
+    if (!svgPath) {
+        return;
+    }
+
+    deferredSvgSourcePath = null;
+    const requestId = svgSourceRequestId;
+    setText('#svg-source-text', 'Loading SVG...');
+    try {
+        const response = await fetch(svgPath);
+        if (!response.ok) {
+            throw new Error(`SVG request failed with status ${response.status}`);
+        }
+        const svgMarkup = await response.text();
+        if (requestId === svgSourceRequestId) {
+            setSvgSourceText(svgMarkup);
+        }
+    } catch (error) {
+        console.error('Failed to load SVG source:', error);
+        if (requestId === svgSourceRequestId) {
+            setSvgSourceText('');
+        }
+    }
+}
+
 function setInfoModalOpen(isOpen) {
     const modalElement = document.querySelector('#info-modal');
     if (!modalElement) {
@@ -119,6 +238,7 @@ function setInfoModalOpen(isOpen) {
     document.body.classList.toggle('modal-open', isOpen);
 
     if (isOpen) {
+        loadDeferredSvgSource();
         document.querySelector('#info-modal-close')?.focus();
     } else {
         document.querySelector('#info-link')?.focus();
@@ -233,6 +353,109 @@ function buildPreviewSvgPayload(svgMarkup, selectedLayerValue) {
     };
 }
 
+async function fetchLayerPreviewPayload(filename, selectedLayerValue) {
+    const [layerResponse, layersResponse] = await Promise.all([
+        fetch(buildLayerRequestPath(filename, selectedLayerValue)),
+        fetch(`${buildFileRequestPath(filename)}/layers.json`),
+    ]);
+    if (!layerResponse.ok || !layersResponse.ok) {
+        throw new Error(`Layer request failed with status ${layerResponse.ok ? layersResponse.status : layerResponse.status}`);
+    }
+
+    const layersPayload = await layersResponse.json();
+    return {
+        availableLayers: layersPayload.layers,
+        previewSvgMarkup: await layerResponse.text(),
+    };
+}
+
+function buildPolylineRequestPath(filename, layerValue) {
+    const path = `${buildFileRequestPath(filename)}/polylines.bin`;
+    return layerValue ? `${path}?layer=${encodeURIComponent(layerValue)}` : path;
+}
+
+function decodePolylineStream(buffer) {
+    const view = new DataView(buffer);
+    const magic = String.fromCharCode(...new Uint8Array(buffer, 0, Math.min(4, buffer.byteLength)));
+    if (buffer.byteLength < POLYLINE_HEADER_BYTES || magic !== POLYLINE_MAGIC || view.getUint16(4, true) !== POLYLINE_FORMAT_VERSION) {
+        throw new Error('Unsupported polyline stream');
+    }
+
+    const readFloat = (index) => view.getFloat32(8 + index * 4, true);
+    const polylineCount = view.getUint32(44, true);
+    const valueCount = view.getUint32(48, true);
+    const values = new Int16Array(buffer, POLYLINE_HEADER_BYTES, valueCount);
+    // Absolute grid coordinates, decoded once; polyline i spans points offsets[i] to offsets[i + 1]
+    const points = new Int32Array(valueCount - polylineCount * 2);
+    const offsets = new Uint32Array(polylineCount + 1);
+    let x = 0;
+    let y = 0;
+    let read = 0;
+    let write = 0;
+
+    for (let polyline = 0; polyline < polylineCount; polyline++) {
+        if (values[read] !== POLYLINE_MARKER) {
+            throw new Error('Corrupt polyline stream');
+        }
+        const pointCount = values[read + 1];
+        read += 2;
+        offsets[polyline] = write / 2;
+        for (let point = 0; point < pointCount; point++) {
+            x += values[read++];
+            y += values[read++];
+            points[write++] = x;
+            points[write++] = y;
+        }
+    }
+    offsets[polylineCount] = write / 2;
+
+    return {
+        widthMm: readFloat(0),
+        heightMm: readFloat(1),
+        viewBox: [readFloat(2), readFloat(3), readFloat(4), readFloat(5)],
+        originX: readFloat(6),
+        originY: readFloat(7),
+        unit: readFloat(8),
+        points,
+        offsets,
+    };
+}
+
+async function fetchPolylinePreviewPayload(filename, selectedLayerValue) {
+    const [polylineResponse, layersResponse] = await Promise.all([
+        fetch(buildPolylineRequestPath(filename, selectedLayerValue)),
+        fetch(`${buildFileRequestPath(filename)}/layers.json`),
+    ]);
+    if (!polylineResponse.ok || !layersResponse.ok) {
+        throw new Error(`Polyline request failed with status ${polylineResponse.ok ? layersResponse.status : polylineResponse.status}`);
+    }
+
+    const [buffer, layersPayload] = await Promise.all([polylineResponse.arrayBuffer(), layersResponse.json()]);
+    return {
+        availableLayers: layersPayload.layers,
+        drawing: decodePolylineStream(buffer),
+    };
+}
+
+async function fetchPreviewSvgPayload(filepath, filename, selectedLayerValue) {
+    // The server extracts a single layer, so only that layer is downloaded and parsed
+    if (selectedLayerValue) {
+        try {
+            return await fetchLayerPreviewPayload(filename, selectedLayerValue);
+        } catch (error) {
+            console.warn('Server layer extraction failed; filtering in the browser:', error);
+        }
+    }
+
+    const svgResponse = await fetch(filepath);
+    if (!svgResponse.ok) {
+        throw new Error(`SVG request failed with status ${svgResponse.status}`);
+    }
+
+    const svgMarkup = await svgResponse.text();
+    return buildPreviewSvgPayload(svgMarkup, selectedLayerValue);
+}
+
 function revokeCurrentPreviewObjectUrl() {
     if (!currentPreviewObjectUrl) {
         return;
@@ -253,11 +476,70 @@ function scrollLibraryItemIntoView(listItem) {
 function setSelectedPlot(filename) {
     setText("#selected-sketch-name", `File: ${filename || "No plot selected"}`);
     updateDownloadLinks(filename);
+    refreshResumeEntry(filename);
+}
+
+function formatFileHistory(history) {
+    const parts = [`Plotted ${history.plot_count}\u00d7`, String(history.last_plotted_at || '').slice(0, 10)];
+    if (history.last_tool) {
+        parts.push(history.last_media ? `${history.last_tool} / ${history.last_media}` : history.last_tool);
+    } else if (history.last_media) {
+        parts.push(history.last_media);
+    }
+    return parts.filter(Boolean).join(' \u00b7 ');
+}
+
+// Update the plot count shown under a file in the library after it was plotted
+async function refreshFileHistory(filename) {
+    const listItem = Array.from(document.querySelectorAll('#files li')).find((item) => item.getAttribute('data-filename') === filename);
+    const historyElement = listItem?.querySelector('.file-link__history');
+    if (!historyElement) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`${buildFileRequestPath(filename)}/history.json`, { cache: 'no-store' });
+        if (!response.ok) {
+            return;
+        }
+        const history = (await response.json())?.history;
+        historyElement.hidden = !history;
+        historyElement.textContent = history ? formatFileHistory(history) : '';
+    } catch (error) {
+        console.warn('Failed to load plot history:', error);
+    }
+}
+
+// Look up the latest halted plot of a file so it can be resumed
+async function refreshResumeEntry(filename) {
+    const requestId = ++resumeRequestId;
+    currentResumeEntry = null;
+    syncControlButtons();
+    if (!filename) {
+        return;
+    }
+
+    try {
+        const response = await fetch(`/resume.json?file=${encodeURIComponent(filename)}`, { cache: 'no-store' });
+        if (!response.ok) {
+            return;
+        }
+        const payload = await response.json();
+        if (requestId === resumeRequestId) {
+            currentResumeEntry = payload?.entries?.[0] || null;
+            syncControlButtons();
+        }
+    } catch (error) {
+        console.warn('Failed to load resume points:', error);
+    }
 }
 
 function buildPlotRequestPath(filename, queryParams = {}) {
     const requestPath = `/plot/${filename.split('/').map(encodeURIComponent).join('/')}`;
     const params = new URLSearchParams(queryParams);
+    if (currentDeviceName) {
+        params.set('device', currentDeviceName);
+    }
     const queryString = params.toString();
     return queryString ? `${requestPath}?${queryString}` : requestPath;
 }
@@ -266,10 +548,18 @@ function buildDownloadRequestPath(filename) {
     return `/download/${filename.split('/').map(encodeURIComponent).join('/')}`;
 }
 
-function buildDeleteRequestPath(filename) {
+function buildFileRequestPath(filename) {
     return `/files/${filename.split('/').map(encodeURIComponent).join('/')}`;
 }
 
+function buildDeleteRequestPath(filename) {
+    return buildFileRequestPath(filename);
+}
+
+function buildLayerRequestPath(filename, layerValue) {
+    return `${buildFileRequestPath(filename)}/layer/${encodeURIComponent(layerValue)}.svg`;
+}
+
 function getRequestedLayerValue() {
     return new URLSearchParams(window.location.search).get('layer') || '';
 }
@@ -435,6 +725,208 @@ function getSimplePlotAnimatorClass() {
     return null;
 }
 
+// Plays the server's polyline stream on a canvas with the playback interface of SimplePlotAnimator
+class PolylineCanvasAnimator {
+    constructor(targetElement, options = {}) {
+        this.targetElement = targetElement;
+        this.canvas = null;
+        this.context = null;
+        this.drawing = null;
+        this.currentPathIndex = 0;
+        this.isPlaying = false;
+        this.animationPrepared = false;
+        this.animationSpeed = options.speed || 3;
+        this.onComplete = options.onComplete || null;
+        this.onProgress = options.onProgress || null;
+        this.frameRequest = null;
+        this.playStartedAt = 0;
+        this.playStartIndex = 0;
+    }
+
+    // main.js only reads paths.length, so no per-path objects are created
+    get paths() {
+        return { length: this.drawing ? this.drawing.offsets.length - 1 : 0 };
+    }
+
+    load(drawing) {
+        this.pause();
+        this.drawing = drawing;
+        this.canvas = document.createElement('canvas');
+        this.context = this.canvas.getContext('2d');
+        this.targetElement.replaceChildren(this.canvas);
+        this.layout();
+        this.showStaticView();
+        this.updateProgress();
+        return true;
+    }
+
+    layout() {
+        const { points, originX, originY, unit } = this.drawing;
+        let [viewX, viewY, viewWidth, viewHeight] = this.drawing.viewBox;
+        if (!(viewWidth > 0 && viewHeight > 0)) {
+            // No viewBox or size: frame the drawing itself
+            let maxX = 1;
+            let maxY = 1;
+            for (let index = 0; index < points.length; index += 2) {
+                maxX = Math.max(maxX, points[index]);
+                maxY = Math.max(maxY, points[index + 1]);
+            }
+            [viewX, viewY, viewWidth, viewHeight] = [originX, originY, maxX * unit, maxY * unit];
+        }
+
+        const pixelRatio = window.devicePixelRatio || 1;
+        const aspectRatio = viewWidth / viewHeight;
+        const cssWidth = Math.min(this.targetElement.clientWidth || POLYLINE_PREVIEW_MAX_HEIGHT_PX, POLYLINE_PREVIEW_MAX_HEIGHT_PX * aspectRatio);
+        const cssHeight = cssWidth / aspectRatio;
+        this.canvas.style.width = `${cssWidth}px`;
+        this.canvas.style.height = `${cssHeight}px`;
+        this.canvas.width = Math.max(1, Math.round(cssWidth * pixelRatio));
+        this.canvas.height = Math.max(1, Math.round(cssHeight * pixelRatio));
+
+        // Grid units map straight to device pixels, so drawing needs no per-point arithmetic
+        const scale = (this.canvas.width / viewWidth) * unit;
+        this.transform = [scale, 0, 0, scale, ((originX - viewX) / unit) * scale, ((originY - viewY) / unit) * scale];
+        this.lineWidth = pixelRatio / scale;
+    }
+
+    clear() {
+        this.context.setTransform(1, 0, 0, 1, 0, 0);
+        this.context.clearRect(0, 0, this.canvas.width, this.canvas.height);
+    }
+
+    drawRange(start, end) {
+        if (start >= end) {
+            return;
+        }
+
+        const { points, offsets } = this.drawing;
+        const context = this.context;
+        context.setTransform(...this.transform);
+        context.lineWidth = this.lineWidth;
+        context.lineCap = 'round';
+        context.lineJoin = 'round';
+        context.strokeStyle = '#000';
+        context.beginPath();
+        for (let polyline = start; polyline < end; polyline++) {
+            const first = offsets[polyline] * 2;
+            const last = offsets[polyline + 1] * 2;
+            context.moveTo(points[first], points[first + 1]);
+            // Single points still show as dots thanks to round caps
+            for (let index = first === last - 2 ? first : first + 2; index < last; index += 2) {
+                context.lineTo(points[index], points[index + 1]);
+            }
+        }
+        context.stroke();
+    }
+
+    showStaticView() {
+        this.pause();
+        this.animationPrepared = false;
+        this.currentPathIndex = 0;
+        this.clear();
+        this.drawRange(0, this.paths.length);
+    }
+
+    updateProgress(current = this.currentPathIndex) {
+        if (this.onProgress) {
+            this.onProgress({ current, total: this.paths.length, percentage: Math.round((current / Math.max(this.paths.length, 1)) * 100) });
+        }
+    }
+
+    async play() {
+        if (this.paths.length === 0) {
+            return this;
+        }
+        if (!this.animationPrepared || this.currentPathIndex >= this.paths.length) {
+            this.pause();
+            this.clear();
+            this.currentPathIndex = 0;
+            this.animationPrepared = true;
+            this.updateProgress();
+        }
+
+        this.isPlaying = true;
+        this.restartClock();
+        this.frameRequest = requestAnimationFrame((time) => this.drawFrame(time));
+        return this;
+    }
+
+    restartClock() {
+        this.playStartedAt = performance.now();
+        this.playStartIndex = this.currentPathIndex;
+    }
+
+    drawFrame(time) {
+        if (!this.isPlaying) {
+            return;
+        }
+
+        // Same pacing as the SVG animator: one path per animationSpeed milliseconds
+        const elapsedPaths = Math.floor(Math.max(0, time - this.playStartedAt) / Math.max(1, this.animationSpeed)) + 1;
+        const target = Math.min(this.paths.length, this.playStartIndex + elapsedPaths);
+        this.drawRange(this.currentPathIndex, target);
+        if (target !== this.currentPathIndex) {
+            this.currentPathIndex = target;
+            this.updateProgress();
+        }
+
+        if (this.currentPathIndex >= this.paths.length) {
+            this.isPlaying = false;
+            this.frameRequest = null;
+            if (this.onComplete) {
+                this.onComplete();
+            }
+            return;
+        }
+        this.frameRequest = requestAnimationFrame((nextTime) => this.drawFrame(nextTime));
+    }
+
+    pause() {
+        this.isPlaying = false;
+        if (this.frameRequest) {
+            cancelAnimationFrame(this.frameRequest);
+            this.frameRequest = null;
+        }
+        return this;
+    }
+
+    reset() {
+        this.showStaticView();
+        this.updateProgress();
+        return this;
+    }
+
+    setSpeed(speed) {
+        this.animationSpeed = speed;
+        if (this.isPlaying) {
+            this.restartClock();
+        }
+        return this;
+    }
+}
+
+function useAnimator(AnimatorClass, previewElement) {
+    const onComplete = () => {
+        updatePlaybackProgress({ current: currentAnimator.paths.length, total: currentAnimator.paths.length, percentage: 100 });
+        setPlaybackButtonState(false);
+    };
+
+    if (currentAnimator instanceof AnimatorClass) {
+        currentAnimator.pause();
+        currentAnimator.onProgress = updatePlaybackProgress;
+        currentAnimator.onComplete = onComplete;
+        currentAnimator.setSpeed(Number(document.querySelector('#speed-slider').value));
+    } else {
+        currentAnimator?.pause();
+        currentAnimator = new AnimatorClass(previewElement, {
+            speed: Number(document.querySelector('#speed-slider').value),
+            onProgress: updatePlaybackProgress,
+            onComplete,
+        });
+    }
+    return currentAnimator;
+}
+
 function waitForBrowserFrame() {
     return new Promise((resolve) => {
         requestAnimationFrame(() => {
@@ -569,17 +1061,22 @@ function getCurrentPlotContext(filename, layer) {
         orientation,
         layer: selectedLayer || 'all',
         edition: 1,
-        editions: 1,
+        editions: getRequestedEditions(),
         plotter: currentPlotterData?.machine || 'Unknown',
     };
 }
 
+function getRequestedEditions() {
+    const value = Number.parseInt(document.querySelector('input[name=editions]')?.value || '1', 10);
+    return Number.isFinite(value) && value > 1 ? value : 1;
+}
+
 function getStatusClass(status) {
     const value = String(status || '').toLowerCase();
     if (value === 'ok') {
         return 'status-ok';
     }
-    if (value === 'error' || value === 'stopped') {
+    if (value === 'error' || value === 'stopped' || value === 'failed') {
         return 'status-error';
     }
     if (value === 'plotting' || value === 'stopping') {
@@ -1145,7 +1642,7 @@ async function toggleServo() {
     showToggleServoStatus('Toggling...');
 
     try {
-        const response = await fetch('/servo/toggle', { method: 'POST' });
+        const response = await fetch(withDeviceParam('/servo/toggle'), { method: 'POST' });
         if (response.status === 503) {
             showToggleServoStatus('Plotter busy', true);
             return;
@@ -1194,7 +1691,7 @@ async function stopPlot() {
     });
 
     try {
-        const response = await fetch('/plot/stop', { method: 'POST' });
+        const response = await fetch(withDeviceParam('/plot/stop'), { method: 'POST' });
 
         if (response.status === 409) {
             showStopPlotStatus('No active plot', true);
@@ -1215,7 +1712,14 @@ async function stopPlot() {
         }
 
         const payload = await response.json();
-        const servoState = payload?.stop_result?.servo_state || 'unknown';
+        const stopResult = payload?.stop_result || {};
+        const servoState = stopResult.servo_state || 'unknown';
+        if (stopResult.method === 'pause_request') {
+            const penUpMs = Number(stopResult.time_to_pen_up_ms);
+            showStopPlotStatus(Number.isFinite(penUpMs) ? `Plot halted, pen up in ${Math.round(penUpMs)} ms` : 'Plot halted, pen up');
+            // The halted plot's own log entry is marked stopped when its request returns
+            return;
+        }
         if (servoState === 'commanded_up') {
             showStopPlotStatus('Stop sent, pen up + motors off');
         } else {
@@ -1245,7 +1749,7 @@ async function stopPlot() {
 
 // Check plotter status with detailed information
 var xhr = new XMLHttpRequest();
-xhr.open('GET', '/status.json');
+xhr.open('GET', withDeviceParam('/status.json'));
 xhr.onload = function() {
     if (xhr.status === 200) {
         let plotterData = JSON.parse(xhr.responseText);
@@ -1276,7 +1780,7 @@ function updatePlotterStatus(data) {
         // Start polling if not already polling
         if (!busyPollingInterval) {
             busyPollingInterval = setInterval(() => {
-                fetch('/status.json')
+                fetch(withDeviceParam('/status.json'))
                     .then(res => res.json())
                     .then(newStatus => {
                         if (newStatus.status !== 'busy') {
@@ -1320,6 +1824,23 @@ function updatePlotterStatus(data) {
 }
 
 // Function to extract SVG dimensions
+// Millimeters per SVG length unit; unitless lengths are px at 96 DPI
+const SVG_LENGTH_UNIT_TO_MM = {
+    '': 25.4 / 96,
+    px: 25.4 / 96,
+    in: 25.4,
+    cm: 10,
+    mm: 1,
+    pt: 25.4 / 72,
+    pc: 25.4 / 6,
+};
+
+function parseSvgLengthToMm(value) {
+    const match = (value || '').trim().match(/^([0-9]*\.?[0-9]+)([a-zA-Z]*)$/);
+    const unitScale = match ? SVG_LENGTH_UNIT_TO_MM[match[2].toLowerCase()] : undefined;
+    return unitScale === undefined ? null : parseFloat(match[1]) * unitScale;
+}
+
 function extractSvgDimensions(svgDocument) {
     const svgElement = svgDocument?.tagName === 'svg' ? svgDocument : svgDocument?.querySelector('svg');
 
@@ -1327,39 +1848,18 @@ function extractSvgDimensions(svgDocument) {
         return null;
     }
 
-    let width, height;
+    // Physical size from the width/height units, the same rule the server uses for queued jobs
+    let width = parseSvgLengthToMm(svgElement.getAttribute('width'));
+    let height = parseSvgLengthToMm(svgElement.getAttribute('height'));
 
-    // Try to get dimensions from viewBox first
-    const viewBox = svgElement.getAttribute('viewBox');
-    if (viewBox) {
-        const [x, y, w, h] = viewBox.split(' ').map(parseFloat);
-        // ViewBox dimensions are in SVG user units (pixels at 96 DPI)
-        width = w * (25.4 / 96); // Convert to mm
-        height = h * (25.4 / 96);
-    } else {
-        // Fall back to width/height attributes
-        const widthAttr = svgElement.getAttribute('width');
-        const heightAttr = svgElement.getAttribute('height');
-
-        if (widthAttr && heightAttr) {
-            // Remove units and convert to numbers
-            width = parseFloat(widthAttr.replace(/[^\d.]/g, ''));
-            height = parseFloat(heightAttr.replace(/[^\d.]/g, ''));
-
-            // Convert from other units to mm if needed
-            // SVG uses 96 DPI standard (1 inch = 96 pixels, 1 inch = 25.4 mm)
-            if (widthAttr.includes('px') || !isNaN(parseFloat(widthAttr))) {
-                width = width * (25.4 / 96); // Convert px to mm at 96 DPI
-                height = height * (25.4 / 96);
-            } else if (widthAttr.includes('in')) {
-                width = width * 25.4; // Convert inches to mm
-                height = height * 25.4;
-            }
-            // Assume mm if no conversion needed
-        }
+    if (!width || !height) {
+        // Fall back to the viewBox, in user units taken as pixels at 96 DPI
+        const viewBox = (svgElement.getAttribute('viewBox') || '').trim().split(/[\s,]+/).map(parseFloat);
+        width = viewBox.length === 4 ? viewBox[2] * (25.4 / 96) : null;
+        height = viewBox.length === 4 ? viewBox[3] * (25.4 / 96) : null;
     }
 
-    return width && height ? { width, height } : null;
+    return width > 0 && height > 0 ? { width, height } : null;
 }
 
 // Function to check if SVG fits within plotter bounds
@@ -1398,10 +1898,12 @@ function checkSvgFit() {
     fitElement.className = fitClass;
 }
 
-function analyzeLoadedSvg(filename, availableLayers = null, selectedLayerValue = '') {
+function analyzeLoadedSvg(filename, availableLayers = null, selectedLayerValue = '', drawingDimensions = undefined) {
     const svgElement = getCurrentSvgElement();
+    // Canvas previews have no SVG element; their dimensions come with the polyline stream
+    const hasDrawing = drawingDimensions !== undefined;
 
-    if (!svgElement) {
+    if (!svgElement && !hasDrawing) {
         currentSvgDimensions = null;
         document.querySelector("#svg-dimensions").textContent = "Unable to determine";
         const fitElement = document.querySelector("#plotter-fit");
@@ -1410,7 +1912,7 @@ function analyzeLoadedSvg(filename, availableLayers = null, selectedLayerValue =
         return;
     }
 
-    const dimensions = extractSvgDimensions(svgElement);
+    const dimensions = hasDrawing ? drawingDimensions : extractSvgDimensions(svgElement);
     if (dimensions) {
         currentSvgDimensions = dimensions;
         document.querySelector("#svg-dimensions").textContent =
@@ -1469,13 +1971,33 @@ async function loadAnimatedPreview(filepath, filename, selectedLayerValue = '')
     await waitForBrowserFrame();
 
     try {
-        const svgResponse = await fetch(filepath);
-        if (!svgResponse.ok) {
-            throw new Error(`SVG request failed with status ${svgResponse.status}`);
+        const polylinePayload = await fetchPolylinePreviewPayload(filename, selectedLayerValue).catch((error) => {
+            console.warn('Polyline preview unavailable; animating the SVG instead:', error);
+            return null;
+        });
+        if (loadRequestId !== previewLoadRequestId) {
+            return;
+        }
+        if (polylinePayload) {
+            const { drawing } = polylinePayload;
+            useAnimator(PolylineCanvasAnimator, previewElement).load(drawing);
+            deferSvgSourceText(selectedLayerValue ? buildLayerRequestPath(filename, selectedLayerValue) : filepath);
+            analyzeLoadedSvg(
+                filename,
+                polylinePayload.availableLayers,
+                selectedLayerValue,
+                drawing.widthMm && drawing.heightMm ? { width: drawing.widthMm, height: drawing.heightMm } : null
+            );
+            setPlaybackControlsEnabled(true);
+            updatePlaybackProgress({ current: 0, total: currentAnimator.paths.length, percentage: 0 });
+            setPlaybackButtonState(false);
+            return;
         }
 
-        const svgMarkup = await svgResponse.text();
-        const previewPayload = buildPreviewSvgPayload(svgMarkup, selectedLayerValue);
+        const previewPayload = await fetchPreviewSvgPayload(filepath, filename, selectedLayerValue);
+        if (loadRequestId !== previewLoadRequestId) {
+            return;
+        }
         currentPreviewObjectUrl = URL.createObjectURL(new Blob([previewPayload.previewSvgMarkup], { type: 'image/svg+xml' }));
         setSvgSourceText(previewPayload.previewSvgMarkup);
 
@@ -1484,24 +2006,7 @@ async function loadAnimatedPreview(filepath, filename, selectedLayerValue = '')
             throw new Error('SimplePlotAnimator UMD bundle is not available');
         }
 
-        if (!currentAnimator) {
-            currentAnimator = new SimplePlotAnimatorClass(previewElement, {
-                speed: Number(document.querySelector('#speed-slider').value),
-                onProgress: updatePlaybackProgress,
-                onComplete: () => {
-                    updatePlaybackProgress({ current: currentAnimator.paths.length, total: currentAnimator.paths.length, percentage: 100 });
-                    setPlaybackButtonState(false);
-                }
-            });
-        } else {
-            currentAnimator.pause();
-            currentAnimator.onProgress = updatePlaybackProgress;
-            currentAnimator.onComplete = () => {
-                updatePlaybackProgress({ current: currentAnimator.paths.length, total: currentAnimator.paths.length, percentage: 100 });
-                setPlaybackButtonState(false);
-            };
-            currentAnimator.setSpeed(Number(document.querySelector('#speed-slider').value));
-        }
+        useAnimator(SimplePlotAnimatorClass, previewElement);
 
         setPreviewLoading(true, 'Rendering preview...');
         const loaded = await currentAnimator.loadFromURL(currentPreviewObjectUrl);
@@ -1533,16 +2038,102 @@ function markThumbnailUnavailable(imageElement) {
     }
 }
 
+const THUMBNAIL_BATCH_SIZE = 48;
+const THUMBNAIL_DISPLAY_PX = 120;
+const THUMBNAIL_TIERS_PX = [120, 240, 480];
+
+function getThumbnailTierSize() {
+    // Smallest tier that stays sharp at the display size on this screen
+    const wantedSize = THUMBNAIL_DISPLAY_PX * (window.devicePixelRatio || 1);
+    return THUMBNAIL_TIERS_PX.find((size) => size >= wantedSize) || THUMBNAIL_TIERS_PX[THUMBNAIL_TIERS_PX.length - 1];
+}
+
+function loadIndividualThumbnail(imageElement) {
+    const picture = imageElement.closest('picture');
+    if (picture) {
+        picture.querySelectorAll('source[data-srcset]').forEach((source) => {
+            source.srcset = source.dataset.srcset;
+        });
+    }
+    if (imageElement.dataset.srcset) {
+        imageElement.srcset = imageElement.dataset.srcset;
+    }
+    imageElement.src = imageElement.dataset.src;
+}
+
+async function loadThumbnailBatch(batch) {
+    const firstPicture = batch.images[0].closest('picture');
+    const params = new URLSearchParams({
+        offset: batch.offset,
+        limit: batch.images.length,
+        size: getThumbnailTierSize(),
+        format: firstPicture && firstPicture.querySelector('source[type="image/webp"]') ? 'webp' : 'png',
+    });
+
+    try {
+        const response = await fetch(`/thumbnails/batch.json?${params}`);
+        if (!response.ok) {
+            throw new Error(`HTTP ${response.status}`);
+        }
+        const payload = await response.json();
+
+        // Entries are matched by filename in case the library changed since the page was rendered
+        batch.images.forEach((imageElement) => {
+            const fileLink = imageElement.closest('.file-link');
+            const dataUrl = fileLink ? payload.thumbnails[fileLink.dataset.filename] : null;
+            if (dataUrl) {
+                imageElement.src = dataUrl;
+            } else {
+                loadIndividualThumbnail(imageElement);
+            }
+        });
+    } catch (error) {
+        console.error('Failed to load thumbnail batch:', error);
+        batch.images.forEach(loadIndividualThumbnail);
+    }
+}
+
+function initializeThumbnailBatches(imageElements) {
+    const batches = [];
+    for (let offset = 0; offset < imageElements.length; offset += THUMBNAIL_BATCH_SIZE) {
+        batches.push({ offset, images: imageElements.slice(offset, offset + THUMBNAIL_BATCH_SIZE), loaded: false });
+    }
+
+    if (!('IntersectionObserver' in window)) {
+        batches.forEach(loadThumbnailBatch);
+        return;
+    }
+
+    // Fetch a page of thumbnails once any of its items comes near the viewport
+    const batchByImage = new Map();
+    batches.forEach((batch) => batch.images.forEach((imageElement) => batchByImage.set(imageElement, batch)));
+    const observer = new IntersectionObserver((entries) => {
+        entries.forEach((entry) => {
+            const batch = batchByImage.get(entry.target);
+            if (!entry.isIntersecting || !batch || batch.loaded) {
+                return;
+            }
+            batch.loaded = true;
+            batch.images.forEach((imageElement) => observer.unobserve(imageElement));
+            loadThumbnailBatch(batch);
+        });
+    }, { rootMargin: '300px' });
+    imageElements.forEach((imageElement) => observer.observe(imageElement));
+}
+
 function initializeFileThumbnails() {
-    document.querySelectorAll('.file-thumb').forEach((imageElement) => {
+    const imageElements = Array.from(document.querySelectorAll('.file-thumb'));
+    imageElements.forEach((imageElement) => {
         imageElement.addEventListener('error', function() {
             markThumbnailUnavailable(imageElement);
         });
 
-        if (imageElement.complete && imageElement.naturalWidth === 0) {
+        if (imageElement.getAttribute('src') && imageElement.complete && imageElement.naturalWidth === 0) {
             markThumbnailUnavailable(imageElement);
         }
     });
+
+    initializeThumbnailBatches(imageElements.filter((imageElement) => imageElement.dataset.src && !imageElement.getAttribute('src')));
 }
 
 document.querySelectorAll("#files a").forEach(item => {
@@ -1588,7 +2179,7 @@ function updatePlotCommand() {
         command += ` -t "${title}"`;
     }
 
-    const editions = 1;
+    const editions = getRequestedEditions();
     const edition_number = 1;
 
     command += ` -e ${editions} -x ${edition_number} -i "${tool}" -p "${material}"`;
@@ -1598,7 +2189,7 @@ function updatePlotCommand() {
     }
 
     const svgElement = getCurrentSvgElement();
-    const dimensions = extractSvgDimensions(svgElement);
+    const dimensions = svgElement ? extractSvgDimensions(svgElement) : currentSvgDimensions;
     if (dimensions) {
 
         // Option 1: Use mm returned by extractSvgDimensions
@@ -1677,6 +2268,33 @@ document.querySelector('#stop-plot-button').addEventListener('click', function()
     stopPlot();
 });
 
+document.querySelector('#next-edition-button').addEventListener('click', async function() {
+    if (this.disabled) {
+        return;
+    }
+    this.disabled = true;
+    try {
+        const response = await fetch(withDeviceParam('/plot/editions/continue'), { method: 'POST' });
+        if (!response.ok) {
+            showToggleServoStatus('No edition is waiting', true);
+        }
+    } catch (error) {
+        console.error('Failed to continue edition run:', error);
+    }
+    await refreshPlotterStatus();
+});
+
+document.querySelector('#resume-plot-button').addEventListener('click', function() {
+    if (!currentResumeEntry || this.disabled) {
+        return;
+    }
+    send_resume_request(currentResumeEntry)
+        .catch((error) => {
+            console.error('Failed to resume plot:', error);
+            window.alert(error.message || 'Failed to resume plot');
+        });
+});
+
 // Add event handler to Plot button
 document.querySelector('form[name=plot]').addEventListener("submit", function(event){
 
@@ -1702,6 +2320,7 @@ document.querySelector('form[name=plot]').addEventListener("submit", function(ev
 // On page load, check for ?plot= param and load that plot, else load the first
 window.addEventListener("load", function() {
     initializeThemeToggle();
+    initializeDeviceSelector();
     initializeUploadDropZone();
     initializePlaybackControls();
     initializeInfoModal();
@@ -1765,12 +2384,34 @@ function send_plot_request(filename, layer = null){
     requestParams.set('orientation', context.orientation || '');
     requestParams.set('edition', String(context.edition || 1));
     requestParams.set('editions', String(context.editions || 1));
+    if (context.editions > 1) {
+        // Plot every edition from one parsed document, pausing between copies
+        requestParams.set('edition_run', 'true');
+        requestParams.set('edition_confirm', String(Boolean(document.querySelector('input[name=edition_confirm]')?.checked)));
+    }
 
-    const requestQuery = requestParams.toString();
-    const request = requestQuery
-        ? `${buildPlotRequestPath(filename)}?${requestQuery}`
-        : buildPlotRequestPath(filename);
+    const request = buildPlotRequestPath(filename, requestParams);
+    return dispatch_plot_request(request, { cache: 'no-store' }, context, clientLogId, filename, layer);
+}
 
+// Send an API request to continue a halted plot where it stopped
+function send_resume_request(resumeEntry) {
+    const options = resumeEntry.options || {};
+    const filename = resumeEntry.file;
+    const layer = options.layer > 0 ? options.layer : null;
+    const context = { ...getCurrentPlotContext(filename, layer), title: options.title || '' };
+    const clientLogId = `${Date.now()}-${Math.random().toString(36).slice(2, 8)}`;
+    activePlotLogEntryId = clientLogId;
+    const params = new URLSearchParams();
+    if (currentDeviceName) {
+        params.set('device', currentDeviceName);
+    }
+    const queryString = params.toString();
+    const request = `/plot/resume/${encodeURIComponent(resumeEntry.id)}${queryString ? `?${queryString}` : ''}`;
+    return dispatch_plot_request(request, { method: 'POST', cache: 'no-store' }, context, clientLogId, filename, layer);
+}
+
+function dispatch_plot_request(request, fetchOptions, context, clientLogId, filename, layer) {
     preserveCountdownAfterStop = false;
     plotRequestInFlight = true;
     startPlotCountdown(currentPreviewEstimate?.plot_duration);
@@ -1788,7 +2429,7 @@ function send_plot_request(filename, layer = null){
         lifts: '-',
     });
 
-    return fetch(request, { cache: 'no-store' })
+    return fetch(request, fetchOptions)
         .then(async (response) => {
             if (response.status === 503) {
                 throw new Error('Plotter is busy');
@@ -1802,9 +2443,14 @@ function send_plot_request(filename, layer = null){
             const contentType = response.headers.get('content-type') || '';
             if (contentType.includes('application/json')) {
                 const payload = await response.json();
+                if (Array.isArray(payload?.plots)) {
+                    // Edition runs log every copy on the server; show those entries instead
+                    await loadPersistedPlotLog();
+                    return payload;
+                }
                 const metrics = payload?.metrics || {};
                 updatePlotLogEntry(clientLogId, {
-                    status: 'ok',
+                    status: payload?.status || 'ok',
                     title: payload?.title || context.title,
                     filename: payload?.filename || context.filename,
                     fileHash: payload?.file_hash || '-',
@@ -1847,5 +2493,7 @@ function send_plot_request(filename, layer = null){
             preserveCountdownAfterStop = false;
             stopPlotCountdown(!shouldPreserveCountdown);
             await refreshPlotterStatus();
+            await refreshResumeEntry(document.querySelector("form[name=plot] input[name=filename]")?.value);
+            await refreshFileHistory(filename);
         });
 }
\ No newline at end of file
@@ -0,0 +1,333 @@
+import json
+import logging
+import math
+import os
+import re
+import threading
+from xml.parsers import expat
+from xml.sax.saxutils import escape
+
+from compression import remove_precompressed, write_precompressed
+from metrics import time_operation
+from svg_library import get_physical_size_px, parse_view_box_size
+
+
+logger = logging.getLogger(__name__)
+
+INKSCAPE_NAMESPACE = 'http://www.inkscape.org/namespaces/inkscape'
+# Same rule as AxiDraw layers mode and main.js: the label starts with the layer number
+LAYER_LABEL_PATTERN = re.compile(r'^([1-9]\d*)(?:\b|\D)')
+NUMBER_PATTERN = re.compile(r'[-+]?(?:\d+\.\d*|\.\d+|\d+)(?:[eE][-+]?\d+)?')
+# Geometry attributes rounded by quantization; transforms keep full precision
+QUANTIZED_ATTRIBUTES = {'d', 'points', 'x', 'y', 'x1', 'y1', 'x2', 'y2', 'cx', 'cy', 'r', 'rx', 'ry', 'width', 'height'}
+PATH_COMMANDS = set('MmZzLlHhVvCcSsQqTtAa')
+PATH_SEPARATORS = set(' \t\r\n,')
+# Positions of the large-arc and sweep flags among the seven arguments of an arc
+ARC_FLAG_ARGUMENTS = (3, 4)
+TEXT_ELEMENTS = {'text', 'tspan', 'textPath'}
+MAX_PRECISION = 6
+# Precision chosen from the root viewBox while extracting
+AUTO_PRECISION = 'auto'
+# Long edge (px) the browser draws layer previews at; auto precision rounds to under one pixel of it
+LAYER_PREVIEW_EDGE_PX = 2048
+READ_CHUNK_BYTES = 64 * 1024
+DEFAULT_LAYER_CACHE_ENTRIES = 200
+# Cached artifacts counted towards the entry limit; .polylines files are written by svg_polylines
+CACHED_FILE_EXTENSIONS = ('.svg', '.polylines')
+
+
+def parse_layer_number(label):
+    """Return the layer number a label starts with, or None."""
+    match = LAYER_LABEL_PATTERN.match(label.strip())
+    return int(match.group(1)) if match else None
+
+
+def round_number(text, precision, previous_char=''):
+    """Round one number token to ``precision`` places, keeping it apart from the token before it."""
+    # Integers are left alone so flags and counts survive unchanged
+    if '.' not in text and 'e' not in text.lower():
+        return text
+    text = f"{float(text):.{precision}f}"
+    if '.' in text:
+        text = text.rstrip('0').rstrip('.')
+    if text in ('-0', ''):
+        text = '0'
+    # "1.5.5" is two numbers; keep them apart once rounding drops the dots
+    if previous_char and previous_char in '0123456789.':
+        text = ' ' + text
+    return text
+
+
+def quantize_numbers(value, precision):
+    """Round every decimal number in an attribute value to ``precision`` places."""
+    return NUMBER_PATTERN.sub(
+        lambda match: round_number(match.group(0), precision, match.string[match.start() - 1] if match.start() else ''),
+        value,
+    )
+
+
+def quantize_path_data(path_data, precision):
+    """Round the coordinates of path data one command at a time.
+
+    The large-arc and sweep flags of arc commands are single characters that may
+    be packed against the next number ("011.5" is 0, 1, 1.5), so they are copied
+    through instead of being read as part of a number.
+    """
+    parts = []
+    position = 0
+    command = None
+    argument_index = 0
+    while position < len(path_data):
+        char = path_data[position]
+        if char in PATH_COMMANDS:
+            command = char
+            argument_index = 0
+            parts.append(char)
+            position += 1
+            continue
+        if char in PATH_SEPARATORS:
+            parts.append(char)
+            position += 1
+            continue
+        if command in ('A', 'a') and argument_index % 7 in ARC_FLAG_ARGUMENTS and char in '01':
+            parts.append(char)
+            position += 1
+            argument_index += 1
+            continue
+
+        match = NUMBER_PATTERN.match(path_data, position)
+        if match is None:
+            # Like browsers, leave everything after the first error as it was
+            parts.append(path_data[position:])
+            break
+        parts.append(round_number(match.group(0), precision, path_data[position - 1] if position else ''))
+        position = match.end()
+        argument_index += 1
+
+    return ''.join(parts)
+
+
+def get_document_precision(attributes):
+    """Return the decimal places that keep rounding below one preview pixel for a root svg element."""
+    size = parse_view_box_size(attributes.get('viewBox')) or get_physical_size_px(attributes)
+    if not size:
+        return MAX_PRECISION
+    units_per_pixel = max(size) / LAYER_PREVIEW_EDGE_PX
+    return min(MAX_PRECISION, max(0, math.ceil(-math.log10(units_per_pixel))))
+
+
+def local_name(name):
+    """Strip the namespace prefix from a raw element or attribute name."""
+    return name.rsplit(':', 1)[-1]
+
+
+class LayerExtractor:
+    def __init__(self, output, layer_number=None, precision=None):
+        """Stream an SVG to ``output``, dropping numbered layers other than ``layer_number``.
+
+        Content outside numbered layers is kept, matching the browser preview filter.
+        With ``output`` None the file is only scanned for its layers. A ``precision``
+        of AUTO_PRECISION is picked from the root element's viewBox.
+        """
+        self.output = output
+        self.layer_number = layer_number
+        self.precision = precision
+        self.label_attributes = {'inkscape:label'}
+        self.layers = {}
+        self.depth = 0
+        self.skip_depth = 0
+        self.text_depth = 0
+        self.pending_start = None
+
+        self.parser = expat.ParserCreate()
+        self.parser.buffer_text = True
+        self.parser.ordered_attributes = True
+        self.parser.StartElementHandler = self.start_element
+        self.parser.EndElementHandler = self.end_element
+        self.parser.CharacterDataHandler = self.character_data
+
+    def close_pending_start(self):
+        """Finish a start tag that turned out to have content."""
+        if self.pending_start is not None:
+            self.output.write(self.pending_start + '>')
+            self.pending_start = None
+
+    def write(self, text):
+        """Write output text after any open start tag."""
+        self.close_pending_start()
+        self.output.write(text)
+
+    def start_element(self, name, attributes):
+        """Record layer labels and copy the element unless it sits in a dropped layer."""
+        pairs = list(zip(attributes[::2], attributes[1::2]))
+        for attribute_name, value in pairs:
+            if attribute_name.startswith('xmlns:') and value == INKSCAPE_NAMESPACE:
+                self.label_attributes.add(f"{attribute_name[len('xmlns:'):]}:label")
+
+        self.depth += 1
+        if self.depth == 1 and self.precision == AUTO_PRECISION:
+            self.precision = get_document_precision(dict(pairs))
+        if self.skip_depth:
+            self.skip_depth += 1
+        if local_name(name) == 'g':
+            label = next((value.strip() for key, value in pairs if key in self.label_attributes), None)
+            layer_number = parse_layer_number(label) if label else None
+            if layer_number is not None:
+                self.layers.setdefault(label, layer_number)
+                if not self.skip_depth and self.layer_number is not None and layer_number != self.layer_number:
+                    self.skip_depth = 1
+
+        if self.skip_depth or self.output is None:
+            return
+        if local_name(name) in TEXT_ELEMENTS:
+            self.text_depth += 1
+
+        parts = [f"<{name}"]
+        for attribute_name, value in pairs:
+            if self.precision is not None and self.depth > 1 and attribute_name == 'd':
+                value = quantize_path_data(value, self.precision)
+            elif self.precision is not None and self.depth > 1 and attribute_name in QUANTIZED_ATTRIBUTES:
+                value = quantize_numbers(value, self.precision)
+            parts.append(f' {attribute_name}="{escape(value, {chr(34): "&quot;"})}"')
+        self.close_pending_start()
+        self.pending_start = ''.join(parts)
+
+    def end_element(self, name):
+        """Close the element, as a self-closing tag when it had no content."""
+        self.depth -= 1
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        if self.output is None:
+            return
+        if local_name(name) in TEXT_ELEMENTS:
+            self.text_depth -= 1
+
+        if self.pending_start is not None:
+            self.output.write(self.pending_start + '/>')
+            self.pending_start = None
+        else:
+            self.output.write(f"</{name}>")
+
+    def character_data(self, data):
+        """Copy text, dropping whitespace between elements outside text content."""
+        if self.skip_depth or self.output is None:
+            return
+        if not self.text_depth and not data.strip():
+            return
+        self.write(escape(data))
+
+    def feed_file(self, svg_path):
+        """Parse the SVG in chunks so large files are never held in memory."""
+        with open(svg_path, 'rb') as svg_file:
+            for chunk in iter(lambda: svg_file.read(READ_CHUNK_BYTES), b''):
+                self.parser.Parse(chunk, False)
+        self.parser.Parse(b'', True)
+
+    def get_layers(self):
+        """Return the numbered layers seen, sorted like the layer menu in main.js."""
+        layers = [{'label': label, 'number': number} for label, number in self.layers.items()]
+        layers.sort(key=lambda layer: (layer['number'], layer['label']))
+        return layers
+
+
+def extract_svg_layer(svg_path, output_path, layer_number, precision=None):
+    """Write the SVG with only one numbered layer to ``output_path`` and return all layers."""
+    with time_operation('layer_extract'):
+        with open(output_path, 'w', encoding='utf-8') as output_file:
+            extractor = LayerExtractor(output_file, layer_number, precision)
+            extractor.feed_file(svg_path)
+    return extractor.get_layers()
+
+
+def list_svg_layers(svg_path):
+    """Return the numbered layers of an SVG without writing any output."""
+    extractor = LayerExtractor(None)
+    extractor.feed_file(svg_path)
+    return extractor.get_layers()
+
+
+class LayerCache:
+    def __init__(self, cache_dir, max_entries=None):
+        """Keep extracted layer SVGs and layer lists on disk, keyed by the artwork's content hash."""
+        self.cache_dir = os.environ.get('PLOT_LAYER_CACHE_DIR', cache_dir)
+        self.max_entries = max_entries or int(
+            os.environ.get('PLOT_LAYER_CACHE_ENTRIES', str(DEFAULT_LAYER_CACHE_ENTRIES))
+        )
+        self.lock = threading.Lock()
+
+    def build_path(self, content_hash, suffix):
+        """Return the cache file path of one derived artifact."""
+        return os.path.join(self.cache_dir, f"{content_hash}-{suffix}")
+
+    def write_atomically(self, path, write):
+        """Run ``write(temporary_path)`` and move the result into place."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temporary_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            result = write(temporary_path)
+            os.replace(temporary_path, path)
+        finally:
+            if os.path.exists(temporary_path):
+                os.remove(temporary_path)
+        return result
+
+    def get_layer_svg(self, svg_path, content_hash, layer_number, precision=None):
+        """Return the (path, cache hit) of a single-layer SVG, extracting it on a miss."""
+        suffix = f"layer{layer_number}" + (f"-p{precision}" if precision is not None else '')
+        layer_path = self.build_path(content_hash, f"{suffix}.svg")
+        if os.path.exists(layer_path):
+            return layer_path, True
+
+        layers = self.write_atomically(
+            layer_path,
+            lambda temporary_path: extract_svg_layer(svg_path, temporary_path, layer_number, precision),
+        )
+        self.store_layers(content_hash, layers)
+        try:
+            write_precompressed(layer_path)
+        except OSError as error:
+            logger.warning("Failed to precompress %s: %s", layer_path, error)
+        self.prune()
+        return layer_path, False
+
+    def get_layers(self, svg_path, content_hash):
+        """Return the (layer list, cache hit) of an SVG, scanning it on a miss."""
+        layers_path = self.build_path(content_hash, 'layers.json')
+        try:
+            with open(layers_path, encoding='utf-8') as layers_file:
+                return json.load(layers_file), True
+        except (OSError, json.JSONDecodeError):
+            pass
+
+        with time_operation('layer_scan'):
+            layers = list_svg_layers(svg_path)
+        self.store_layers(content_hash, layers)
+        return layers, False
+
+    def store_layers(self, content_hash, layers):
+        """Save the layer list found while extracting or scanning an SVG."""
+        def write(temporary_path):
+            with open(temporary_path, 'w', encoding='utf-8') as layers_file:
+                json.dump(layers, layers_file)
+
+        try:
+            self.write_atomically(self.build_path(content_hash, 'layers.json'), write)
+        except OSError as error:
+            logger.warning("Failed to cache layers for %s: %s", content_hash, error)
+
+    def prune(self):
+        """Delete the oldest extracted layers and polyline exports beyond the entry limit."""
+        with self.lock:
+            layer_files = sorted(
+                (os.path.getmtime(os.path.join(self.cache_dir, filename)), filename)
+                for filename in os.listdir(self.cache_dir)
+                if filename.endswith(CACHED_FILE_EXTENSIONS)
+            )
+            for _, filename in layer_files[:max(0, len(layer_files) - self.max_entries)]:
+                path = os.path.join(self.cache_dir, filename)
+                try:
+                    os.remove(path)
+                    remove_precompressed(path)
+                except OSError:
+                    continue
@@ -1,12 +1,24 @@
+import hashlib
+import logging
 import os
 import re
 from xml.etree import ElementTree as ET
 
-import cairosvg
+from backends import RendererUnavailableError, get_image_library, get_svg_renderer, has_image_library
+from metrics import time_operation
+
+
+logger = logging.getLogger(__name__)
 
 
 THUMBNAIL_SUFFIX = '-tn@2x.png'
 THUMBNAIL_LONG_EDGE_PX = 480
+# Long edge of each thumbnail tier; the 480 px PNG keeps the -tn@2x.png name
+THUMBNAIL_TIERS_PX = (120, 240, 480)
+THUMBNAIL_DEFAULT_PX = 240
+THUMBNAIL_DISPLAY_SIZES = '120px'
+THUMBNAIL_MIMETYPES = {'png': 'image/png', 'webp': 'image/webp'}
+THUMBNAIL_WEBP_QUALITY = 80
 SVG_LENGTH_UNIT_TO_PX = {
     '': 1,
     'px': 1,
@@ -28,20 +40,73 @@ def build_public_upload_url(relative_path):
     return f"/static/uploads/{normalize_relative_path(relative_path)}"
 
 
-def build_thumbnail_relative_path(relative_path):
-    """Return the thumbnail path for a given uploaded SVG path."""
+def build_thumbnail_relative_path(relative_path, size=THUMBNAIL_LONG_EDGE_PX, image_format='png'):
+    """Return the thumbnail path for a given uploaded SVG path, tier size and format."""
     base_path, _ = os.path.splitext(relative_path)
-    return normalize_relative_path(f"{base_path}{THUMBNAIL_SUFFIX}")
+    if size == THUMBNAIL_LONG_EDGE_PX and image_format == 'png':
+        return normalize_relative_path(f"{base_path}{THUMBNAIL_SUFFIX}")
+    return normalize_relative_path(f"{base_path}-tn-{size}.{image_format}")
 
 
-def build_file_entry(relative_path):
-    """Build the metadata payload used by the UI for one SVG file."""
-    normalized_path = normalize_relative_path(relative_path)
+def get_thumbnail_formats():
+    """Return the thumbnail formats generated here: WebP (when Pillow is installed) and PNG."""
+    webp_enabled = os.environ.get('PLOT_THUMBNAIL_WEBP', '1').lower() not in ('0', 'false', 'no', 'off')
+    if webp_enabled and has_image_library():
+        return ('webp', 'png')
+    return ('png',)
+
+
+def build_thumbnail_relative_paths(relative_path, image_formats=None):
+    """Return {(size, format): relative path} for every thumbnail of an SVG."""
     return {
+        (size, image_format): build_thumbnail_relative_path(relative_path, size, image_format)
+        for image_format in (image_formats or THUMBNAIL_MIMETYPES)
+        for size in THUMBNAIL_TIERS_PX
+    }
+
+
+def build_content_fingerprint(mtime_ns, size):
+    """Return a short version token that changes whenever an SVG is rewritten.
+
+    Built from the same mtime and size rsync compares, so the library can be
+    versioned without reading every file.
+    """
+    return hashlib.md5(f"{mtime_ns}:{size}".encode('ascii')).hexdigest()[:12]
+
+
+def build_thumbnail_url(relative_path, fingerprint, size, image_format):
+    """Build the versioned, immutable-cacheable URL of one thumbnail."""
+    return f"/thumbnails/{fingerprint}/{size}/{image_format}/{normalize_relative_path(relative_path)}"
+
+
+def build_thumbnail_srcset(relative_path, fingerprint, image_format):
+    """Build a srcset attribute listing every thumbnail tier of one format."""
+    return ', '.join(
+        f"{build_thumbnail_url(relative_path, fingerprint, size, image_format)} {size}w"
+        for size in THUMBNAIL_TIERS_PX
+    )
+
+
+def build_file_entry(relative_path, fingerprint=None, image_formats=('png',)):
+    """Build the metadata payload used by the UI for one SVG file.
+
+    With a content fingerprint the thumbnails use versioned URLs and srcset data.
+    """
+    normalized_path = normalize_relative_path(relative_path)
+    entry = {
         'filename': normalized_path,
         'svg_url': build_public_upload_url(normalized_path),
         'thumbnail_url': build_public_upload_url(build_thumbnail_relative_path(normalized_path)),
     }
+    if fingerprint:
+        entry['fingerprint'] = fingerprint
+        entry['thumbnail_url'] = build_thumbnail_url(normalized_path, fingerprint, THUMBNAIL_DEFAULT_PX, 'png')
+        entry['thumbnail_sizes'] = THUMBNAIL_DISPLAY_SIZES
+        entry['thumbnail_srcset'] = build_thumbnail_srcset(normalized_path, fingerprint, 'png')
+        entry['thumbnail_webp_srcset'] = (
+            build_thumbnail_srcset(normalized_path, fingerprint, 'webp') if 'webp' in image_formats else None
+        )
+    return entry
 
 
 def parse_svg_length_to_px(value):
@@ -66,28 +131,61 @@ def parse_svg_length_to_px(value):
     return numeric_value * unit_scale
 
 
-def get_svg_dimensions_px(svg_path):
-    """Determine the SVG canvas dimensions in pixels from viewBox or size attributes."""
+def read_svg_root_attributes(svg_path, purpose='sizing'):
+    """Return the attributes of an SVG's root element without parsing the rest of the file."""
     try:
-        root = ET.parse(svg_path).getroot()
+        with open(svg_path, 'rb') as svg_file:
+            for _, element in ET.iterparse(svg_file, events=('start',)):
+                return dict(element.attrib)
     except (ET.ParseError, OSError) as error:
-        print(f"[WARN] Unable to parse SVG for thumbnail sizing: {svg_path} ({error})")
+        logger.warning("Unable to parse SVG for %s: %s (%s)", purpose, svg_path, error)
+    return None
+
+
+def parse_view_box_size(view_box):
+    """Return the (width, height) of a viewBox attribute, or None."""
+    values = [part for part in re.split(r'[\s,]+', (view_box or '').strip()) if part]
+    if len(values) != 4:
+        return None
+    try:
+        width = abs(float(values[2]))
+        height = abs(float(values[3]))
+    except ValueError:
+        return None
+    return (width, height) if width > 0 and height > 0 else None
+
+
+def get_physical_size_px(attributes):
+    """Return the physical size (96 DPI px) of a root element from its width/height units.
+
+    The viewBox, in user units taken as px, is only used when width or height is
+    missing or relative.
+    """
+    width = parse_svg_length_to_px(attributes.get('width'))
+    height = parse_svg_length_to_px(attributes.get('height'))
+    if width and height:
+        return width, height
+    return parse_view_box_size(attributes.get('viewBox'))
+
+
+def get_svg_physical_size_px(svg_path):
+    """Return the physical size of an SVG in 96 DPI px, or None."""
+    attributes = read_svg_root_attributes(svg_path)
+    return get_physical_size_px(attributes) if attributes is not None else None
+
+
+def get_svg_dimensions_px(svg_path):
+    """Determine the SVG canvas aspect dimensions in pixels from viewBox or size attributes."""
+    attributes = read_svg_root_attributes(svg_path, 'thumbnail sizing')
+    if attributes is None:
         return None
 
-    view_box = root.attrib.get('viewBox')
-    if view_box:
-        values = [part for part in re.split(r'[\s,]+', view_box.strip()) if part]
-        if len(values) == 4:
-            try:
-                width = abs(float(values[2]))
-                height = abs(float(values[3]))
-                if width > 0 and height > 0:
-                    return width, height
-            except ValueError:
-                pass
-
-    width = parse_svg_length_to_px(root.attrib.get('width'))
-    height = parse_svg_length_to_px(root.attrib.get('height'))
+    view_box_size = parse_view_box_size(attributes.get('viewBox'))
+    if view_box_size:
+        return view_box_size
+
+    width = parse_svg_length_to_px(attributes.get('width'))
+    height = parse_svg_length_to_px(attributes.get('height'))
     if width and height:
         return width, height
 
@@ -96,18 +194,59 @@ def get_svg_dimensions_px(svg_path):
 
 def generate_svg_thumbnail(svg_path, thumbnail_path):
     """Render a PNG thumbnail for an SVG, preserving portrait or landscape orientation."""
+    render_svg_png(svg_path, thumbnail_path, THUMBNAIL_LONG_EDGE_PX)
+
+
+def generate_svg_thumbnails(svg_path, thumbnail_paths):
+    """Render every thumbnail tier of an SVG.
+
+    ``thumbnail_paths`` maps (size, format) to output paths and must include the
+    480 px PNG. With Pillow the smaller tiers and WebP files are resized from that
+    one render; without it each PNG tier is rendered by CairoSVG and WebP is skipped.
+    """
+    generate_svg_thumbnail(svg_path, thumbnail_paths[(THUMBNAIL_LONG_EDGE_PX, 'png')])
+
+    try:
+        image_library = get_image_library()
+    except RendererUnavailableError:
+        image_library = None
+
+    if image_library is None:
+        for (size, image_format), thumbnail_path in thumbnail_paths.items():
+            if image_format == 'png' and size != THUMBNAIL_LONG_EDGE_PX:
+                render_svg_png(svg_path, thumbnail_path, size)
+        return
+
+    with time_operation('thumbnail_resize'):
+        with image_library.open(thumbnail_paths[(THUMBNAIL_LONG_EDGE_PX, 'png')]) as full_size_image:
+            full_size_image.load()
+            for (size, image_format), thumbnail_path in thumbnail_paths.items():
+                if size == THUMBNAIL_LONG_EDGE_PX and image_format == 'png':
+                    continue
+                tier_image = full_size_image.copy()
+                tier_image.thumbnail((size, size), image_library.LANCZOS)
+                if image_format == 'webp':
+                    tier_image.save(thumbnail_path, 'WEBP', quality=THUMBNAIL_WEBP_QUALITY, method=4)
+                else:
+                    tier_image.save(thumbnail_path, 'PNG', optimize=True)
+
+
+def render_svg_png(svg_path, png_path, long_edge_px):
+    """Render one PNG of an SVG with the given long edge using CairoSVG."""
     dimensions = get_svg_dimensions_px(svg_path)
-    output_kwargs = {'output_width': THUMBNAIL_LONG_EDGE_PX}
+    output_kwargs = {'output_width': long_edge_px}
 
     if dimensions:
         width, height = dimensions
         if height > width:
-            output_kwargs = {'output_height': THUMBNAIL_LONG_EDGE_PX}
+            output_kwargs = {'output_height': long_edge_px}
 
-    os.makedirs(os.path.dirname(thumbnail_path), exist_ok=True)
-    cairosvg.svg2png(url=svg_path, write_to=thumbnail_path, **output_kwargs)
+    os.makedirs(os.path.dirname(png_path), exist_ok=True)
+    with time_operation('thumbnail_render'):
+        get_svg_renderer().svg2png(url=svg_path, write_to=png_path, **output_kwargs)
 
 
 def generate_svg_pdf_bytes(svg_path):
     """Render an SVG file to PDF bytes for on-demand download responses."""
-    return cairosvg.svg2pdf(url=svg_path)
\ No newline at end of file
+    with time_operation('pdf_render'):
+        return get_svg_renderer().svg2pdf(url=svg_path)
\ No newline at end of file
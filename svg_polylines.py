@@ -0,0 +1,568 @@
+"""Export the drawable geometry of an SVG as a compact binary polyline stream.
+
+Paths, basic shapes and nested <svg> viewports are flattened in document order
+with their transforms applied. <use> references are not followed: the parser
+streams the file once and a reference may point at content further down, so
+cloned geometry is missing from the stream (the number skipped is logged).
+Clipping, markers and text are not drawn either.
+"""
+from array import array
+import logging
+import math
+import os
+import re
+import struct
+import sys
+from xml.parsers import expat
+
+from compression import write_precompressed
+from metrics import time_operation
+from svg_layers import INKSCAPE_NAMESPACE, READ_CHUNK_BYTES, parse_layer_number
+from svg_library import get_physical_size_px, parse_svg_length_to_px
+
+
+logger = logging.getLogger(__name__)
+
+# Binary polyline stream: a fixed header, then little-endian Int16 values. Each
+# polyline is POLYLINE_MARKER, its point count and that many (dx, dy) pairs; the
+# first pair is the pen-up move from the previous polyline's last point.
+POLYLINE_MIMETYPE = 'application/x-plot-polylines'
+POLYLINE_EXTENSION = '.polylines'
+POLYLINE_MAGIC = b'PLY1'
+POLYLINE_FORMAT_VERSION = 2
+# magic, version, flags, physical width/height (mm), root viewBox, grid origin and grid unit, polyline and value counts
+HEADER_FORMAT = '<4sHH9fII'
+HEADER_BYTES = struct.calcsize(HEADER_FORMAT)
+POLYLINE_MARKER = -32768
+GRID_STEPS = 32767
+MAX_POLYLINE_POINTS = 32767
+SVG_NAMESPACE = 'http://www.w3.org/2000/svg'
+PX_PER_MM = 96 / 25.4
+# Containers whose content is never plotted
+SKIPPED_ELEMENTS = {'defs', 'clipPath', 'mask', 'marker', 'pattern', 'symbol', 'metadata', 'title', 'desc', 'style', 'script', 'text'}
+SHAPE_ELEMENTS = {'path', 'line', 'polyline', 'polygon', 'rect', 'circle', 'ellipse'}
+# Flattened curves stay within the drawing's long edge / CURVE_RESOLUTION of the true curve
+CURVE_RESOLUTION = 4000
+MAX_CURVE_SEGMENTS = 128
+PATH_TOKEN_PATTERN = re.compile(r'[MmLlHhVvCcSsQqTtAaZz]|[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+TRANSFORM_PATTERN = re.compile(r'(matrix|translate|scale|rotate|skewX|skewY)\s*\(([^)]*)\)')
+NUMBER_PATTERN = re.compile(r'[-+]?(?:\d+\.?\d*|\.\d+)(?:[eE][-+]?\d+)?')
+IDENTITY = (1.0, 0.0, 0.0, 1.0, 0.0, 0.0)
+ALIGNMENT_FACTORS = {'Min': 0.0, 'Mid': 0.5, 'Max': 1.0}
+
+
+def multiply(first, second):
+    """Return the affine matrix applying ``second`` and then ``first``."""
+    a1, b1, c1, d1, e1, f1 = first
+    a2, b2, c2, d2, e2, f2 = second
+    return (
+        a1 * a2 + c1 * b2,
+        b1 * a2 + d1 * b2,
+        a1 * c2 + c1 * d2,
+        b1 * c2 + d1 * d2,
+        a1 * e2 + c1 * f2 + e1,
+        b1 * e2 + d1 * f2 + f1,
+    )
+
+
+def parse_transform(value):
+    """Parse an SVG transform list into one affine matrix (a, b, c, d, e, f)."""
+    matrix = IDENTITY
+    for name, arguments in TRANSFORM_PATTERN.findall(value or ''):
+        numbers = [float(number) for number in NUMBER_PATTERN.findall(arguments)]
+        if name == 'matrix' and len(numbers) == 6:
+            step = tuple(numbers)
+        elif name == 'translate' and numbers:
+            step = (1.0, 0.0, 0.0, 1.0, numbers[0], numbers[1] if len(numbers) > 1 else 0.0)
+        elif name == 'scale' and numbers:
+            step = (numbers[0], 0.0, 0.0, numbers[1] if len(numbers) > 1 else numbers[0], 0.0, 0.0)
+        elif name == 'rotate' and numbers:
+            angle = math.radians(numbers[0])
+            cos_angle, sin_angle = math.cos(angle), math.sin(angle)
+            step = (cos_angle, sin_angle, -sin_angle, cos_angle, 0.0, 0.0)
+            if len(numbers) == 3:
+                center_x, center_y = numbers[1], numbers[2]
+                step = multiply(multiply((1.0, 0.0, 0.0, 1.0, center_x, center_y), step), (1.0, 0.0, 0.0, 1.0, -center_x, -center_y))
+        elif name == 'skewX' and numbers:
+            step = (1.0, 0.0, math.tan(math.radians(numbers[0])), 1.0, 0.0, 0.0)
+        elif name == 'skewY' and numbers:
+            step = (1.0, math.tan(math.radians(numbers[0])), 0.0, 1.0, 0.0, 0.0)
+        else:
+            continue
+        matrix = multiply(matrix, step)
+    return matrix
+
+
+def parse_viewport_length(value, reference):
+    """Parse a nested viewport's x/y/width/height in the parent's user units; percentages use ``reference``."""
+    text = (value or '').strip()
+    if text.endswith('%'):
+        return parse_float(text[:-1]) * reference / 100
+    length = parse_svg_length_to_px(text)
+    return length if length is not None else parse_float(text)
+
+
+def build_viewport_transform(attributes, parent_viewport):
+    """Return the (matrix, viewport size) a nested svg element establishes (SVG 1.1 7.8)."""
+    parent_width, parent_height = parent_viewport
+    x = parse_viewport_length(attributes.get('x'), parent_width)
+    y = parse_viewport_length(attributes.get('y'), parent_height)
+    width = parse_viewport_length(attributes.get('width', '100%'), parent_width)
+    height = parse_viewport_length(attributes.get('height', '100%'), parent_height)
+    values = [float(number) for number in NUMBER_PATTERN.findall(attributes.get('viewBox', ''))]
+    if len(values) != 4 or values[2] <= 0 or values[3] <= 0:
+        return (1.0, 0.0, 0.0, 1.0, x, y), (width, height)
+
+    view_x, view_y, view_width, view_height = values
+    scale_x, scale_y = width / view_width, height / view_height
+    align, _, meet_or_slice = (attributes.get('preserveAspectRatio') or 'xMidYMid meet').strip().partition(' ')
+    align_x = align_y = 0.0
+    if align != 'none':
+        scale_x = scale_y = max(scale_x, scale_y) if meet_or_slice.strip() == 'slice' else min(scale_x, scale_y)
+        align_x = ALIGNMENT_FACTORS.get(align[1:4], 0.5)
+        align_y = ALIGNMENT_FACTORS.get(align[5:8], 0.5)
+    matrix = (
+        scale_x,
+        0.0,
+        0.0,
+        scale_y,
+        x + align_x * (width - view_width * scale_x) - view_x * scale_x,
+        y + align_y * (height - view_height * scale_y) - view_y * scale_y,
+    )
+    return matrix, (view_width, view_height)
+
+
+def parse_style(attributes):
+    """Return presentation properties from the style attribute merged over plain attributes."""
+    properties = {name: attributes[name] for name in ('display', 'visibility') if name in attributes}
+    for declaration in attributes.get('style', '').split(';'):
+        name, _, value = declaration.partition(':')
+        if value:
+            properties[name.strip()] = value.strip()
+    return properties
+
+
+def parse_float(value, default=0.0):
+    """Parse a length attribute in user units; units and percentages are ignored."""
+    match = NUMBER_PATTERN.match((value or '').strip())
+    return float(match.group(0)) if match else default
+
+
+def count_bezier_segments(second_differences, degree, tolerance):
+    """Return how many segments keep a Bezier curve within ``tolerance`` (Wang's formula)."""
+    largest = max(math.hypot(dx, dy) for dx, dy in second_differences)
+    segments = math.ceil(math.sqrt(degree * (degree - 1) / 8 * largest / tolerance)) if largest else 1
+    return max(1, min(MAX_CURVE_SEGMENTS, segments))
+
+
+def count_arc_segments(sweep_angle, radius, tolerance):
+    """Return how many chords keep an arc of ``radius`` within ``tolerance`` of the curve."""
+    if radius <= tolerance:
+        return max(1, min(MAX_CURVE_SEGMENTS, math.ceil(abs(sweep_angle) / (math.pi / 2))))
+    segments = math.ceil(abs(sweep_angle) / (2 * math.acos(1 - tolerance / radius)))
+    return max(1, min(MAX_CURVE_SEGMENTS, segments))
+
+
+def flatten_cubic(points, start, control1, control2, end, tolerance):
+    """Append points approximating a cubic Bezier curve (the start point is already present)."""
+    segments = count_bezier_segments((
+        (start[0] - 2 * control1[0] + control2[0], start[1] - 2 * control1[1] + control2[1]),
+        (control1[0] - 2 * control2[0] + end[0], control1[1] - 2 * control2[1] + end[1]),
+    ), 3, tolerance)
+    for step in range(1, segments + 1):
+        t = step / segments
+        u = 1 - t
+        points.append((
+            u * u * u * start[0] + 3 * u * u * t * control1[0] + 3 * u * t * t * control2[0] + t * t * t * end[0],
+            u * u * u * start[1] + 3 * u * u * t * control1[1] + 3 * u * t * t * control2[1] + t * t * t * end[1],
+        ))
+
+
+def flatten_quadratic(points, start, control, end, tolerance):
+    """Append points approximating a quadratic Bezier curve."""
+    segments = count_bezier_segments((
+        (start[0] - 2 * control[0] + end[0], start[1] - 2 * control[1] + end[1]),
+    ), 2, tolerance)
+    for step in range(1, segments + 1):
+        t = step / segments
+        u = 1 - t
+        points.append((
+            u * u * start[0] + 2 * u * t * control[0] + t * t * end[0],
+            u * u * start[1] + 2 * u * t * control[1] + t * t * end[1],
+        ))
+
+
+def flatten_arc(points, start, radius_x, radius_y, rotation, large_arc, sweep, end, tolerance):
+    """Append points approximating an elliptical arc, converted to center form (SVG 1.1 F.6.5)."""
+    if start == end:
+        return
+    radius_x, radius_y = abs(radius_x), abs(radius_y)
+    if not radius_x or not radius_y:
+        points.append(end)
+        return
+
+    angle = math.radians(rotation)
+    cos_angle, sin_angle = math.cos(angle), math.sin(angle)
+    half_dx, half_dy = (start[0] - end[0]) / 2, (start[1] - end[1]) / 2
+    x1 = cos_angle * half_dx + sin_angle * half_dy
+    y1 = -sin_angle * half_dx + cos_angle * half_dy
+    scale = (x1 * x1) / (radius_x * radius_x) + (y1 * y1) / (radius_y * radius_y)
+    if scale > 1:
+        radius_x *= math.sqrt(scale)
+        radius_y *= math.sqrt(scale)
+
+    numerator = radius_x ** 2 * radius_y ** 2 - radius_x ** 2 * y1 ** 2 - radius_y ** 2 * x1 ** 2
+    denominator = radius_x ** 2 * y1 ** 2 + radius_y ** 2 * x1 ** 2
+    factor = math.sqrt(max(0.0, numerator / denominator)) if denominator else 0.0
+    if large_arc == sweep:
+        factor = -factor
+    center_x1 = factor * radius_x * y1 / radius_y
+    center_y1 = -factor * radius_y * x1 / radius_x
+    center_x = cos_angle * center_x1 - sin_angle * center_y1 + (start[0] + end[0]) / 2
+    center_y = sin_angle * center_x1 + cos_angle * center_y1 + (start[1] + end[1]) / 2
+
+    start_angle = math.atan2((y1 - center_y1) / radius_y, (x1 - center_x1) / radius_x)
+    end_angle = math.atan2((-y1 - center_y1) / radius_y, (-x1 - center_x1) / radius_x)
+    delta = end_angle - start_angle
+    if sweep and delta < 0:
+        delta += 2 * math.pi
+    elif not sweep and delta > 0:
+        delta -= 2 * math.pi
+
+    segments = count_arc_segments(delta, max(radius_x, radius_y), tolerance)
+    for step in range(1, segments + 1):
+        theta = start_angle + delta * step / segments
+        x = radius_x * math.cos(theta)
+        y = radius_y * math.sin(theta)
+        points.append((cos_angle * x - sin_angle * y + center_x, sin_angle * x + cos_angle * y + center_y))
+
+
+def parse_path_data(path_data, tolerance):
+    """Convert SVG path data into a list of polylines (lists of points) in user units."""
+    tokens = PATH_TOKEN_PATTERN.findall(path_data or '')
+    polylines = []
+    points = None
+    position = (0.0, 0.0)
+    subpath_start = position
+    last_control = None
+    command = None
+    index = 0
+
+    def read_number():
+        nonlocal index
+        value = float(tokens[index])
+        index += 1
+        return value
+
+    def read_flag():
+        # Arc flags may be packed without separators, e.g. "a5 5 0 0110 10"
+        nonlocal index
+        token = tokens[index]
+        if len(token) > 1 and token[0] in '01':
+            tokens[index] = token[1:]
+            return token[0] == '1'
+        index += 1
+        return float(token) != 0
+
+    while index < len(tokens):
+        token = tokens[index]
+        if token.isalpha():
+            command = token
+            index += 1
+            if command in 'Zz':
+                if points is not None:
+                    points.append(subpath_start)
+                position = subpath_start
+                points = None
+                last_control = None
+                continue
+        elif command is None:
+            break
+
+        relative = command.islower()
+        origin = position if relative else (0.0, 0.0)
+        upper = command.upper()
+        try:
+            if upper == 'M':
+                position = (origin[0] + read_number(), origin[1] + read_number())
+                subpath_start = position
+                points = [position]
+                polylines.append(points)
+                # Coordinates after the first pair of a moveto are implicit linetos
+                command = 'l' if relative else 'L'
+                last_control = None
+                continue
+
+            if points is None:
+                points = [position]
+                polylines.append(points)
+
+            control = None
+            if upper == 'L':
+                position = (origin[0] + read_number(), origin[1] + read_number())
+                points.append(position)
+            elif upper == 'H':
+                position = ((position[0] if relative else 0.0) + read_number(), position[1])
+                points.append(position)
+            elif upper == 'V':
+                position = (position[0], (position[1] if relative else 0.0) + read_number())
+                points.append(position)
+            elif upper in ('C', 'S'):
+                if upper == 'C':
+                    control1 = (origin[0] + read_number(), origin[1] + read_number())
+                elif last_control and last_control[1] == 'cubic':
+                    control1 = (2 * position[0] - last_control[0][0], 2 * position[1] - last_control[0][1])
+                else:
+                    control1 = position
+                control2 = (origin[0] + read_number(), origin[1] + read_number())
+                end = (origin[0] + read_number(), origin[1] + read_number())
+                flatten_cubic(points, position, control1, control2, end, tolerance)
+                position = end
+                control = (control2, 'cubic')
+            elif upper in ('Q', 'T'):
+                if upper == 'Q':
+                    control1 = (origin[0] + read_number(), origin[1] + read_number())
+                elif last_control and last_control[1] == 'quadratic':
+                    control1 = (2 * position[0] - last_control[0][0], 2 * position[1] - last_control[0][1])
+                else:
+                    control1 = position
+                end = (origin[0] + read_number(), origin[1] + read_number())
+                flatten_quadratic(points, position, control1, end, tolerance)
+                position = end
+                control = (control1, 'quadratic')
+            elif upper == 'A':
+                radius_x, radius_y, rotation = read_number(), read_number(), read_number()
+                large_arc, sweep = read_flag(), read_flag()
+                end = (origin[0] + read_number(), origin[1] + read_number())
+                flatten_arc(points, position, radius_x, radius_y, rotation, large_arc, sweep, end, tolerance)
+                position = end
+            else:
+                break
+            last_control = control
+        except (IndexError, ValueError):
+            # Like browsers, render the path up to the first error
+            break
+
+    return polylines
+
+
+def build_ellipse(center_x, center_y, radius_x, radius_y, tolerance):
+    """Return a closed polyline approximating an ellipse."""
+    segments = count_arc_segments(2 * math.pi, max(radius_x, radius_y), tolerance)
+    points = [
+        (center_x + radius_x * math.cos(2 * math.pi * step / segments), center_y + radius_y * math.sin(2 * math.pi * step / segments))
+        for step in range(segments)
+    ]
+    points.append(points[0])
+    return points
+
+
+def build_shape_polylines(name, attributes, tolerance):
+    """Return the polylines of one drawable element in its own user units."""
+    if name == 'path':
+        return parse_path_data(attributes.get('d', ''), tolerance)
+    if name == 'line':
+        return [[
+            (parse_float(attributes.get('x1')), parse_float(attributes.get('y1'))),
+            (parse_float(attributes.get('x2')), parse_float(attributes.get('y2'))),
+        ]]
+    if name in ('polyline', 'polygon'):
+        numbers = [float(number) for number in NUMBER_PATTERN.findall(attributes.get('points', ''))]
+        points = list(zip(numbers[0::2], numbers[1::2]))
+        if name == 'polygon' and points:
+            points.append(points[0])
+        return [points] if points else []
+    if name == 'rect':
+        x, y = parse_float(attributes.get('x')), parse_float(attributes.get('y'))
+        width, height = parse_float(attributes.get('width')), parse_float(attributes.get('height'))
+        if width <= 0 or height <= 0:
+            return []
+        return [[(x, y), (x + width, y), (x + width, y + height), (x, y + height), (x, y)]]
+    if name == 'circle':
+        radius = parse_float(attributes.get('r'))
+        if radius <= 0:
+            return []
+        return [build_ellipse(parse_float(attributes.get('cx')), parse_float(attributes.get('cy')), radius, radius, tolerance)]
+    if name == 'ellipse':
+        radius_x, radius_y = parse_float(attributes.get('rx')), parse_float(attributes.get('ry'))
+        if radius_x <= 0 or radius_y <= 0:
+            return []
+        return [build_ellipse(parse_float(attributes.get('cx')), parse_float(attributes.get('cy')), radius_x, radius_y, tolerance)]
+    return []
+
+
+class PolylineCollector:
+    def __init__(self, layer_number=None):
+        """Stream an SVG and collect its drawable geometry as polylines in document order.
+
+        Numbered layers other than ``layer_number`` are dropped; content outside
+        numbered layers is kept, like the layer preview.
+        """
+        self.layer_number = layer_number
+        self.polylines = []
+        self.stack = []
+        self.skip_depth = 0
+        self.view_box = None
+        self.size_px = None
+        self.tolerance = 1.0
+        self.skipped_use_count = 0
+
+        self.parser = expat.ParserCreate(namespace_separator=' ')
+        self.parser.StartElementHandler = self.start_element
+        self.parser.EndElementHandler = self.end_element
+
+    def read_root(self, attributes):
+        """Take the viewBox (user units) and physical size of the outermost svg element."""
+        values = [float(number) for number in NUMBER_PATTERN.findall(attributes.get('viewBox', ''))]
+        # Physical size from width/height units, like queued jobs; the viewBox in px only without them
+        self.size_px = get_physical_size_px(attributes)
+        if len(values) == 4 and values[2] > 0 and values[3] > 0:
+            self.view_box = tuple(values)
+        elif self.size_px:
+            self.view_box = (0.0, 0.0, self.size_px[0], self.size_px[1])
+        else:
+            self.view_box = (0.0, 0.0, 0.0, 0.0)
+        self.tolerance = (max(self.view_box[2], self.view_box[3]) or 1.0) / CURVE_RESOLUTION
+
+    def start_element(self, name, attributes):
+        """Track transforms and visibility, and collect the geometry of shapes."""
+        namespace, _, local = name.rpartition(' ')
+        if self.skip_depth:
+            self.skip_depth += 1
+            return
+
+        is_root = not self.stack
+        if is_root:
+            self.read_root(attributes)
+        parent_matrix, viewport = self.stack[-1] if self.stack else (IDENTITY, self.view_box[2:])
+
+        style = parse_style(attributes)
+        hidden = style.get('display') == 'none' or style.get('visibility') in ('hidden', 'collapse')
+        skipped = hidden or (namespace in ('', SVG_NAMESPACE) and local in SKIPPED_ELEMENTS)
+        if local == 'g' and not skipped and self.layer_number is not None:
+            label = attributes.get(f"{INKSCAPE_NAMESPACE} label")
+            layer_number = parse_layer_number(label) if label else None
+            skipped = layer_number is not None and layer_number != self.layer_number
+        if skipped:
+            self.skip_depth = 1
+            return
+        if local == 'use':
+            self.skipped_use_count += 1
+
+        matrix = multiply(parent_matrix, parse_transform(attributes.get('transform')))
+        if local == 'svg' and not is_root:
+            viewport_matrix, viewport = build_viewport_transform(attributes, viewport)
+            matrix = multiply(matrix, viewport_matrix)
+        self.stack.append((matrix, viewport))
+        if local in SHAPE_ELEMENTS and namespace in ('', SVG_NAMESPACE):
+            scale = math.sqrt(abs(matrix[0] * matrix[3] - matrix[1] * matrix[2])) or 1.0
+            a, b, c, d, e, f = matrix
+            for polyline in build_shape_polylines(local, attributes, self.tolerance / scale):
+                if polyline:
+                    self.polylines.append([(a * x + c * y + e, b * x + d * y + f) for x, y in polyline])
+
+    def end_element(self, name):
+        """Leave an element."""
+        if self.skip_depth:
+            self.skip_depth -= 1
+            return
+        self.stack.pop()
+
+    def feed_file(self, svg_path):
+        """Parse the SVG in chunks."""
+        with open(svg_path, 'rb') as svg_file:
+            for chunk in iter(lambda: svg_file.read(READ_CHUNK_BYTES), b''):
+                self.parser.Parse(chunk, False)
+        self.parser.Parse(b'', True)
+
+
+def round_to_float32(value, direction):
+    """Return the float32 nearest ``value`` that is not above (direction -1) or below (direction 1) it."""
+    rounded = struct.unpack('<f', struct.pack('<f', value))[0]
+    while (rounded - value) * direction < 0:
+        rounded = struct.unpack('<f', struct.pack('<f', rounded + direction * max(abs(rounded) * 2 ** -23, 1e-45)))[0]
+    return rounded
+
+
+def encode_polylines(polylines, view_box, size_px):
+    """Quantize polylines to an Int16 grid and delta-encode them with pen-up markers."""
+    min_x = min((x for polyline in polylines for x, _ in polyline), default=0.0)
+    min_y = min((y for polyline in polylines for _, y in polyline), default=0.0)
+    max_x = max((x for polyline in polylines for x, _ in polyline), default=0.0)
+    max_y = max((y for polyline in polylines for _, y in polyline), default=0.0)
+    # The grid is quantized against the float32 origin and unit the header stores, so
+    # decoded points stay within half a step and never pass GRID_STEPS
+    origin_x = round_to_float32(min_x, -1)
+    origin_y = round_to_float32(min_y, -1)
+    unit = round_to_float32(max(max_x - origin_x, max_y - origin_y) / GRID_STEPS, 1) or 1.0
+
+    values = array('h')
+    polyline_count = 0
+    previous_x = previous_y = 0
+    for polyline in polylines:
+        quantized = []
+        for x, y in polyline:
+            point = (round((x - origin_x) / unit), round((y - origin_y) / unit))
+            if not quantized or quantized[-1] != point:
+                quantized.append(point)
+        # Very long polylines continue from their last point in the next chunk
+        for chunk_start in range(0, max(1, len(quantized) - 1), MAX_POLYLINE_POINTS - 1):
+            chunk = quantized[chunk_start:chunk_start + MAX_POLYLINE_POINTS]
+            values.append(POLYLINE_MARKER)
+            values.append(len(chunk))
+            for x, y in chunk:
+                values.append(x - previous_x)
+                values.append(y - previous_y)
+                previous_x, previous_y = x, y
+            polyline_count += 1
+
+    width_mm, height_mm = (size_px[0] / PX_PER_MM, size_px[1] / PX_PER_MM) if size_px else (0.0, 0.0)
+    header = struct.pack(
+        HEADER_FORMAT,
+        POLYLINE_MAGIC,
+        POLYLINE_FORMAT_VERSION,
+        0,
+        width_mm,
+        height_mm,
+        *view_box,
+        origin_x,
+        origin_y,
+        unit,
+        polyline_count,
+        len(values),
+    )
+    if sys.byteorder != 'little':
+        values.byteswap()
+    return header + values.tobytes()
+
+
+def export_svg_polylines(svg_path, output_path, layer_number=None):
+    """Write the binary polyline stream of an SVG (or one numbered layer of it) to ``output_path``."""
+    with time_operation('polyline_export'):
+        collector = PolylineCollector(layer_number)
+        collector.feed_file(svg_path)
+        if collector.skipped_use_count:
+            logger.warning("Polyline export of %s skipped %d <use> elements", svg_path, collector.skipped_use_count)
+        data = encode_polylines(collector.polylines, collector.view_box or (0.0, 0.0, 0.0, 0.0), collector.size_px)
+        with open(output_path, 'wb') as output_file:
+            output_file.write(data)
+    return len(data)
+
+
+def get_cached_polylines(layer_cache, svg_path, content_hash, layer_number=None):
+    """Return the (path, cache hit) of an SVG's polyline stream, exporting it into ``layer_cache`` on a miss."""
+    suffix = f"layer{layer_number}" if layer_number is not None else 'all'
+    polylines_path = layer_cache.build_path(content_hash, f"{suffix}-v{POLYLINE_FORMAT_VERSION}{POLYLINE_EXTENSION}")
+    if os.path.exists(polylines_path):
+        return polylines_path, True
+
+    layer_cache.write_atomically(
+        polylines_path,
+        lambda temporary_path: export_svg_polylines(svg_path, temporary_path, layer_number),
+    )
+    try:
+        write_precompressed(polylines_path)
+    except OSError as error:
+        logger.warning("Failed to precompress %s: %s", polylines_path, error)
+    layer_cache.prune()
+    return polylines_path, False
@@ -0,0 +1,68 @@
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+# The tests never talk to real hardware or share state with a running server
+os.environ.setdefault('AXIDRAW_BACKEND', 'simulated')
+os.environ.setdefault('AXIDRAW_SIM_LATENCY', '0')
+os.environ.setdefault('PLOT_STATE_BACKEND', 'memory')
+os.environ.setdefault('PLOT_FILE_WATCHER', 'off')
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """Point the app at empty artwork and log directories and a fresh queue."""
+    import index
+    from artwork_library import ArtworkIndex, ArtworkWatcher, ContentHashQueue, ThumbnailQueue
+    from plot_history import PlotHistoryIndex
+    from plot_scheduler import PlotScheduler
+    from resume_store import ResumeStore
+    from svg_layers import LayerCache
+
+    art_dir = tmp_path / 'uploads'
+    log_dir = tmp_path / 'log'
+    art_dir.mkdir()
+    log_dir.mkdir()
+    plot_log_file = str(log_dir / 'plot-log.jsonl')
+    artwork_index = ArtworkIndex(str(art_dir))
+    artwork_watcher = ArtworkWatcher(artwork_index, mode='off')
+    artwork_watcher.add_listener(index.handle_artwork_change)
+    resume_store = ResumeStore(str(log_dir / 'resume'))
+    resume_store.resume_dir = str(log_dir / 'resume')
+
+    monkeypatch.setattr(index, 'art_dir', str(art_dir))
+    monkeypatch.setitem(index.app.config, 'UPLOAD_FOLDER', str(art_dir))
+    monkeypatch.setattr(index, 'LOG_DIR', str(log_dir))
+    monkeypatch.setattr(index, 'PLOT_LOG_FILE', plot_log_file)
+    monkeypatch.setattr(index, 'plot_history', PlotHistoryIndex(plot_log_file))
+    monkeypatch.setattr(index, 'resume_store', resume_store)
+    monkeypatch.setattr(index, 'layer_cache', LayerCache(str(log_dir / 'layers')))
+    monkeypatch.setattr(index, 'artwork_index', artwork_index)
+    monkeypatch.setattr(index, 'artwork_watcher', artwork_watcher)
+    monkeypatch.setattr(index, 'content_hash_queue', ContentHashQueue(artwork_index, index.get_content_hash))
+    monkeypatch.setattr(index, 'thumbnail_queue', ThumbnailQueue(str(art_dir)))
+    monkeypatch.setattr(index, 'scheduler', PlotScheduler(
+        index.registry, index.run_queued_plot_job, index.get_queued_job_estimate,
+    ))
+
+    def add_svg(name, paths=3):
+        body = ''.join(f'<path d="M{step} 0 L{step} 10"/>' for step in range(paths))
+        (art_dir / name).write_text(
+            f'<svg xmlns="http://www.w3.org/2000/svg" width="4in" height="3in" viewBox="0 0 40 30">{body}</svg>',
+            encoding='utf-8',
+        )
+        return str(art_dir / name)
+
+    return SimpleNamespace(
+        index=index,
+        client=index.app.test_client(),
+        device=index.registry.get_device(),
+        art_dir=art_dir,
+        plot_log_file=plot_log_file,
+        add_svg=add_svg,
+    )
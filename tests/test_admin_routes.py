@@ -0,0 +1,34 @@
+import pytest
+
+
+ADMIN_PATHS = ['/admin/profiles.json', '/admin/profiles/missing', '/metrics']
+
+
+@pytest.mark.parametrize('path', ADMIN_PATHS)
+def test_admin_routes_are_off_without_a_token(server, monkeypatch, path):
+    monkeypatch.setattr(server.index, 'ADMIN_TOKEN', '')
+
+    response = server.client.get(path, headers={'Authorization': 'Bearer '})
+
+    assert response.status_code == 404
+
+
+@pytest.mark.parametrize('path', ADMIN_PATHS)
+@pytest.mark.parametrize('authorization', [None, 'Bearer wrong', 'Basic secret'])
+def test_admin_routes_refuse_other_credentials(server, monkeypatch, path, authorization):
+    monkeypatch.setattr(server.index, 'ADMIN_TOKEN', 'secret')
+    headers = {'Authorization': authorization} if authorization else {}
+
+    response = server.client.get(path, headers=headers)
+
+    assert response.status_code == 401
+    assert response.headers['WWW-Authenticate'] == 'Bearer'
+
+
+def test_admin_routes_accept_the_token(server, monkeypatch):
+    monkeypatch.setattr(server.index, 'ADMIN_TOKEN', 'secret')
+    headers = {'Authorization': 'Bearer secret'}
+
+    assert server.client.get('/metrics', headers=headers).status_code == 200
+    assert server.client.get('/admin/profiles.json', headers=headers).status_code == 200
+    assert server.client.get('/admin/profiles/missing', headers=headers).status_code == 404
@@ -0,0 +1,29 @@
+class RecordingQueue:
+    def __init__(self):
+        self.paths = []
+
+    def enqueue(self, relative_path):
+        self.paths.append(relative_path)
+
+
+def test_startup_queues_thumbnails_for_existing_artwork(server, monkeypatch):
+    server.add_svg('rsynced.svg')
+    thumbnails = RecordingQueue()
+    monkeypatch.setattr(server.index, 'HARDWARE_SERVICE_URL', '')
+    monkeypatch.setattr(server.index, 'thumbnail_queue', thumbnails)
+
+    server.index.start_artwork_watcher()
+
+    assert thumbnails.paths == ['rsynced.svg']
+
+
+def test_workers_leave_the_watcher_to_the_hardware_process(server, monkeypatch):
+    server.add_svg('rsynced.svg')
+    thumbnails = RecordingQueue()
+    monkeypatch.setattr(server.index, 'HARDWARE_SERVICE_URL', 'http://127.0.0.1:5008')
+    monkeypatch.setattr(server.index, 'thumbnail_queue', thumbnails)
+
+    server.index.start_artwork_watcher()
+
+    assert thumbnails.paths == []
+    assert server.index.artwork_index.get_entries() == []
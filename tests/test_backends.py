@@ -0,0 +1,29 @@
+import importlib
+
+import pytest
+
+from backends import LazyModuleProvider, RendererUnavailableError
+
+
+def test_failed_import_is_not_retried(monkeypatch):
+    attempts = []
+
+    def import_module(name):
+        attempts.append(name)
+        raise ImportError(f"No module named {name!r}")
+
+    monkeypatch.setattr(importlib, 'import_module', import_module)
+    provider = LazyModuleProvider('missing_module', RendererUnavailableError)
+
+    for _ in range(3):
+        with pytest.raises(RendererUnavailableError, match='missing_module is unavailable') as raised:
+            provider.get()
+
+    assert attempts == ['missing_module']
+    assert isinstance(raised.value.__cause__, ImportError)
+
+
+def test_successful_import_is_reused():
+    provider = LazyModuleProvider('json', ImportError)
+
+    assert provider.get() is provider.get() is importlib.import_module('json')
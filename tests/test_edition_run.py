@@ -0,0 +1,135 @@
+import threading
+import time
+
+import pytest
+
+from plotter_service import EditionRun
+
+
+def wait_until(condition, timeout=5):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not met in time"
+        time.sleep(0.001)
+
+
+def test_paused_run_waits_then_continues():
+    edition_run = EditionRun(pause_seconds=0.01)
+
+    assert edition_run.wait_for_next(2) is True
+    assert edition_run.waiting_for is None
+
+
+def test_confirmed_run_waits_for_advance():
+    edition_run = EditionRun(confirm=True, confirm_timeout=5)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(edition_run.wait_for_next(2)))
+
+    assert edition_run.advance() is False
+    waiter.start()
+    wait_until(lambda: edition_run.waiting_for == 2)
+    assert edition_run.advance() is True
+    waiter.join()
+
+    assert results == [True]
+
+
+def test_confirmed_run_ends_when_nobody_confirms():
+    edition_run = EditionRun(confirm=True, confirm_timeout=0.01)
+
+    assert edition_run.wait_for_next(2) is False
+
+
+@pytest.mark.parametrize('confirm', [True, False])
+def test_cancel_ends_a_waiting_run(confirm):
+    edition_run = EditionRun(confirm=confirm, pause_seconds=5, confirm_timeout=5)
+    results = []
+    waiter = threading.Thread(target=lambda: results.append(edition_run.wait_for_next(2)))
+    waiter.start()
+    wait_until(lambda: edition_run.waiting_for == 2)
+
+    edition_run.cancel()
+    waiter.join()
+
+    assert results == [False]
+
+
+@pytest.fixture
+def start_edition_run(server):
+    """Plot an edition run through the plot route on a thread; returns a getter for its response."""
+    responses = []
+    threads = []
+
+    def start(file, editions, **params):
+        query = '&'.join(f'{key}={value}' for key, value in dict(
+            params, edition_run='true', editions=editions, device=server.device.name,
+        ).items())
+        client = server.index.app.test_client()
+        thread = threading.Thread(target=lambda: responses.append(client.get(f'/plot/{file}?{query}')))
+        thread.start()
+        threads.append(thread)
+
+        def result():
+            thread.join(timeout=10)
+            return responses[0]
+
+        return result
+
+    yield start
+    for thread in threads:
+        thread.join(timeout=10)
+
+
+def test_stop_between_copies_cancels_the_rest_of_the_run(server, start_edition_run):
+    server.add_svg('edition.svg')
+    result = start_edition_run('edition.svg', 3, edition_confirm='true')
+    wait_until(lambda: server.device.edition_run is not None and server.device.edition_run.waiting_for == 2)
+
+    assert server.client.post('/plot/editions/continue').status_code == 200
+    wait_until(lambda: server.device.edition_run is not None and server.device.edition_run.waiting_for == 3)
+    stop_result = server.client.post('/plot/stop').get_json()['stop_result']
+    payload = result().get_json()
+
+    assert stop_result['method'] == 'edition_cancel'
+    assert payload['status'] == 'stopped'
+    assert payload['editions_plotted'] == 2
+    assert [plot['status'] for plot in payload['plots']] == ['ok', 'ok']
+    assert [plot['edition'] for plot in payload['plots']] == [1, 2]
+    assert server.device.edition_run is None
+    assert server.client.post('/plot/editions/continue').status_code == 409
+
+
+def test_stop_during_a_copy_halts_it_and_ends_the_run(server, start_edition_run, monkeypatch):
+    # About 5 ms per simulated move, so the copy is mid-stroke when the stop arrives
+    monkeypatch.setenv('AXIDRAW_SIM_TIME_SCALE', '0.0025')
+    server.add_svg('edition.svg', paths=400)
+    result = start_edition_run('edition.svg', 3, edition_pause=0)
+    wait_until(lambda: server.device.halt is not None)
+    time.sleep(0.05)
+
+    stop_result = server.client.post('/plot/stop').get_json()['stop_result']
+    payload = result().get_json()
+
+    assert stop_result['method'] == 'pause_request'
+    assert payload['status'] == 'stopped'
+    assert payload['editions_plotted'] == 1
+    assert payload['plots'][0]['status'] == 'stopped'
+    assert payload['plots'][0]['resume_id'] is not None
+
+
+def test_copies_are_plotted_from_one_parsed_document(server, start_edition_run, monkeypatch):
+    server.add_svg('edition.svg')
+    setups = []
+    plot_setup = server.device.ad.plot_setup
+
+    def record_setup(svg_input=None):
+        setups.append(svg_input)
+        plot_setup(svg_input)
+
+    monkeypatch.setattr(server.device.ad, 'plot_setup', record_setup)
+
+    payload = start_edition_run('edition.svg', 3, edition_pause=0)().get_json()
+
+    assert payload['status'] == 'ok'
+    assert payload['editions_plotted'] == 3
+    assert len(setups) == 1
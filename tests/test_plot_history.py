@@ -0,0 +1,109 @@
+import json
+import os
+
+from plot_history import PlotHistoryIndex
+
+
+def plot_row(file_hash, status='ok', file='art/drawing.svg', tool='Pen'):
+    return json.dumps({'fileHash': file_hash, 'status': status, 'file': file, 'tool': tool, 'time': '2026-01-01 10:00:00'}) + '\n'
+
+
+def append_rows(log_path, *rows):
+    with open(log_path, 'a', encoding='utf-8') as log_file:
+        log_file.write(''.join(rows))
+
+
+def test_appended_rows_are_applied_from_the_last_offset(tmp_path):
+    log_path = str(tmp_path / 'plot-log.jsonl')
+    append_rows(log_path, plot_row('a'), plot_row('a', status='stopped'))
+    history = PlotHistoryIndex(log_path)
+
+    assert history.get('a')['plot_count'] == 1
+    first_offset = history.offset
+    assert first_offset == os.path.getsize(log_path)
+
+    append_rows(log_path, plot_row('a', tool='Brush'), plot_row('b'))
+
+    record = history.get('a')
+    assert record['plot_count'] == 2
+    assert record['stopped_count'] == 1
+    assert record['tools'] == {'Pen': 2, 'Brush': 1}
+    assert history.get('b')['plot_count'] == 1
+    assert history.offset > first_offset
+
+
+def test_partial_row_waits_for_its_newline(tmp_path):
+    log_path = str(tmp_path / 'plot-log.jsonl')
+    append_rows(log_path, plot_row('a'))
+    row = plot_row('a')
+    append_rows(log_path, row[:10])
+    history = PlotHistoryIndex(log_path)
+
+    assert history.get('a')['plot_count'] == 1
+
+    append_rows(log_path, row[10:])
+
+    assert history.get('a')['plot_count'] == 2
+
+
+def test_truncated_log_is_read_again_from_the_start(tmp_path):
+    log_path = str(tmp_path / 'plot-log.jsonl')
+    append_rows(log_path, plot_row('a'), plot_row('a'), plot_row('a'))
+    history = PlotHistoryIndex(log_path)
+    assert history.get('a')['plot_count'] == 3
+
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        log_file.write(plot_row('b'))
+
+    assert history.get('a') is None
+    assert history.get('b')['plot_count'] == 1
+
+
+def test_cleared_log_empties_the_history(tmp_path):
+    log_path = str(tmp_path / 'plot-log.jsonl')
+    append_rows(log_path, plot_row('a'))
+    history = PlotHistoryIndex(log_path)
+    assert history.has_entries()
+
+    open(log_path, 'w').close()
+
+    assert not history.has_entries()
+
+
+def test_rotated_log_is_read_from_the_start_even_when_longer(tmp_path):
+    log_path = str(tmp_path / 'plot-log.jsonl')
+    append_rows(log_path, plot_row('a'))
+    history = PlotHistoryIndex(log_path)
+    assert history.get('a')['plot_count'] == 1
+
+    # logrotate-style: move the log away and start a new, longer one
+    os.rename(log_path, log_path + '.1')
+    append_rows(log_path, plot_row('b', file='art/other.svg'), plot_row('b', file='art/other.svg'), plot_row('c'))
+
+    assert history.get('a') is None
+    assert history.get('b')['plot_count'] == 2
+    assert history.get('c')['plot_count'] == 1
+
+
+def test_log_replaced_in_place_by_a_longer_one_is_read_from_the_start(tmp_path):
+    log_path = str(tmp_path / 'plot-log.jsonl')
+    append_rows(log_path, plot_row('a'))
+    history = PlotHistoryIndex(log_path)
+    assert history.get('a')['plot_count'] == 1
+
+    # copytruncate-style: the same file is emptied and refilled past the old offset
+    with open(log_path, 'w', encoding='utf-8') as log_file:
+        log_file.write(plot_row('bb', file='art/longer-name.svg') + plot_row('c'))
+
+    assert history.get('a') is None
+    assert history.get('bb')['plot_count'] == 1
+    assert history.get('c')['plot_count'] == 1
+
+
+def test_versions_list_each_hash_plotted_from_a_path_latest_first(tmp_path):
+    log_path = str(tmp_path / 'plot-log.jsonl')
+    append_rows(log_path, plot_row('a'), plot_row('b'), plot_row('a'), plot_row('x', status='stopped', file=''), plot_row('-'))
+    history = PlotHistoryIndex(log_path)
+
+    assert [record['file_hash'] for record in history.get_versions('art/drawing.svg')] == ['a', 'b']
+    assert history.get('-') is None
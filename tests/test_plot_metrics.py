@@ -0,0 +1,89 @@
+import json
+import os
+from types import SimpleNamespace
+
+import pytest
+
+from plot_metrics import collect_plot_metrics, collect_preview_metrics
+
+
+# AxiDraw console reports (from the simulator or hand-written, see each file's origin)
+# and the metrics each one must parse to; the plot_metrics benchmark times the same files
+OUTPUT_CORPUS_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks', 'fixtures', 'axidraw_output'
+)
+SAMPLE_PREVIEW_OUTPUT = (
+    'Estimated print time: 1:02:03 (Hours, minutes, seconds)\n'
+    'Length of path to draw: 12.34 m\n'
+    'Pen-up travel distance: 5.67 m\n'
+)
+SAMPLE_PLOT_OUTPUT = (
+    'Elapsed time: 1:02:03 (Hours, minutes, seconds)\n'
+    'Length of path drawn: 12.34 m\n'
+    'Total distance moved: 18.01 m\n'
+    'Number of pen lifts: 1,234\n'
+)
+PARSED_PLOT_OUTPUT = {'plot_duration': 3723, 'plot_path': 12.34, 'plot_travel': 18.01, 'lifts': 1234}
+PARSED_PREVIEW_OUTPUT = {'plot_duration': 3723, 'plot_path': 12.34, 'plot_travel': 5.67}
+
+
+def load_output_corpus():
+    """Return (name, kind, console output, expected metrics) for every report in the corpus."""
+    with open(os.path.join(OUTPUT_CORPUS_DIR, 'corpus.json'), encoding='utf-8') as corpus_file:
+        corpus = json.load(corpus_file)
+
+    samples = []
+    for name, details in sorted(corpus.items()):
+        with open(os.path.join(OUTPUT_CORPUS_DIR, name), encoding='utf-8') as output_file:
+            samples.append((name, details['kind'], output_file.read(), details['expected']))
+    return samples
+
+
+@pytest.mark.parametrize('kind,output,expected', [
+    pytest.param(kind, output, expected, id=name) for name, kind, output, expected in load_output_corpus()
+])
+def test_output_corpus_parses_to_expected_metrics(kind, output, expected):
+    # An instance without statistics attributes stands in for an older API
+    collect = collect_plot_metrics if kind == 'plot' else collect_preview_metrics
+    result = collect(SimpleNamespace(), output)
+
+    assert result is not None
+    assert result.source == 'output'
+    assert result.to_dict() == expected
+
+
+@pytest.mark.parametrize('kind,attributes,output,expected,source', [
+    pytest.param('plot', {'time_elapsed': 292.3, 'distance_pendown': 6.854, 'distance_total': 9.589, 'pen_lifts': 137},
+                 '', {'plot_duration': 292, 'plot_path': 6.85, 'plot_travel': 9.59, 'lifts': 137}, 'api',
+                 id='plot attributes'),
+    pytest.param('plot', {'time_elapsed': '60', 'distance_pendown': '1.5', 'distance_total': '2', 'pen_lifts': '4'},
+                 '', {'plot_duration': 60, 'plot_path': 1.5, 'plot_travel': 2.0, 'lifts': 4}, 'api',
+                 id='plot numeric strings'),
+    pytest.param('plot', {}, SAMPLE_PLOT_OUTPUT, PARSED_PLOT_OUTPUT, 'output', id='plot attributes missing'),
+    pytest.param('plot', {'time_elapsed': 60.0, 'distance_pendown': 1.5, 'distance_total': 2.0},
+                 SAMPLE_PLOT_OUTPUT, PARSED_PLOT_OUTPUT, 'output', id='plot lifts missing'),
+    pytest.param('plot', {'time_elapsed': 'n/a', 'distance_pendown': 1.5, 'distance_total': 2.0, 'pen_lifts': 4},
+                 SAMPLE_PLOT_OUTPUT, PARSED_PLOT_OUTPUT, 'output', id='plot statistic of the wrong type'),
+    pytest.param('plot', {'time_elapsed': 60.0, 'distance_pendown': 1.5, 'distance_total': 2.0, 'pen_lifts': 'many'},
+                 SAMPLE_PLOT_OUTPUT, PARSED_PLOT_OUTPUT, 'output', id='plot lifts of the wrong type'),
+    pytest.param('preview', {'time_estimate': 3723.4, 'distance_pendown': 12.34, 'distance_total': 18.01},
+                 '', PARSED_PREVIEW_OUTPUT, 'api', id='preview attributes'),
+    pytest.param('preview', {}, SAMPLE_PREVIEW_OUTPUT, PARSED_PREVIEW_OUTPUT, 'output', id='preview attributes missing'),
+    pytest.param('preview', {'time_estimate': None, 'distance_pendown': object(), 'distance_total': 1.0},
+                 SAMPLE_PREVIEW_OUTPUT, PARSED_PREVIEW_OUTPUT, 'output', id='preview statistic of the wrong type'),
+])
+def test_collectors_prefer_api_attributes(kind, attributes, output, expected, source):
+    collect = collect_plot_metrics if kind == 'plot' else collect_preview_metrics
+    result = collect(SimpleNamespace(**attributes), output)
+
+    assert result.to_dict() == expected
+    assert result.source == source
+
+
+def test_plot_without_statistics_or_report_has_no_metrics():
+    assert collect_plot_metrics(SimpleNamespace(pen_lifts=[3]), 'no report') is None
+
+
+def test_preview_without_statistics_or_report_raises():
+    with pytest.raises(ValueError):
+        collect_preview_metrics(SimpleNamespace(time_estimate='soon'), 'no report')
@@ -0,0 +1,207 @@
+import os
+import threading
+from types import SimpleNamespace
+
+import pytest
+
+from plot_scheduler import PlotJob, PlotScheduler, fifo_policy, pen_affinity_policy, shortest_job_first_policy
+
+
+SVG_MARKUP = '<svg xmlns="http://www.w3.org/2000/svg" width="{width}in" height="{height}in" viewBox="0 0 10 10"/>'
+
+
+class FakeDevice:
+    def __init__(self, name, x_travel=11.81, y_travel=8.58, tool=None, media=None, status='on'):
+        self.name = name
+        self.sem = threading.Semaphore()
+        self.loadout = {'tool': tool, 'media': media}
+        self.last_tool = None
+        self.status = status
+        self.status_service = SimpleNamespace(get_plotter_status=lambda: {
+            'status': self.status,
+            'config': {'x_travel': x_travel, 'y_travel': y_travel},
+        })
+
+    def is_idle(self):
+        return True
+
+
+class FakeRegistry:
+    def __init__(self, *devices):
+        self.devices = list(devices)
+
+    def all_devices(self):
+        return list(self.devices)
+
+
+class RecordingRunner:
+    def __init__(self):
+        self.runs = []
+        self.lock = threading.Lock()
+        self.done = threading.Condition(self.lock)
+
+    def __call__(self, device, job):
+        with self.lock:
+            self.runs.append((device.name, job.file))
+            self.done.notify_all()
+        return {'status': 'ok'}
+
+    def wait_for(self, count, timeout=2):
+        with self.lock:
+            assert self.done.wait_for(lambda: len(self.runs) >= count, timeout)
+            return list(self.runs)
+
+
+@pytest.fixture
+def make_job(tmp_path):
+    def make(name, width=4, height=3, **options):
+        filepath = tmp_path / name
+        filepath.write_text(SVG_MARKUP.format(width=width, height=height), encoding='utf-8')
+        return PlotJob(name, str(filepath), dict({'layer': 0, 'tool': 'None', 'media': 'None'}, **options))
+    return make
+
+
+def submit_paused(scheduler, device, jobs):
+    """Queue jobs while the device is busy so the policy sees all of them at once."""
+    device.sem.acquire()
+    for job in jobs:
+        scheduler.submit(job)
+    device.sem.release()
+    scheduler.dispatch()
+
+
+def test_fifo_runs_jobs_in_submission_order(make_job):
+    device = FakeDevice('a')
+    runner = RecordingRunner()
+    scheduler = PlotScheduler(FakeRegistry(device), runner, lambda job: None, policy='fifo')
+
+    submit_paused(scheduler, device, [make_job('one.svg'), make_job('two.svg'), make_job('three.svg')])
+
+    assert [file for _, file in runner.wait_for(3)] == ['one.svg', 'two.svg', 'three.svg']
+
+
+def test_shortest_job_first_puts_unpreviewed_jobs_last(make_job):
+    jobs = [make_job('long.svg'), make_job('unknown.svg'), make_job('short.svg')]
+    estimates = {'long.svg': 600, 'short.svg': 60}
+
+    ordered = shortest_job_first_policy(jobs, FakeDevice('a'), lambda job: estimates.get(job.file))
+
+    assert [job.file for job in ordered] == ['short.svg', 'long.svg', 'unknown.svg']
+    assert fifo_policy(jobs, FakeDevice('a'), None) == jobs
+
+
+def test_affinity_prefers_the_loaded_pen(make_job):
+    jobs = [make_job('red.svg', tool='Red'), make_job('black.svg', tool='Black'), make_job('red2.svg', tool='Red')]
+
+    ordered = pen_affinity_policy(jobs, FakeDevice('a', tool='Black'), None)
+    unloaded = pen_affinity_policy(jobs, FakeDevice('b', tool='None'), None)
+
+    assert [job.file for job in ordered] == ['black.svg', 'red.svg', 'red2.svg']
+    assert unloaded == jobs
+
+
+def test_jobs_only_run_on_plotters_with_matching_tool_media_and_travel(make_job):
+    small = FakeDevice('small', x_travel=6, y_travel=4, tool='Black')
+    large = FakeDevice('large', x_travel=20, y_travel=12, tool='Red', media='Bristol')
+    runner = RecordingRunner()
+    scheduler = PlotScheduler(FakeRegistry(small, large), runner, lambda job: None)
+
+    scheduler.submit(make_job('red.svg', tool='Red'))
+    scheduler.submit(make_job('poster.svg', width=16, height=10))
+    scheduler.submit(make_job('card.svg', tool='Black', media='None'))
+
+    assert sorted(runner.wait_for(3)) == [('large', 'poster.svg'), ('large', 'red.svg'), ('small', 'card.svg')]
+
+
+def test_jobs_that_fit_no_plotter_stay_queued(make_job):
+    device = FakeDevice('a', tool='Black', media='Bristol')
+    scheduler = PlotScheduler(FakeRegistry(device), RecordingRunner(), lambda job: None)
+
+    scheduler.submit(make_job('wrong-media.svg', media='Vellum'))
+    scheduler.submit(make_job('too-big.svg', width=30, height=20))
+    device.status = 'off'
+    scheduler.submit(make_job('any.svg'))
+
+    assert [job['file'] for job in scheduler.snapshot()['pending']] == ['wrong-media.svg', 'too-big.svg', 'any.svg']
+
+
+def test_deleted_files_are_dropped_without_failing_dispatch(make_job):
+    device = FakeDevice('a')
+    runner = RecordingRunner()
+
+    def estimate_lookup(job):
+        # Like index.get_queued_job_estimate before it guarded against deleted files
+        os.stat(job.filepath)
+        return 1
+
+    scheduler = PlotScheduler(FakeRegistry(device), runner, estimate_lookup, policy='sjf')
+    deleted = make_job('deleted.svg')
+    kept = make_job('kept.svg')
+    device.sem.acquire()
+    scheduler.submit(deleted)
+    scheduler.submit(kept)
+    os.remove(deleted.filepath)
+    device.sem.release()
+
+    scheduler.dispatch()
+
+    assert runner.wait_for(1) == [('a', 'kept.svg')]
+    assert deleted.status == 'cancelled'
+    assert deleted.error == 'File not found'
+
+
+def test_dispatch_logs_instead_of_raising(make_job):
+    device = FakeDevice('a')
+
+    def estimate_lookup(job):
+        raise RuntimeError('estimate failed')
+
+    scheduler = PlotScheduler(FakeRegistry(device), RecordingRunner(), estimate_lookup, policy='sjf')
+
+    scheduler.submit(make_job('one.svg'))
+    scheduler.dispatch()
+
+    assert [job['file'] for job in scheduler.snapshot()['pending']] == ['one.svg']
+
+
+def test_cancel_file_cancels_every_queued_job_for_it(make_job):
+    device = FakeDevice('a', status='off')
+    scheduler = PlotScheduler(FakeRegistry(device), RecordingRunner(), lambda job: None)
+    first, other, second = make_job('a.svg'), make_job('b.svg'), make_job('a.svg')
+    for job in (first, other, second):
+        scheduler.submit(job)
+
+    cancelled = scheduler.cancel_file(first.filepath)
+
+    assert cancelled == [first, second]
+    assert [job['file'] for job in scheduler.snapshot()['pending']] == ['b.svg']
+    assert {job['status'] for job in scheduler.snapshot()['finished']} == {'cancelled'}
+
+
+def test_deleting_a_queued_file_does_not_fail_the_next_plot(server):
+    server.add_svg('queued.svg')
+    server.add_svg('other.svg')
+    server.index.scheduler.set_policy('sjf')
+    server.device.sem.acquire()
+    try:
+        assert server.client.post('/queue', data={'file': 'queued.svg'}).status_code == 202
+        assert server.client.post('/queue', data={'file': 'other.svg'}).status_code == 202
+    finally:
+        server.device.sem.release()
+
+    assert server.client.delete('/files/queued.svg').status_code == 200
+    # A file removed outside the API is dropped at the next dispatch
+    os.remove(server.art_dir / 'other.svg')
+    server.add_svg('plotted.svg')
+
+    response = server.client.get('/plot/plotted.svg')
+    loadout = server.client.post('/devices/loadout', data={'tool': 'Pen'})
+
+    assert response.status_code == 200
+    assert loadout.status_code == 200
+    queue = server.client.get('/queue.json').get_json()
+    assert queue['pending'] == []
+    assert sorted((job['file'], job['error']) for job in queue['finished']) == [
+        ('other.svg', 'File not found'),
+        ('queued.svg', 'File deleted'),
+    ]
@@ -0,0 +1,54 @@
+import threading
+
+from plotter_registry import PlotterRegistry
+from simulated_axidraw import AxiDraw
+from state_store import InProcessStateStore
+
+
+class CountingAxiDraw(AxiDraw):
+    list_names_threads = []
+
+    def plot_run(self, output=False):
+        if self.options.mode == 'manual' and self.options.manual_cmd == 'list_names':
+            CountingAxiDraw.list_names_threads.append(threading.current_thread().name)
+        return super().plot_run(output)
+
+
+def make_registry(monkeypatch, names='sim-a3'):
+    monkeypatch.setenv('AXIDRAW_SIM_DEVICES', names)
+    CountingAxiDraw.list_names_threads = []
+    registry = PlotterRegistry(CountingAxiDraw, InProcessStateStore())
+    registry.discover()
+    CountingAxiDraw.list_names_threads = []
+    return registry
+
+
+def test_model_is_detected_once_on_the_device_worker(monkeypatch):
+    device = make_registry(monkeypatch).get_device()
+
+    assert device.get_model_number() == 2
+    assert device.get_model_number() == 2
+    assert CountingAxiDraw.list_names_threads == [f'plotter-{device.name}_0']
+
+
+def test_discovery_invalidates_the_cached_model(monkeypatch):
+    registry = make_registry(monkeypatch)
+    device = registry.get_device()
+    device.get_model_number()
+
+    registry.discover()
+    CountingAxiDraw.list_names_threads = []
+
+    assert device.get_model_number() == 2
+    assert len(CountingAxiDraw.list_names_threads) == 1
+
+
+def test_disconnected_status_is_not_cached(monkeypatch):
+    device = make_registry(monkeypatch).get_device()
+    monkeypatch.setattr(CountingAxiDraw, 'connect', lambda self: False)
+
+    assert device.status_service.get_plotter_status()['status'] == 'off'
+    monkeypatch.undo()
+    monkeypatch.setenv('AXIDRAW_SIM_DEVICES', 'sim-a3')
+
+    assert device.status_service.get_plotter_status()['status'] != 'off'
@@ -0,0 +1,103 @@
+import os
+
+from werkzeug.datastructures import MultiDict
+
+
+def build_halted_output(filepath, pause_ref=2, layer=0):
+    """Return the output SVG the API hands back for a plot paused after ``pause_ref`` moves."""
+    with open(filepath, encoding='utf-8') as svg_file:
+        markup = svg_file.read()
+    plotdata = f'<plotdata application="axidraw" layer="{layer}" pause_ref="{pause_ref}" stopped="1"/>'
+    return markup.replace('</svg>', plotdata + '</svg>')
+
+
+def save_resume_point(server, file='halted.svg'):
+    filepath = server.add_svg(file)
+    options = server.index.read_plot_options(MultiDict())
+    return server.index.resume_store.save(build_halted_output(filepath), {
+        'file': file,
+        'filepath': filepath,
+        'file_hash': 'abc123',
+        'device': server.device.name,
+        'options': options,
+        'model_number': 4,
+        'stopped_code': 1,
+        'position': None,
+    })
+
+
+def test_resume_continues_the_saved_plot_and_clears_it(server):
+    resume_id = save_resume_point(server)
+
+    response = server.client.post(f'/plot/resume/{resume_id}')
+
+    payload = response.get_json()
+    assert response.status_code == 200
+    assert payload['status'] == 'ok'
+    assert payload['resumed_from'] == resume_id
+    assert payload['resume_id'] is None
+    assert payload['file_hash'] == 'abc123'
+    assert server.client.get('/resume.json').get_json()['entries'] == []
+
+
+def test_resume_runs_in_res_plot_mode_from_the_saved_output(server, monkeypatch):
+    resume_id = save_resume_point(server)
+    ad = server.device.ad
+    runs = []
+    plot_run = ad.plot_run
+
+    def record_run(output=False):
+        if ad.options.mode != 'manual':
+            runs.append((ad.options.mode, ad.svg_path))
+        return plot_run(output)
+
+    monkeypatch.setattr(ad, 'plot_run', record_run)
+
+    server.client.post(f'/plot/resume/{resume_id}')
+
+    assert len(runs) == 1
+    mode, svg_input = runs[0]
+    assert mode == 'res_plot'
+    assert 'pause_ref="2"' in svg_input
+
+
+def test_resume_survives_the_artwork_being_deleted(server):
+    resume_id = save_resume_point(server)
+    os.remove(server.art_dir / 'halted.svg')
+
+    response = server.client.post(f'/plot/resume/{resume_id}')
+
+    assert response.status_code == 200
+    assert response.get_json()['status'] == 'ok'
+
+
+def test_resume_point_without_its_svg_is_not_found(server):
+    resume_id = save_resume_point(server)
+    os.remove(server.index.resume_store.build_path(resume_id, '.svg'))
+
+    response = server.client.post(f'/plot/resume/{resume_id}')
+
+    assert response.status_code == 404
+    assert server.client.get('/resume.json').get_json()['entries'] == []
+    assert server.client.delete(f'/resume/{resume_id}').status_code == 200
+
+
+def test_unknown_resume_ids_are_not_found(server):
+    assert server.client.post('/plot/resume/20240101-000000-0123abcd').status_code == 404
+    assert server.client.post('/plot/resume/not-a-resume-id').status_code == 404
+    assert server.client.delete('/resume/20240101-000000-0123abcd').status_code == 404
+
+
+def test_resume_store_keeps_the_newest_entries(server, monkeypatch):
+    resume_store = server.index.resume_store
+    monkeypatch.setattr(resume_store, 'retention', 2)
+    resume_ids = []
+    for index in range(3):
+        resume_ids.append(save_resume_point(server, f'halted-{index}.svg'))
+        mtime = 1_700_000_000 + index
+        os.utime(resume_store.build_path(resume_ids[-1], '.json'), (mtime, mtime))
+
+    resume_store.prune()
+
+    assert resume_store.get(resume_ids[0]) is None
+    assert {entry['id'] for entry in resume_store.list_entries()} == set(resume_ids[1:])
@@ -0,0 +1,74 @@
+import threading
+
+import pytest
+
+import state_store
+from state_store import InProcessStateStore, SQLiteStateStore, create_state_store
+
+
+@pytest.fixture
+def fast_polling(monkeypatch):
+    monkeypatch.setattr(state_store, 'SQLITE_POLL_INTERVAL_SECONDS', 0.01)
+
+
+def test_sqlite_stores_see_each_others_writes(tmp_path, fast_polling):
+    path = str(tmp_path / 'state.sqlite3')
+    first = SQLiteStateStore(path)
+    second = SQLiteStateStore(path)
+
+    first.set('device/one/runtime', {'is_plotting': True})
+    assert second.get('device/one/runtime') == {'is_plotting': True}
+
+    second.set('device/one/runtime', {'is_plotting': False})
+    assert first.get('device/one/runtime') == {'is_plotting': False}
+    assert first.get('missing', 'default') == 'default'
+
+
+def test_sqlite_waiters_and_subscribers_hear_writes_from_another_store(tmp_path, fast_polling):
+    path = str(tmp_path / 'state.sqlite3')
+    writer = SQLiteStateStore(path)
+    reader = SQLiteStateStore(path)
+    received = []
+    changed = threading.Event()
+
+    def on_change(key, value):
+        received.append((key, value))
+        changed.set()
+
+    reader.subscribe(on_change)
+    since_version = reader.version
+    writer.set('status', {'status': 'busy'})
+
+    assert reader.wait_for_change(since_version, 2) > since_version
+    assert changed.wait(2)
+    assert received == [('status', {'status': 'busy'})]
+
+
+def test_sqlite_unchanged_value_keeps_the_version(tmp_path, fast_polling):
+    store = SQLiteStateStore(str(tmp_path / 'state.sqlite3'))
+    store.set('status', {'status': 'on'})
+    version = store.version
+
+    store.set('status', {'status': 'on'})
+
+    assert store.version == version
+
+
+def test_in_process_store_returns_copies():
+    store = InProcessStateStore()
+    value = {'devices': ['a']}
+    store.set('devices', value)
+
+    store.get('devices')['devices'].append('b')
+
+    assert store.get('devices') == value
+    assert store.version == 1
+
+
+def test_create_state_store_selects_the_backend(tmp_path, monkeypatch, fast_polling):
+    monkeypatch.setenv('PLOT_STATE_BACKEND', 'sqlite')
+    monkeypatch.setenv('PLOT_STATE_PATH', str(tmp_path / 'shared' / 'state.sqlite3'))
+    assert isinstance(create_state_store(str(tmp_path)), SQLiteStateStore)
+
+    monkeypatch.setenv('PLOT_STATE_BACKEND', 'memory')
+    assert not create_state_store(str(tmp_path)).is_shared
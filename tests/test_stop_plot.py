@@ -0,0 +1,94 @@
+import threading
+import time
+
+import pytest
+from werkzeug.datastructures import MultiDict
+
+
+@pytest.fixture
+def running_plot(server, monkeypatch):
+    """Start a slow simulated plot on a thread and wait until it can be halted."""
+    # About 5 ms per simulated move, so the plot is mid-stroke when the stop arrives
+    monkeypatch.setenv('AXIDRAW_SIM_TIME_SCALE', '0.0025')
+    filepath = server.add_svg('long.svg', paths=400)
+    device = server.device
+
+    def plot_file():
+        try:
+            server.index.run_plot_job(device, 'long.svg', filepath, server.index.read_plot_options(MultiDict()))
+        except OSError:
+            # Raised by the plots whose disable_xy is made to fail
+            pass
+
+    plot_thread = threading.Thread(target=plot_file)
+
+    def start():
+        plot_thread.start()
+        while device.halt is None:
+            time.sleep(0.001)
+        # Let plot_setup finish so the stop halts a moving plot rather than skipping it
+        time.sleep(0.05)
+        return plot_thread
+
+    yield start
+    plot_thread.join(timeout=10)
+
+
+def fail_disable_xy(ad, monkeypatch, wait_for=None):
+    """Make disable_xy on ``ad`` raise, optionally after blocking on ``wait_for``."""
+    run_manual_command = ad.run_manual_command
+
+    def run_failing_command():
+        if ad.options.manual_cmd == 'disable_xy':
+            if wait_for is not None:
+                wait_for.wait(10)
+            raise OSError("USB write failed")
+        run_manual_command()
+
+    monkeypatch.setattr(ad, 'run_manual_command', run_failing_command)
+
+
+def stop(server):
+    return server.client.post(f'/plot/stop?device={server.device.name}').get_json()['stop_result']
+
+
+def test_stop_reports_the_halted_plot(server, running_plot):
+    running_plot()
+
+    stop_result = stop(server)
+
+    assert stop_result['method'] == 'pause_request'
+    assert stop_result['success'] is True
+    assert stop_result['disable_xy'] is True
+    assert stop_result['stopped_code']
+
+
+def test_stop_falls_back_when_the_halted_plot_cannot_disable_the_motors(server, running_plot, monkeypatch):
+    fail_disable_xy(server.device.ad, monkeypatch)
+    running_plot()
+
+    stop_result = stop(server)
+
+    assert stop_result['method'] == 'cleanup_commands'
+    assert stop_result['disable_xy'] is True
+    assert stop_result['success'] is True
+    assert stop_result['stopped_code']
+
+
+def test_stop_waits_for_the_halt_before_sending_cleanup_commands(server, running_plot, monkeypatch):
+    disable_released = threading.Event()
+    fail_disable_xy(server.device.ad, monkeypatch, wait_for=disable_released)
+    monkeypatch.setattr(server.index, 'STOP_HALT_TIMEOUT_SECONDS', 0.2)
+    running_plot()
+    halt = server.device.halt
+
+    started_at = time.perf_counter()
+    stop_result = stop(server)
+    waited = time.perf_counter() - started_at
+    disable_released.set()
+
+    assert waited >= 0.2
+    assert not halt.motors_disabled
+    assert stop_result['method'] == 'cleanup_commands'
+    assert stop_result['raise_pen'] is True
+    assert stop_result['disable_xy'] is True
@@ -0,0 +1,89 @@
+import io
+
+import pytest
+
+from svg_layers import AUTO_PRECISION, LayerExtractor, get_document_precision, quantize_numbers, quantize_path_data
+from svg_polylines import parse_path_data
+
+
+def extract(svg_markup, layer_number=None, precision=None):
+    """Run the extractor over an SVG string and return the output markup and layers."""
+    output = io.StringIO()
+    extractor = LayerExtractor(output, layer_number, precision)
+    extractor.parser.Parse(svg_markup.encode('utf-8'), True)
+    return output.getvalue(), extractor.get_layers()
+
+
+def test_quantized_path_keeps_its_geometry():
+    path_data = 'M1.23456,2.5L.5.5c1.004-.25 2.9996.125 3.3333 0'
+
+    quantized = quantize_path_data(path_data, 2)
+
+    assert quantized == 'M1.23,2.5L0.5 0.5c1 -0.25 3 0.12 3.33 0'
+    original_points = parse_path_data(path_data, 0.001)
+    quantized_points = parse_path_data(quantized, 0.001)
+    assert len(quantized_points[0]) == len(original_points[0])
+    for (x, y), (original_x, original_y) in zip(quantized_points[0], original_points[0]):
+        assert x == pytest.approx(original_x, abs=0.01)
+        assert y == pytest.approx(original_y, abs=0.01)
+
+
+def test_quantization_leaves_integers_alone():
+    assert quantize_numbers('10 20.0 -0.0001 1e-5', 2) == '10 20 0 0'
+
+
+@pytest.mark.parametrize('path_data,precision,quantized', [
+    ('M0 0a5 5 0 0110 10', 1, 'M0 0a5 5 0 0110 10'),
+    # "011.5" is large-arc 0, sweep 1 and x 1.5, not the number 11.5
+    ('M0 0a1.5 1.5 0 011.5 2', 1, 'M0 0a1.5 1.5 0 01 1.5 2'),
+    ('M0 0a1.5 1.5 0 011.5 2', 0, 'M0 0a2 2 0 01 2 2'),
+    ('M0 0A1.25 1.25 0 1,0 3.25 4 2.5 2.5 0 0 1 .5 .5', 0, 'M0 0A1 1 0 1,0 3 4 2 2 0 0 1 0 0'),
+])
+def test_packed_arc_flags_are_copied_through(path_data, precision, quantized):
+    assert quantize_path_data(path_data, precision) == quantized
+
+    original_end = parse_path_data(path_data, 0.001)[0][-1]
+    quantized_end = parse_path_data(quantized, 0.001)[0][-1]
+    assert quantized_end == pytest.approx(original_end, abs=0.5 * 10 ** -precision * 4)
+
+
+def test_layer_export_keeps_packed_arc_flags():
+    output, _ = extract('<svg viewBox="0 0 12 9"><path d="M1 1a1.5 1.5 0 011.5 2"/></svg>', precision=0)
+
+    assert 'd="M1 1a2 2 0 01 2 2"' in output
+
+
+@pytest.mark.parametrize('attributes,precision', [
+    ({'viewBox': '0 0 12 9', 'width': '12in', 'height': '9in'}, 3),
+    ({'viewBox': '0 0 297 210', 'width': '297mm', 'height': '210mm'}, 1),
+    ({'viewBox': '0 0 1000 800'}, 1),
+    ({'viewBox': '0 0 20000 10000'}, 0),
+    ({'width': '12in', 'height': '9in'}, 1),
+    ({}, 6),
+])
+def test_document_precision_follows_the_viewbox_scale(attributes, precision):
+    assert get_document_precision(attributes) == precision
+
+
+def test_auto_precision_keeps_detail_in_small_user_units():
+    svg_markup = (
+        '<svg xmlns="http://www.w3.org/2000/svg" xmlns:inkscape="http://www.inkscape.org/namespaces/inkscape" '
+        'width="12in" height="9in" viewBox="0 0 12 9">'
+        '<g inkscape:label="1 outline"><path d="M1.23456 2.34567L1.2399 2.3412"/></g>'
+        '<g inkscape:label="2 fill"><circle cx="6.54321" cy="4.5" r="0.25"/></g>'
+        '</svg>'
+    )
+
+    output, layers = extract(svg_markup, layer_number=1, precision=AUTO_PRECISION)
+
+    assert layers == [{'label': '1 outline', 'number': 1}, {'label': '2 fill', 'number': 2}]
+    # The root viewBox is never rounded; the two points 0.006 in apart stay apart
+    assert 'viewBox="0 0 12 9"' in output
+    assert 'd="M1.235 2.346L1.24 2.341"' in output
+    assert 'circle' not in output
+
+
+def test_explicit_precision_overrides_the_document_scale():
+    output, _ = extract('<svg viewBox="0 0 12 9"><line x1="1.23456" y1="2.5"/></svg>', precision=1)
+
+    assert '<line x1="1.2" y1="2.5"/>' in output
@@ -0,0 +1,191 @@
+import math
+import struct
+
+import pytest
+
+from svg_polylines import (
+    GRID_STEPS,
+    HEADER_BYTES,
+    HEADER_FORMAT,
+    MAX_POLYLINE_POINTS,
+    POLYLINE_MAGIC,
+    POLYLINE_MARKER,
+    encode_polylines,
+    export_svg_polylines,
+    parse_path_data,
+)
+
+
+def decode_polylines(data):
+    """Decode a polyline stream the way main.js does; returns (header, polylines in user units)."""
+    fields = struct.unpack(HEADER_FORMAT, data[:HEADER_BYTES])
+    magic, version, flags, width_mm, height_mm = fields[:5]
+    view_box = fields[5:9]
+    origin_x, origin_y, unit, polyline_count, value_count = fields[9:]
+    values = struct.unpack(f'<{value_count}h', data[HEADER_BYTES:])
+    header = {
+        'magic': magic,
+        'size_mm': (width_mm, height_mm),
+        'view_box': view_box,
+        'unit': unit,
+        'polyline_count': polyline_count,
+        'values': values,
+    }
+
+    polylines = []
+    x = y = 0
+    index = 0
+    while index < len(values):
+        assert values[index] == POLYLINE_MARKER
+        count = values[index + 1]
+        index += 2
+        points = []
+        for _ in range(count):
+            x += values[index]
+            y += values[index + 1]
+            index += 2
+            points.append((origin_x + x * unit, origin_y + y * unit))
+        polylines.append(points)
+    assert len(polylines) == polyline_count
+    return header, polylines
+
+
+def assert_points_close(actual, expected, tolerance):
+    assert len(actual) == len(expected)
+    for (actual_x, actual_y), (expected_x, expected_y) in zip(actual, expected):
+        assert actual_x == pytest.approx(expected_x, abs=tolerance)
+        assert actual_y == pytest.approx(expected_y, abs=tolerance)
+
+
+def test_round_trip_restores_polylines_within_half_a_grid_step():
+    polylines = [[(0.0, 0.0), (10.0, 0.0), (10.0, 7.5)], [(2.25, 3.5), (6.125, 9.0)]]
+
+    header, decoded = decode_polylines(encode_polylines(polylines, (0.0, 0.0, 10.0, 10.0), (96.0, 96.0)))
+
+    assert header['magic'] == POLYLINE_MAGIC
+    assert header['view_box'] == (0.0, 0.0, 10.0, 10.0)
+    assert header['size_mm'][0] == pytest.approx(25.4, abs=1e-4)
+    for decoded_polyline, polyline in zip(decoded, polylines):
+        assert_points_close(decoded_polyline, polyline, header['unit'] / 2)
+
+
+def test_pen_up_moves_are_deltas_from_the_previous_polyline():
+    header, decoded = decode_polylines(encode_polylines([[(0.0, 0.0), (1.0, 0.0)], [(1.0, 1.0), (0.0, 1.0)]], (0, 0, 1, 1), None))
+
+    values = header['values']
+    second_marker = values.index(POLYLINE_MARKER, 1)
+    # The second polyline starts one grid height above where the first ended
+    assert values[second_marker + 2:second_marker + 4] == (0, GRID_STEPS)
+    assert decoded[1][0] == pytest.approx((1.0, 1.0))
+
+
+def test_full_range_deltas_do_not_collide_with_the_pen_up_marker():
+    polylines = [[(0.0, 0.0), (100.0, 100.0), (0.0, 0.0)], [(100.0, 0.0), (0.0, 100.0)]]
+
+    header, decoded = decode_polylines(encode_polylines(polylines, (0, 0, 100, 100), None))
+
+    deltas = [value for value in header['values'] if value != POLYLINE_MARKER]
+    assert max(deltas) == GRID_STEPS
+    assert min(deltas) == -GRID_STEPS
+    assert header['values'].count(POLYLINE_MARKER) == len(polylines)
+    for decoded_polyline, polyline in zip(decoded, polylines):
+        assert_points_close(decoded_polyline, polyline, header['unit'] / 2)
+
+
+def test_long_polylines_continue_from_their_last_point_in_the_next_chunk():
+    polyline = [(float(step), float(step % 2)) for step in range(MAX_POLYLINE_POINTS + 10)]
+
+    header, decoded = decode_polylines(encode_polylines([polyline], (0, 0, len(polyline), 1), None))
+
+    assert len(decoded) == 2
+    assert len(decoded[0]) == MAX_POLYLINE_POINTS
+    assert decoded[1][0] == decoded[0][-1]
+    assert_points_close(decoded[0] + decoded[1][1:], polyline, header['unit'] / 2)
+
+
+def test_points_that_quantize_to_the_same_grid_cell_are_dropped():
+    header, decoded = decode_polylines(encode_polylines([[(0.0, 0.0), (1e-9, 0.0), (1.0, 1.0)]], (0, 0, 1, 1), None))
+
+    assert len(decoded[0]) == 2
+    assert_points_close(decoded[0], [(0.0, 0.0), (1.0, 1.0)], header['unit'] / 2)
+
+
+def test_relative_commands_continue_from_the_current_point():
+    polylines = parse_path_data('m1 1 l2 0 h1 v3 z m1 1 1 1 2 2', 0.01)
+
+    assert polylines == [
+        [(1.0, 1.0), (3.0, 1.0), (4.0, 1.0), (4.0, 4.0), (1.0, 1.0)],
+        # A relative moveto after closepath starts at the subpath start; its extra pairs are linetos
+        [(2.0, 2.0), (3.0, 3.0), (5.0, 5.0)],
+    ]
+
+
+def test_relative_curves_end_at_the_offset_end_point():
+    polylines = parse_path_data('M10 10 c0 5 10 5 10 0 s10 -5 10 0 q5 5 10 0 t10 0', 0.01)
+
+    assert polylines[0][0] == (10.0, 10.0)
+    assert polylines[0][-1] == pytest.approx((50.0, 10.0))
+
+
+def test_arc_is_flattened_onto_its_circle():
+    tolerance = 0.01
+    points = parse_path_data('M10 0 A10 10 0 0 1 -10 0', tolerance)[0]
+
+    assert points[0] == (10.0, 0.0)
+    assert points[-1] == pytest.approx((-10.0, 0.0))
+    for x, y in points:
+        assert math.hypot(x, y) == pytest.approx(10.0, abs=1e-9)
+    # Sweep flag 1 runs through positive angles, i.e. through (0, 10)
+    assert max(y for _, y in points) == pytest.approx(10.0, abs=tolerance)
+    # Chords stay within the tolerance of the arc
+    for (x1, y1), (x2, y2) in zip(points, points[1:]):
+        assert 10.0 - math.hypot((x1 + x2) / 2, (y1 + y2) / 2) <= tolerance
+
+
+def test_relative_arc_with_packed_flags():
+    # "0110 10" is large-arc 0, sweep 1, then the end point (10, 10)
+    points = parse_path_data('M0 0a5 5 0 0110 10', 0.01)[0]
+
+    assert points[-1] == pytest.approx((10.0, 10.0))
+    # The radius is too small for the chord, so the arc is a half circle around its midpoint
+    assert len(points) > 2
+    for x, y in points:
+        assert math.hypot(x - 5.0, y - 5.0) == pytest.approx(math.sqrt(50.0), abs=1e-6)
+
+
+def test_arc_radius_too_small_is_scaled_up_to_reach_the_end_point():
+    points = parse_path_data('M0 0 A1 1 0 0 1 10 0', 0.01)[0]
+
+    assert points[-1] == pytest.approx((10.0, 0.0))
+    for x, y in points:
+        assert math.hypot(x - 5.0, y) == pytest.approx(5.0, abs=1e-6)
+
+
+def test_origin_far_from_zero_keeps_small_details():
+    # float32 cannot hold 100000.3 exactly; the grid must follow the stored origin
+    polylines = [[(100000.3, 5.0), (100000.301, 5.001)]]
+
+    header, decoded = decode_polylines(encode_polylines(polylines, (100000, 0, 1, 10), None))
+
+    assert_points_close(decoded[0], polylines[0], header['unit'] / 2 + 1e-9)
+
+
+def test_export_applies_transforms_and_physical_size(tmp_path):
+    svg_path = tmp_path / 'drawing.svg'
+    svg_path.write_text(
+        '<svg xmlns="http://www.w3.org/2000/svg" width="100mm" height="50mm" viewBox="0 0 100 50">'
+        '<g transform="translate(10 5)"><line x1="0" y1="0" x2="20" y2="0"/></g>'
+        '<rect x="50" y="10" width="10" height="10" transform="scale(0.5)"/>'
+        '</svg>',
+        encoding='utf-8',
+    )
+    output_path = tmp_path / 'drawing.polylines'
+
+    export_svg_polylines(str(svg_path), str(output_path))
+    header, decoded = decode_polylines(output_path.read_bytes())
+
+    assert header['size_mm'] == pytest.approx((100.0, 50.0), abs=1e-3)
+    assert header['view_box'] == (0.0, 0.0, 100.0, 50.0)
+    tolerance = header['unit'] / 2
+    assert_points_close(decoded[0], [(10.0, 5.0), (30.0, 5.0)], tolerance)
+    assert_points_close(decoded[1], [(25.0, 5.0), (30.0, 5.0), (30.0, 10.0), (25.0, 10.0), (25.0, 5.0)], tolerance)
@@ -0,0 +1,12 @@
+#!/usr/bin/env python
+#
+# WSGI entry point for production servers, for example:
+#  waitress-serve --threads=8 --port=5007 wsgi:app
+#  gunicorn -c gunicorn.conf.py wsgi:app
+
+from index import app, start_artwork_watcher
+
+# Gunicorn workers forward to the hardware sidecar, which starts its own watcher
+start_artwork_watcher()
+
+application = app